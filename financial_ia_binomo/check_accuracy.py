@@ -5,12 +5,17 @@ Verificador de Precisión de IA Financiera
 
 import pandas as pd
 import numpy as np
-import joblib
 import os
+import sys
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from indicator_registry import compute_indicators, profile_columns
+from ohlcv_store import read_frame, source_exists
+from model_bundle import load_model_files
+
 def load_and_fix_data():
     """Carga y arregla los datos"""
     print("📊 Cargando y arreglando datos...")
@@ -18,12 +23,12 @@ def load_and_fix_data():
     try:
         # Cargar datos
         data_path = "data/price_data.csv"
-        if not os.path.exists(data_path):
+        if not source_exists(data_path):
             print("❌ Archivo de datos no encontrado")
             return None
         
-        # Cargar con formato flexible
-        df = pd.read_csv(data_path)
+        # Cargar con formato flexible (desde el almacén columnar si ya se migró)
+        df = read_frame(data_path)
         
         # Arreglar formato de fechas
         try:
@@ -41,63 +46,13 @@ def load_and_fix_data():
         print(f"❌ Error cargando datos: {e}")
         return None
 
-def add_technical_indicators(df):
+def add_technical_indicators(df, features=None):
     """Agrega indicadores técnicos"""
     try:
-        # Medias móviles
-        df['SMA_5'] = df['close'].rolling(window=5).mean()
-        df['SMA_10'] = df['close'].rolling(window=10).mean()
-        df['SMA_20'] = df['close'].rolling(window=20).mean()
-        df['EMA_12'] = df['close'].ewm(span=12).mean()
-        df['EMA_26'] = df['close'].ewm(span=26).mean()
-        
-        # MACD
-        df['MACD'] = df['EMA_12'] - df['EMA_26']
-        df['MACD_signal'] = df['MACD'].ewm(span=9).mean()
-        df['MACD_histogram'] = df['MACD'] - df['MACD_signal']
-        
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI_14'] = 100 - (100 / (1 + rs))
-        
-        # Bollinger Bands
-        df['BB_middle'] = df['close'].rolling(window=20).mean()
-        bb_std = df['close'].rolling(window=20).std()
-        df['BB_upper'] = df['BB_middle'] + (bb_std * 2)
-        df['BB_lower'] = df['BB_middle'] - (bb_std * 2)
-        df['BB_width'] = df['BB_upper'] - df['BB_lower']
-        df['BB_position'] = (df['close'] - df['BB_lower']) / (df['BB_upper'] - df['BB_lower'])
-        
-        # Stochastic
-        low_min = df['low'].rolling(window=14).min()
-        high_max = df['high'].rolling(window=14).max()
-        df['Stoch_K'] = 100 * ((df['close'] - low_min) / (high_max - low_min))
-        df['Stoch_D'] = df['Stoch_K'].rolling(window=3).mean()
-        
-        # Volumen
-        df['Volume_SMA'] = df['volume'].rolling(window=20).mean()
-        df['Volume_ratio'] = df['volume'] / df['Volume_SMA']
-        
-        # Momentum
-        df['ROC'] = ((df['close'] - df['close'].shift(10)) / df['close'].shift(10)) * 100
-        df['MOM'] = df['close'] - df['close'].shift(10)
-        
-        # ATR
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        true_range = np.maximum(high_low, np.maximum(high_close, low_close))
-        df['ATR'] = true_range.rolling(window=14).mean()
-        
-        # Williams %R
-        highest_high = df['high'].rolling(window=14).max()
-        lowest_low = df['low'].rolling(window=14).min()
-        df['Williams_R'] = ((highest_high - df['close']) / (highest_high - lowest_low)) * -100
-        
-        return df
+        # Solo se calculan las columnas pedidas y sus dependencias
+        # Columnas del perfil 'train_ai' (BB_width es el ancho absoluto de las bandas)
+        columns = profile_columns('train_ai', features)
+        return compute_indicators(df, columns, profile='train_ai', fill=False)
         
     except Exception as e:
         print(f"❌ Error agregando indicadores: {e}")
@@ -123,13 +78,12 @@ def load_model():
         scaler_path = "models/scaler.pkl"
         features_path = "models/features.pkl"
         
-        if not all(os.path.exists(p) for p in [model_path, scaler_path, features_path]):
+        try:
+            bundle = load_model_files(model_path, scaler_path, features_path)
+        except FileNotFoundError:
             print("❌ Modelo no encontrado. Ejecuta train_ai.py primero")
             return None, None, None
-        
-        model = joblib.load(model_path)
-        scaler = joblib.load(scaler_path)
-        features = joblib.load(features_path)
+        model, scaler, features = bundle.model, bundle.scaler, bundle.features
         
         print("✅ Modelo cargado exitosamente")
         return model, scaler, features
@@ -10,12 +10,16 @@ import requests
 import time
 import json
 import os
+import sys
 from datetime import datetime, timedelta
 import yfinance as yf
 from alpha_vantage.timeseries import TimeSeries
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from dataset_updates import append_rows
+
 class DataCollector:
     """Sistema de recolección de datos financieros"""
     
@@ -259,37 +263,17 @@ class DataCollector:
         """Actualiza datos existentes con nuevos datos"""
         existing_path = os.path.join(self.data_dir, "price_data.csv")
         
-        if os.path.exists(existing_path):
-            print("📊 Actualizando datos existentes...")
-            
-            # Cargar datos existentes
-            existing_df = pd.read_csv(existing_path)
-            existing_df['datetime'] = pd.to_datetime(existing_df['datetime'])
-            
-            # Cargar nuevos datos
-            new_df = pd.read_csv(new_data_path)
-            new_df['datetime'] = pd.to_datetime(new_df['datetime'])
-            
-            # Combinar datos
-            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            
-            # Eliminar duplicados
-            combined_df = combined_df.drop_duplicates(subset=['datetime'])
-            
-            # Ordenar por fecha
-            combined_df = combined_df.sort_values('datetime')
-            
-            # Guardar datos actualizados
-            combined_df.to_csv(existing_path, index=False)
-            
-            print(f"✅ Datos actualizados: {len(combined_df):,} registros totales")
-            return existing_path
+        # Solo se leen los nuevos datos: el CSV principal se actualiza por la cola
+        new_df = pd.read_csv(new_data_path)
+        
+        # append_rows crea el archivo si no existe (modo 'create')
+        summary = append_rows(existing_path, new_df)
+        if summary['mode'] == 'create':
+            print(f"✅ Datos iniciales guardados: {summary['rows']:,} registros")
         else:
-            # Si no existen datos, usar los nuevos
-            new_df = pd.read_csv(new_data_path)
-            new_df.to_csv(existing_path, index=False)
-            print(f"✅ Datos iniciales guardados: {len(new_df):,} registros")
-            return existing_path
+            print(f"✅ Datos actualizados: {summary['rows']:,} registros totales "
+                  f"(+{summary['added']:,} nuevos, {summary['duplicates']:,} duplicados)")
+        return existing_path
 
 def main():
     """Función principal"""
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Migra los CSV de data/ al almacén columnar particionado (data/store)
+"""
+
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from ohlcv_store import OHLCVStore, dataset_name
+
+def folder_size(path):
+    """Tamaño total de un directorio en bytes"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+def measure(load):
+    """Tiempo y pico de memoria de una carga"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = load()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df, elapsed, peak
+
+def main():
+    """Función principal"""
+    print("🗄️ MIGRACIÓN A ALMACÉN COLUMNAR")
+    print("=" * 50)
+    
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    store = OHLCVStore()
+    
+    csv_files = sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+    if not csv_files:
+        print("❌ No hay archivos CSV en data/")
+        return
+    
+    for csv_path in csv_files:
+        name = os.path.basename(csv_path)
+        try:
+            manifest = store.import_csv(csv_path)
+        except Exception as e:
+            print(f"⚠️ {name}: no migrado ({e})")
+            continue
+        
+        partitions = sum(len(days) for days in manifest['partitions'].values())
+        csv_size = os.path.getsize(csv_path)
+        store_size = folder_size(store.dataset_dir(dataset_name(csv_path)))
+        print(f"✅ {name}: {manifest['rows']:,} filas en {partitions} particiones "
+              f"({csv_size / 1e6:.1f}MB → {store_size / 1e6:.1f}MB)")
+        
+        # Comparar la carga completa desde CSV y desde el almacén
+        csv_df, csv_time, csv_peak = measure(lambda: store_df_from_csv(csv_path))
+        store_df, store_time, store_peak = measure(lambda: store.read(dataset_name(csv_path)))
+        _, parts_time, parts_peak = measure(lambda: store.read(dataset_name(csv_path), original_order=False))
+        # El almacén devuelve symbol como categórica; mismos valores que el CSV
+        if 'symbol' in store_df.columns:
+            store_df = store_df.astype({'symbol': object})
+        same = csv_df is not None and csv_df.equals(store_df)
+        print(f"   CSV: {csv_time*1000:.0f}ms, pico {csv_peak / 1e6:.1f}MB | "
+              f"almacén: {store_time*1000:.0f}ms, pico {store_peak / 1e6:.1f}MB | "
+              f"idénticos: {'✅' if same else '❌'}")
+        print(f"   Almacén en orden de particiones: {parts_time*1000:.0f}ms, pico {parts_peak / 1e6:.1f}MB")
+        
+        # Lectura filtrada: un símbolo y un día, solo el cierre
+        symbols = list(manifest['partitions'])
+        day = sorted(manifest['partitions'][symbols[0]])[-1]
+        _, filtered_time, filtered_peak = measure(lambda: store.read(
+            dataset_name(csv_path), start=day, end=f"{day} 23:59:59.999999",
+            symbols=symbols[:1], columns=['close']))
+        print(f"   Filtrado ({symbols[0]}, {day}, close): {filtered_time*1000:.1f}ms, "
+              f"pico {filtered_peak / 1e6:.2f}MB")
+    
+    print("\n📁 Los loaders (load_data, start_api, train_ai, check_accuracy, backtester)")
+    print("   leen del almacén mientras el CSV no cambie.")
+
+def store_df_from_csv(csv_path):
+    """Carga el CSV como lo hace import_csv, para comparar"""
+    import pandas as pd
+    df = pd.read_csv(csv_path)
+    if 'datetime' not in df.columns and 'timestamp' in df.columns:
+        df = df.rename(columns={'timestamp': 'datetime'})
+    df['datetime'] = pd.to_datetime(df['datetime'], format='mixed')
+    return df
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,9 @@ from sklearn.metrics import accuracy_score, classification_report
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from indicator_registry import compute_indicators, profile_columns
+
 def print_step(step: int, message: str):
     """Imprime un paso del proceso"""
     print(f"\n📋 PASO {step}: {message}")
@@ -69,61 +72,14 @@ def generate_sample_data():
     print_success(f"Generados {n_samples} registros de datos")
     return df
 
+# Indicadores con los nombres que usa el modelo simple (alias del registro)
+INDICATOR_COLUMNS = profile_columns('simple_model')
+
 def calculate_technical_indicators(df):
     """Calcula indicadores técnicos"""
     print_step(2, "Calculando indicadores técnicos")
     
-    # Medias móviles
-    df['sma_5'] = df['close'].rolling(window=5).mean()
-    df['sma_20'] = df['close'].rolling(window=20).mean()
-    df['ema_12'] = df['close'].ewm(span=12).mean()
-    df['ema_26'] = df['close'].ewm(span=26).mean()
-    
-    # RSI
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-    
-    # MACD
-    df['macd'] = df['ema_12'] - df['ema_26']
-    df['macd_signal'] = df['macd'].ewm(span=9).mean()
-    df['macd_histogram'] = df['macd'] - df['macd_signal']
-    
-    # Bollinger Bands
-    df['bb_middle'] = df['close'].rolling(window=20).mean()
-    bb_std = df['close'].rolling(window=20).std()
-    df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-    df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-    df['bb_width'] = df['bb_upper'] - df['bb_lower']
-    df['bb_position'] = (df['close'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
-    
-    # Stochastic
-    low_min = df['low'].rolling(window=14).min()
-    high_max = df['high'].rolling(window=14).max()
-    df['stoch_k'] = 100 * ((df['close'] - low_min) / (high_max - low_min))
-    df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
-    
-    # Volumen
-    df['volume_sma'] = df['volume'].rolling(window=20).mean()
-    df['volume_ratio'] = df['volume'] / df['volume_sma']
-    
-    # Momentum
-    df['momentum'] = df['close'] - df['close'].shift(4)
-    df['rate_of_change'] = ((df['close'] - df['close'].shift(10)) / df['close'].shift(10)) * 100
-    
-    # ATR (Average True Range)
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    true_range = np.maximum(high_low, np.maximum(high_close, low_close))
-    df['atr'] = true_range.rolling(window=14).mean()
-    
-    # Williams %R
-    highest_high = df['high'].rolling(window=14).max()
-    lowest_low = df['low'].rolling(window=14).min()
-    df['williams_r'] = -100 * ((highest_high - df['close']) / (highest_high - lowest_low))
+    df = compute_indicators(df, INDICATOR_COLUMNS, profile='simple_model', fill=False)
     
     print_success("Indicadores técnicos calculados")
     return df
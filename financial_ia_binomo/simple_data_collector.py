@@ -7,12 +7,16 @@ Extrae datos de Yahoo Finance y genera datos simulados
 import pandas as pd
 import numpy as np
 import os
+import sys
 import json
 from datetime import datetime, timedelta
 import yfinance as yf
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from dataset_updates import append_rows
+
 class SimpleDataCollector:
     """Colector de datos simplificado"""
     
@@ -222,37 +226,17 @@ class SimpleDataCollector:
         """Actualiza el dataset principal"""
         main_path = os.path.join(self.data_dir, "price_data.csv")
         
-        if os.path.exists(main_path):
-            print("📊 Actualizando dataset principal...")
-            
-            # Cargar datos existentes
-            existing_df = pd.read_csv(main_path)
-            existing_df['datetime'] = pd.to_datetime(existing_df['datetime'])
-            
-            # Cargar nuevos datos
-            new_df = pd.read_csv(new_data_path)
-            new_df['datetime'] = pd.to_datetime(new_df['datetime'])
-            
-            # Combinar datos
-            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            
-            # Eliminar duplicados
-            combined_df = combined_df.drop_duplicates(subset=['datetime'])
-            
-            # Ordenar por fecha
-            combined_df = combined_df.sort_values('datetime')
-            
-            # Guardar datos actualizados
-            combined_df.to_csv(main_path, index=False)
-            
-            print(f"✅ Dataset actualizado: {len(combined_df):,} registros totales")
-            return main_path
+        # Solo se leen los nuevos datos: el CSV principal se actualiza por la cola
+        new_df = pd.read_csv(new_data_path)
+        
+        # append_rows crea el archivo si no existe (modo 'create')
+        summary = append_rows(main_path, new_df)
+        if summary['mode'] == 'create':
+            print(f"✅ Dataset inicial creado: {summary['rows']:,} registros")
         else:
-            # Si no existe, usar los nuevos datos
-            new_df = pd.read_csv(new_data_path)
-            new_df.to_csv(main_path, index=False)
-            print(f"✅ Dataset inicial creado: {len(new_df):,} registros")
-            return main_path
+            print(f"✅ Dataset actualizado: {summary['rows']:,} registros totales "
+                  f"(+{summary['added']:,} nuevos, {summary['duplicates']:,} duplicados)")
+        return main_path
     
     def show_data_info(self, filepath):
         """Muestra información sobre los datos"""
@@ -1,13 +1,21 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import numpy as np
 import pandas as pd
-from tensorflow.keras.models import load_model
 from data_processing import load_data
-from features import add_technical_indicators, get_feature_columns
+from features import get_feature_columns
+from feature_pipeline import add_indicators_by_symbol
+from feature_cache import cached_indicators
+from precision import get_feature_dtype
+from mapped_matrix import build_lock, file_stamp, matrix_key, matrix_path, open_matrix, write_matrix
+from time_index import TimeIndex
+from model_bundle import load_model_files
+from inference import load_backend
+from micro_batcher import MicroBatcher
+from functools import partial
 from sklearn.preprocessing import MinMaxScaler
 from datetime import datetime
 import os
+import json
 import joblib
 
 app = Flask(__name__)
@@ -19,45 +27,102 @@ scaler = None
 features = None
 df = None
 data = None
+matrix = None
+time_index = None
+batcher = None
+date_tolerance = None
 seq_length = 30
 model_loaded = False
 
+DATA_PATH = '../data/price_data.csv'
+MODEL_PATH = '../models/lstm_model.h5'
+SCALER_PATH = '../models/scaler.pkl'
+FEATURES_PATH = '../models/features.pkl'
+CONFIG_PATH = '../config.json'
+
+def load_config_value(section, key, default=None):
+    """Valor de config.json (default si falta el archivo o la clave)"""
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            value = json.load(f).get(section, {}).get(key)
+    except (OSError, ValueError):
+        value = None
+    return default if value is None else value
+
+def load_date_tolerance():
+    """Distancia máxima a la barra más cercana ('api.date_tolerance_seconds', null = sin límite)"""
+    seconds = load_config_value('api', 'date_tolerance_seconds')
+    return pd.Timedelta(seconds=seconds) if seconds is not None else None
+
 def load_model_and_data():
     """Carga el modelo y los datos necesarios"""
-    global model, scaler, features, df, data, model_loaded
+    global model, scaler, features, df, data, matrix, time_index, date_tolerance, batcher, model_loaded
     
     try:
-        # Cargar datos
-        df = load_data('../data/price_data.csv')
-        df = add_technical_indicators(df)
+        dtype = get_feature_dtype()
         
-        # Cargar características guardadas o usar por defecto
-        features_path = '../models/features.pkl'
-        if os.path.exists(features_path):
-            features = joblib.load(features_path)
+        # Paquete del modelo; el backend de inferencia ('model.inference_backend')
+        # decide si hace falta cargar el modelo Keras (y TensorFlow)
+        try:
+            bundle = load_model_files(MODEL_PATH, SCALER_PATH, FEATURES_PATH, with_model=False)
+        except FileNotFoundError:
+            bundle = None
+        
+        if bundle is not None:
+            model = load_backend(bundle, load_config_value('model', 'inference_backend', 'auto'))
+            scaler = bundle.scaler
+            features = bundle.features or get_feature_columns()
+            scaler_stamp = bundle.fingerprint
         else:
-            features = get_feature_columns()
+            # Sin modelo: características y scaler sueltos o por defecto
+            model = None
+            features = joblib.load(FEATURES_PATH) if os.path.exists(FEATURES_PATH) else get_feature_columns()
+            scaler = joblib.load(SCALER_PATH) if os.path.exists(SCALER_PATH) else None
+            scaler_stamp = file_stamp(SCALER_PATH)
         
-        # Verificar características disponibles
-        features = [f for f in features if f in df.columns]
+        # Matriz mapeada compartida por todos los workers: solo el primero que
+        # la encuentra desactualizada carga el CSV y calcula los indicadores
+        key = matrix_key('api_server', file_stamp(DATA_PATH), features, dtype.name, scaler_stamp)
+        path = matrix_path(DATA_PATH, 'api_server')
+        matrix = open_matrix(path, key)
+        built = False
         
-        # Cargar scaler guardado o crear nuevo
-        scaler_path = '../models/scaler.pkl'
-        if os.path.exists(scaler_path):
-            scaler = joblib.load(scaler_path)
-        else:
-            scaler = MinMaxScaler()
-            data_temp = scaler.fit_transform(df[features])
+        if matrix is None:
+            with build_lock(path):
+                # Otro worker pudo construirla mientras se esperaba el bloqueo
+                matrix = open_matrix(path, key)
+                if matrix is None:
+                    # Cargar datos
+                    df = load_data(DATA_PATH)
+                    # Secuencial: se ejecuta al importar el módulo
+                    df = cached_indicators(df, compute_fn=partial(add_indicators_by_symbol, n_jobs=1))
+                    
+                    # Verificar características disponibles
+                    available = [f for f in features if f in df.columns]
+                    
+                    if scaler is None:
+                        scaler = MinMaxScaler()
+                        scaler.fit(df[available].astype(dtype))
+                    
+                    # Preparar datos
+                    scaled = scaler.transform(df[available].astype(dtype)).astype(dtype)
+                    matrix = write_matrix(path, df, scaled=scaled, scaled_columns=available, key=key)
+                    built = True
+        print(f"🗺️ Matriz de datos guardada en {path}" if built else f"⚡ Matriz de datos mapeada desde {path}")
         
-        # Preparar datos
-        data = scaler.transform(df[features])
+        df = matrix.frame()
+        features = matrix.scaled_columns
+        data = matrix.scaled
+        time_index = TimeIndex(matrix.timestamps)
+        date_tolerance = load_date_tolerance()
         
-        # Cargar modelo
-        model_path = '../models/lstm_model.h5'
-        if os.path.exists(model_path) and os.path.getsize(model_path) > 0:
-            model = load_model(model_path)
+        if model is not None:
+            # Peticiones concurrentes a /predict comparten una llamada al modelo
+            batcher = MicroBatcher(model.predict,
+                                   max_batch=load_config_value('api', 'batch_max_size', 64),
+                                   max_wait_ms=load_config_value('api', 'batch_wait_ms', 2))
             model_loaded = True
-            print("✅ Modelo cargado exitosamente")
+            print(f"✅ Modelo cargado exitosamente (backend {model.name})")
         else:
             model_loaded = False
             print("⚠️ Modelo no encontrado. Ejecuta primero model_train.py")
@@ -92,21 +157,16 @@ def predict():
         }), 400
 
     try:
-        # Buscar la fecha más cercana
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        exact_match = df[df['datetime'] == date]
+        # Buscar la fecha exacta o la más cercana (búsqueda binaria, sin modificar df)
+        match = time_index.nearest(date, tolerance=date_tolerance)
+        if match is None:
+            return jsonify({
+                'error': 'No hay datos cerca de la fecha solicitada',
+                'tolerance_seconds': date_tolerance.total_seconds() if date_tolerance is not None else None
+            }), 404
         
-        if len(exact_match) == 0:
-            # Buscar la fecha más cercana
-            df['time_diff'] = abs(df['datetime'] - date)
-            closest_idx = df['time_diff'].idxmin()
-            idx = closest_idx
-            actual_date = df.loc[idx, 'datetime']
-            used_closest = True
-        else:
-            idx = exact_match.index[0]
-            actual_date = date
-            used_closest = False
+        idx, actual_date, exact = match
+        used_closest = not exact
         
         if idx < seq_length:
             return jsonify({
@@ -117,7 +177,7 @@ def predict():
             
         # Obtener secuencia y predecir
         seq = get_sequence(idx)
-        pred = model.predict(np.expand_dims(seq, axis=0), verbose=0)[0][0]
+        pred = float(batcher.predict(seq))
         
         # Calcular confianza
         confidence = abs(pred - 0.5) * 2  # Normalizar a 0-1
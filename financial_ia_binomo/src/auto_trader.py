@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 import time
 import json
 import os
+from collections import deque
 from typing import Dict, List, Optional
 import warnings
 warnings.filterwarnings('ignore')
@@ -19,6 +20,9 @@ class AutoTrader:
         self.current_positions = {}
         self.trade_history = []
         self.daily_stats = {}
+        self.feature_engines = {}
+        self.live_bars = {}
+        self.stateful_model = None
         
         # Inicializar componentes
         self.initialize_components()
@@ -39,7 +43,13 @@ class AutoTrader:
                 "path": "../models/lstm_model.h5",
                 "scaler_path": "../models/scaler.pkl",
                 "features_path": "../models/features.pkl",
-                "sequence_length": 30
+                "sequence_length": 30,
+                "streaming_features": True,
+                "streaming_parity": False,
+                "inference_backend": "auto",
+                "stateful_inference": False,
+                "stateful_refresh_bars": 30,
+                "stateful_max_gap_seconds": 300
             },
             "risk_management": {
                 "max_drawdown": 0.15,
@@ -50,7 +60,9 @@ class AutoTrader:
             "data": {
                 "symbols": ["EURUSD", "GBPUSD", "USDJPY"],
                 "timeframe": "1m",
-                "update_interval": 60
+                "update_interval": 60,
+                "tick_grace_seconds": 2,
+                "live_bars": 500
             },
             "api": {
                 "base_url": "http://localhost:8080",
@@ -86,6 +98,13 @@ class AutoTrader:
         from data_collector import MarketDataCollector
         self.data_collector = MarketDataCollector()
         
+        # Agregador de ticks en tiempo real (barras del timeframe configurado)
+        from tick_aggregator import TickAggregator
+        self.tick_aggregator = TickAggregator(
+            [self.config['data']['timeframe']],
+            grace=pd.Timedelta(seconds=self.config['data']['tick_grace_seconds'])
+        )
+        
         # Inicializar backtester
         from backtester import AdvancedBacktester
         self.backtester = AdvancedBacktester(
@@ -98,40 +117,70 @@ class AutoTrader:
         """Carga el modelo entrenado"""
         
         try:
-            from tensorflow.keras.models import load_model
-            import joblib
+            from model_bundle import load_model_files
+            from inference import load_backend
             
             model_path = self.config['model']['path']
             scaler_path = self.config['model']['scaler_path']
             features_path = self.config['model']['features_path']
             
-            if os.path.exists(model_path):
-                self.model = load_model(model_path)
-                print(f"✅ Modelo cargado desde {model_path}")
-            else:
+            try:
+                # Paquete o archivos sueltos; TensorFlow solo para modelos Keras
+                bundle = load_model_files(model_path, scaler_path, features_path, with_model=False)
+            except FileNotFoundError:
                 print(f"⚠️ Modelo no encontrado en {model_path}")
-                self.model = None
+                self.model = self.scaler = self.features = None
+                return
             
-            if os.path.exists(scaler_path):
-                self.scaler = joblib.load(scaler_path)
-                print(f"✅ Scaler cargado desde {scaler_path}")
+            if bundle.model_type == 'keras':
+                self.model = load_backend(bundle, self.config['model'].get('inference_backend', 'auto'))
             else:
-                self.scaler = None
-            
-            if os.path.exists(features_path):
-                self.features = joblib.load(features_path)
+                self.model = bundle.load_model()
+            self.scaler = bundle.scaler
+            self.features = bundle.features or None
+            print(f"✅ Modelo cargado desde {bundle.path}")
+            if self.features:
                 print(f"✅ Características cargadas: {len(self.features)}")
-            else:
-                self.features = None
                 
         except Exception as e:
             print(f"❌ Error cargando modelo: {e}")
             self.model = None
+            return
+        
+        if bundle.model_type == 'keras' and self.config['model'].get('stateful_inference', False):
+            # Estado LSTM por símbolo: un paso por barra nueva en vez de la ventana completa.
+            # Fuera del try: si no hay pesos para construirlo, es un error de configuración
+            from stateful_lstm import from_bundle
+            self.stateful_model = from_bundle(
+                bundle,
+                seq_length=self.config['model']['sequence_length'],
+                refresh_every=self.config['model'].get('stateful_refresh_bars', 30),
+                max_gap_seconds=self.config['model'].get('stateful_max_gap_seconds')
+            )
+    
+    def on_tick(self, symbol: str, timestamp, price: float, volume: float = 0.0):
+        """
+        Recibe un tick en tiempo real. Las barras que cierra se guardan (hasta
+        'live_bars' por símbolo) y el próximo ciclo las usa sin descargar datos.
+        """
+        for bar in self.tick_aggregator.push(symbol, timestamp, price, volume):
+            if symbol not in self.live_bars:
+                self.live_bars[symbol] = deque(maxlen=self.config['data']['live_bars'])
+            self.live_bars[symbol].append(bar)
     
     def get_market_data(self, symbol: str) -> Optional[pd.DataFrame]:
         """Obtiene datos actuales del mercado"""
         
         try:
+            # Barras construidas desde ticks, si ya alcanzan para una secuencia completa
+            from streaming_features import StreamingIndicatorEngine
+            from tick_aggregator import BAR_COLUMNS
+            
+            live = self.live_bars.get(symbol)
+            min_bars = self.config['model']['sequence_length'] + StreamingIndicatorEngine.WARMUP_BARS
+            if live is not None and len(live) >= min_bars:
+                return pd.DataFrame(list(live))[BAR_COLUMNS]
+            
             # Obtener datos de múltiples fuentes
             data = self.data_collector.get_multiple_sources_data(symbol, days=7)
             
@@ -145,26 +194,31 @@ class AutoTrader:
             print(f"❌ Error obteniendo datos de {symbol}: {e}")
             return None
     
-    def prepare_features(self, data: pd.DataFrame) -> Optional[np.ndarray]:
+    def prepare_features(self, data: pd.DataFrame, symbol: str = None) -> Optional[np.ndarray]:
         """Prepara características para predicción"""
         
         try:
-            from features import add_technical_indicators
-            
-            # Agregar indicadores técnicos
-            df = add_technical_indicators(data.copy())
-            
             # Usar características específicas
             if self.features:
-                available_features = [f for f in self.features if f in df.columns]
-                if len(available_features) < 5:
-                    print(f"⚠️ Pocas características disponibles: {available_features}")
-                    return None
-                feature_data = df[available_features].values
+                requested_features = self.features
             else:
                 # Características por defecto
-                default_features = ['close', 'SMA_5', 'SMA_10', 'RSI_14', 'MACD']
-                available_features = [f for f in default_features if f in df.columns]
+                requested_features = ['close', 'SMA_5', 'SMA_10', 'RSI_14', 'MACD']
+            
+            feature_data = None
+            if symbol and self.config['model'].get('streaming_features', True):
+                feature_data = self._stream_features(symbol, data, requested_features)
+            
+            if feature_data is None:
+                from features import add_technical_indicators
+                
+                # Agregar indicadores técnicos
+                df = add_technical_indicators(data.copy())
+                
+                available_features = [f for f in requested_features if f in df.columns]
+                if self.features and len(available_features) < 5:
+                    print(f"⚠️ Pocas características disponibles: {available_features}")
+                    return None
                 feature_data = df[available_features].values
             
             # Normalizar datos
@@ -177,8 +231,62 @@ class AutoTrader:
             print(f"❌ Error preparando características: {e}")
             return None
     
-    def predict_signal(self, feature_data: np.ndarray, symbol: str) -> Dict:
-        """Realiza predicción para un símbolo"""
+    def _stream_features(self, symbol: str, data: pd.DataFrame,
+                         requested_features: List[str]) -> Optional[np.ndarray]:
+        """
+        Calcula las características con el motor incremental del símbolo,
+        procesando solo las barras nuevas desde el último ciclo. La última
+        barra de cada descarga puede estar aún en formación: se deshace y se
+        vuelve a procesar en el ciclo siguiente, igual que en el cálculo batch.
+        Retorna None si hay que usar el cálculo batch.
+        """
+        from streaming_features import StreamingIndicatorEngine, STREAM_COLUMNS, INDICATOR_COLUMNS, check_parity
+        
+        available_features = [f for f in requested_features
+                              if f in data.columns or f in INDICATOR_COLUMNS]
+        if len(available_features) < 5 or any(f not in STREAM_COLUMNS for f in available_features):
+            return None
+        if 'datetime' not in data.columns:
+            return None
+        
+        seq_length = self.config['model']['sequence_length']
+        timestamps = data['datetime']
+        engine = self.feature_engines.get(symbol)
+        new_data = None
+        
+        if engine is not None:
+            # Deshacer la barra provisional del ciclo anterior
+            engine.rollback()
+        
+        if engine is not None and engine.last_timestamp is not None:
+            # Buscar la última barra procesada (O(log n)) y tomar solo las posteriores
+            pos = timestamps.searchsorted(engine.last_timestamp, side='right')
+            if pos > 0 and timestamps.iloc[pos - 1] == engine.last_timestamp:
+                new_data = data.iloc[pos:]
+        
+        if new_data is None:
+            # Primer ciclo o hueco en los datos: reconstruir el estado
+            engine = StreamingIndicatorEngine(history=seq_length)
+            self.feature_engines[symbol] = engine
+            new_data = data
+            
+            if self.config['model'].get('streaming_parity', False):
+                report = check_parity(data)
+                if not report['ok']:
+                    failed = [c for c, info in report['columns'].items() if not info['ok']]
+                    print(f"⚠️ Paridad incremental fallida para {symbol}: {failed}")
+        
+        engine.feed(new_data, provisional_last=True)
+        
+        if not engine.is_ready:
+            return None
+        return engine.feature_matrix(available_features, rows=seq_length)
+    
+    def predict_signal(self, feature_data: np.ndarray, symbol: str, timestamps=None) -> Dict:
+        """
+        Realiza predicción para un símbolo. Con timestamps (uno por fila de
+        feature_data) y stateful_inference activo se usa el estado LSTM del símbolo.
+        """
         
         if self.model is None:
             return {
@@ -197,11 +305,14 @@ class AutoTrader:
                     'reason': 'Datos insuficientes'
                 }
             
-            # Crear secuencia
-            sequence = feature_data[-seq_length:].reshape(1, seq_length, -1)
-            
-            # Predicción
-            prediction = self.model.predict(sequence, verbose=0)[0][0]
+            if self.stateful_model is not None and timestamps is not None:
+                prediction = self.stateful_model.predict(symbol, feature_data, timestamps)
+            else:
+                # Crear secuencia
+                sequence = feature_data[-seq_length:].reshape(1, seq_length, -1)
+                
+                # Predicción
+                prediction = self.model.predict(sequence)[0]
             
             # Determinar señal
             threshold = 0.5
@@ -339,12 +450,15 @@ class AutoTrader:
                     continue
                 
                 # Preparar características
-                feature_data = self.prepare_features(market_data)
+                feature_data = self.prepare_features(market_data, symbol)
                 if feature_data is None:
                     continue
                 
-                # Realizar predicción
-                signal = self.predict_signal(feature_data, symbol)
+                # Realizar predicción (las filas de características son las últimas barras)
+                timestamps = None
+                if 'datetime' in market_data.columns:
+                    timestamps = pd.to_datetime(market_data['datetime']).to_numpy()[-len(feature_data):]
+                signal = self.predict_signal(feature_data, symbol, timestamps)
                 
                 # Verificar si ya hay posición abierta
                 if symbol in self.current_positions:
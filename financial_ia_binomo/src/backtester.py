@@ -1,24 +1,70 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import seaborn as sns
-from typing import Dict, List, Tuple
-import joblib
+from typing import Dict, Tuple
+import os
+import hashlib
+import itertools
 from sklearn.metrics import classification_report, confusion_matrix
+from precision import get_feature_dtype
+from mapped_matrix import load_feature_matrix
+from model_bundle import load_model_files
+from inference import load_backend
+from sequences import build_sequences
+from parameter_sweep import sweep
+from trade_engine import (SIGNAL_BUY, SIGNAL_CODES, binary_grid, binary_metrics, contract_records,
+                          equity_returns, max_drawdown, settle_binary_options, sharpe_ratio,
+                          signals_from_probabilities, simulate_long_only, trade_records)
 import warnings
 warnings.filterwarnings('ignore')
 
+# Diferencia máxima aceptada entre la probabilidad por lotes y la barra a barra:
+# con pesos float32, BLAS agrupa las sumas según el tamaño del lote y el
+# resultado puede cambiar en el último bit (~1e-7)
+INFERENCE_TOLERANCE = 1e-6
+
+# Versión de cada modelo o scaler asignado (clave de la caché de señales; id() se reutiliza)
+_VERSIONS = itertools.count(1)
+
 class AdvancedBacktester:
     """
     Sistema de backtesting avanzado para evaluar estrategias de trading
     """
     
-    def __init__(self, initial_balance: float = 10000, commission: float = 0.001):
+    def __init__(self, initial_balance: float = 10000, commission: float = 0.001, dtype=None,
+                 inference_backend: str = 'auto'):
         self.initial_balance = initial_balance
         self.commission = commission  # 0.1% por operación
+        self.dtype = get_feature_dtype(dtype)  # float32 opcional para las secuencias
+        self.matrix = None
+        self.inference_backend = inference_backend  # ver inference.load_backend
+        self._signal_cache = None  # (clave, resultado de bar_signals) de la última inferencia
+        self.model = None
+        self.scaler = None
+        self.features = None
         self.reset()
     
+    @property
+    def model(self):
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._model_version = next(_VERSIONS)
+    
+    @property
+    def scaler(self):
+        return self._scaler
+    
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+        self._scaler_version = next(_VERSIONS)
+    
     def reset(self):
         """Reinicia el backtester"""
         self.balance = self.initial_balance
@@ -27,34 +73,29 @@ class AdvancedBacktester:
         self.equity_curve = []
         self.current_position = None
     
+    def load_model(self, model_path: str, scaler_path: str = None):
+        """Carga modelo, scaler y características (paquete o archivos sueltos)"""
+        features_path = os.path.join(os.path.dirname(model_path), 'features.pkl')
+        bundle = load_model_files(model_path, scaler_path, features_path, with_model=False)
+        self.model = load_backend(bundle, self.inference_backend)
+        self.scaler = bundle.scaler
+        self.features = bundle.features or None
+        print(f"✅ Modelo cargado desde {bundle.path}")
+        if self.features:
+            print(f"✅ Características cargadas: {len(self.features)}")
+    
     def load_model_and_data(self, model_path: str, data_path: str, scaler_path: str = None):
         """Carga el modelo y los datos"""
         try:
-            # Cargar modelo
-            from tensorflow.keras.models import load_model
-            self.model = load_model(model_path)
-            print(f"✅ Modelo cargado desde {model_path}")
+            self.load_model(model_path, scaler_path)
             
-            # Cargar datos
-            self.data = pd.read_csv(data_path)
-            self.data['datetime'] = pd.to_datetime(self.data['datetime'])
+            # Cargar datos (matriz mapeada compartida entre procesos de backtest)
+            self.matrix = load_feature_matrix(data_path, 'backtester', self.features, self.dtype)
+            if self.matrix is None:
+                raise FileNotFoundError(data_path)
+            self.data = self.matrix.frame()
             print(f"✅ Datos cargados: {len(self.data)} registros")
             
-            # Cargar scaler si existe
-            if scaler_path and os.path.exists(scaler_path):
-                self.scaler = joblib.load(scaler_path)
-                print(f"✅ Scaler cargado desde {scaler_path}")
-            else:
-                self.scaler = None
-            
-            # Cargar características
-            features_path = model_path.replace('lstm_model.h5', 'features.pkl')
-            if os.path.exists(features_path):
-                self.features = joblib.load(features_path)
-                print(f"✅ Características cargadas: {len(self.features)}")
-            else:
-                self.features = None
-            
             return True
             
         except Exception as e:
@@ -63,35 +104,26 @@ class AdvancedBacktester:
     
     def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Prepara las características para el modelo"""
-        from features import add_technical_indicators
+        from feature_cache import cached_indicators
         
-        # Agregar indicadores técnicos
-        df = add_technical_indicators(df.copy())
+        # Características específicas si están definidas, si no las por defecto
+        default_features = ['close', 'SMA_5', 'SMA_10', 'RSI_14', 'MACD', 'Volume_ratio']
+        wanted = self.features or default_features
         
-        # Usar características específicas si están definidas
-        if self.features:
-            available_features = [f for f in self.features if f in df.columns]
-            df = df[['datetime'] + available_features]
-        else:
-            # Usar características por defecto
-            default_features = ['close', 'SMA_5', 'SMA_10', 'RSI_14', 'MACD', 'Volume_ratio']
-            available_features = [f for f in default_features if f in df.columns]
-            df = df[['datetime'] + available_features]
+        # Agregar indicadores técnicos (por símbolo, reutilizando la caché);
+        # los datos de la matriz mapeada ya los traen
+        if any(f not in df.columns for f in wanted):
+            df = cached_indicators(df, self.features, dtype=self.dtype)
+        
+        available_features = [f for f in wanted if f in df.columns]
+        df = df[['datetime'] + available_features]
         
         return df
     
     def create_sequences(self, data: np.ndarray, seq_length: int = 30) -> Tuple[np.ndarray, np.ndarray]:
-        """Crea secuencias para predicción"""
-        X, y = [], []
-        
-        for i in range(len(data) - seq_length - 1):
-            X.append(data[i:i+seq_length])
-            # Etiqueta: 1 si el precio sube, 0 si baja
-            future_price = data[i+seq_length][0]  # Precio de cierre
-            current_price = data[i+seq_length-1][0]
-            y.append(1 if future_price > current_price else 0)
-        
-        return np.array(X), np.array(y)
+        """Crea secuencias para predicción (vistas sin copia sobre data)"""
+        # Etiqueta: 1 si el precio de cierre sube, 0 si baja
+        return build_sequences(data, seq_length)
     
     def predict_signal(self, sequence: np.ndarray, threshold: float = 0.5) -> Dict:
         """Realiza predicción para una secuencia"""
@@ -104,23 +136,48 @@ class AdvancedBacktester:
                 sequence_normalized = sequence
             
             # Predicción
-            prediction = self.model.predict(sequence_normalized, verbose=0)[0][0]
-            
-            # Determinar señal
-            signal = "BUY" if prediction > threshold else "SELL"
-            confidence = abs(prediction - 0.5) * 2  # Normalizar a 0-1
+            prediction = self.model.predict(sequence_normalized)[0]
             
-            return {
-                'signal': signal,
-                'confidence': confidence,
-                'prediction': prediction,
-                'threshold': threshold
-            }
+            return self.signal_from_prediction(prediction, threshold)
             
         except Exception as e:
             print(f"❌ Error en predicción: {e}")
             return {'signal': 'HOLD', 'confidence': 0, 'prediction': 0.5, 'threshold': threshold}
     
+    def signal_from_prediction(self, prediction: float, threshold: float = 0.5) -> Dict:
+        """Señal y confianza a partir de la probabilidad de subida"""
+        signal = "BUY" if prediction > threshold else "SELL"
+        confidence = abs(prediction - 0.5) * 2  # Normalizar a 0-1
+        
+        return {
+            'signal': signal,
+            'confidence': confidence,
+            'prediction': prediction,
+            'threshold': threshold
+        }
+    
+    def predict_batch(self, feature_data: np.ndarray, seq_length: int = 30,
+                      batch_size: int = 1024) -> np.ndarray:
+        """
+        Probabilidad de subida de cada ventana feature_data[i:i+seq_length]
+        que usa run_backtest (i de 0 a len - seq_length - 1). Escala todas
+        las filas una vez (el scaler transforma cada valor por separado, así
+        que da lo mismo que escalar cada ventana) y predice en lotes de
+        batch_size ventanas. Con pesos float32 la probabilidad puede diferir
+        de la de predict_signal hasta INFERENCE_TOLERANCE (el orden de las
+        sumas depende del tamaño del lote), así que una confianza pegada al
+        umbral puede decidir distinto en un modo y en el otro.
+        """
+        scaled = self.scaler.transform(feature_data) if self.scaler else np.asarray(feature_data)
+        n_windows = max(len(scaled) - seq_length, 0)
+        windows = sliding_window_view(scaled, seq_length, axis=0)[:n_windows].swapaxes(1, 2)
+        
+        probabilities = []
+        for start in range(0, n_windows, batch_size):
+            batch = np.ascontiguousarray(windows[start:start + batch_size])
+            probabilities.append(self.model.predict(batch))
+        return np.concatenate(probabilities) if probabilities else np.array([])
+    
     def execute_trade(self, signal: str, price: float, timestamp: datetime, 
                      confidence: float, position_size: float = 0.1):
         """Ejecuta una operación de trading"""
@@ -178,82 +235,89 @@ class AdvancedBacktester:
             
             self.current_position = None
     
-    def run_backtest(self, data: pd.DataFrame, seq_length: int = 30, 
-                    confidence_threshold: float = 0.6, position_size: float = 0.1) -> Dict:
-        """Ejecuta el backtest completo"""
-        
-        print("🔄 Iniciando backtest...")
+    def bar_signals(self, data: pd.DataFrame, seq_length: int = 30, batch_inference: bool = True,
+                    batch_size: int = 1024) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Prepara los datos y calcula la señal (códigos de trade_engine) y la
+        confianza de cada barra desde seq_length, en lotes o barra a barra.
+        Retorna (df, señales, confianzas, etiquetas reales). El resultado
+        queda en caché para los mismos datos, seq_length, características y
+        versión de modelo y scaler (cambia con cada asignación), así que
+        varios backtests o barridos sobre los mismos datos infieren una vez.
+        """
+        key = (hashlib.sha256(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes()).hexdigest(),
+               seq_length, batch_inference, self._model_version, self._scaler_version,
+               tuple(self.features or ()))
+        if self._signal_cache is not None and self._signal_cache[0] == key:
+            print("♻️ Usando predicciones en caché")
+            return self._signal_cache[1]
         
         # Preparar datos
         df = self.prepare_features(data)
         
-        # Crear secuencias
-        feature_data = df.drop('datetime', axis=1).values
+        # Crear secuencias (vista de la matriz mapeada si los datos vienen de ahí)
+        feature_columns = [c for c in df.columns if c != 'datetime']
+        if self.matrix is not None and data is self.data and self.matrix.meta['dtype'] == self.dtype.name:
+            feature_data = self.matrix.select(feature_columns)
+        else:
+            feature_data = df.drop('datetime', axis=1).to_numpy(dtype=self.dtype)
         X, y_true = self.create_sequences(feature_data, seq_length)
         
         print(f"📊 Secuencias creadas: {len(X)}")
+        
+        # Señales de todas las barras: en lotes o barra a barra
+        n_bars = max(len(df) - seq_length, 0)
+        if batch_inference:
+            signal, confidence = signals_from_probabilities(
+                self.predict_batch(feature_data, seq_length, batch_size))
+        else:
+            signal = np.zeros(n_bars, dtype=np.int8)
+            confidence = np.zeros(n_bars)
+            for current_idx in range(n_bars):
+                sequence = feature_data[current_idx:current_idx + seq_length]
+                prediction_result = self.predict_signal(sequence.reshape(1, seq_length, -1))
+                signal[current_idx] = SIGNAL_CODES[prediction_result['signal']]
+                confidence[current_idx] = prediction_result['confidence']
+        
+        self._signal_cache = (key, (df, signal, confidence, y_true))
+        return df, signal, confidence, y_true
+    
+    def run_backtest(self, data: pd.DataFrame, seq_length: int = 30, 
+                    confidence_threshold: float = 0.6, position_size: float = 0.1,
+                    batch_inference: bool = True, batch_size: int = 1024) -> Dict:
+        """
+        Ejecuta el backtest completo. Con batch_inference todas las
+        predicciones se calculan antes de simular (predict_batch); con
+        False se predice barra a barra con predict_signal.
+        """
+        
+        print("🔄 Iniciando backtest...")
+        
+        df, signal, confidence, y_true = self.bar_signals(data, seq_length, batch_inference, batch_size)
         print(f"   Balance inicial: ${self.initial_balance:,.2f}")
         print(f"   Umbral de confianza: {confidence_threshold}")
         print(f"   Tamaño de posición: {position_size*100}%")
         
-        # Ejecutar backtest
-        predictions = []
-        signals_executed = 0
+        # Simulación sobre arrays (precios y tiempos de las barras operables)
+        close = df['close'].to_numpy(dtype=np.float64)[seq_length:]
+        timestamps = df['datetime'].iloc[seq_length:]
+        simulation = simulate_long_only(close, signal, confidence, self.initial_balance, self.commission,
+                                        position_size, confidence_threshold)
+        signals_executed = int(np.sum(confidence >= confidence_threshold))
         
-        for i in range(seq_length, len(df)):
-            current_idx = i - seq_length
-            
-            # Obtener secuencia actual
-            sequence = feature_data[current_idx:i]
-            
-            # Realizar predicción
-            prediction_result = self.predict_signal(sequence.reshape(1, seq_length, -1))
-            
-            # Solo ejecutar si la confianza es suficiente
-            if prediction_result['confidence'] >= confidence_threshold:
-                current_price = df.iloc[i]['close']
-                current_time = df.iloc[i]['datetime']
-                
-                # Ejecutar trade
-                self.execute_trade(
-                    prediction_result['signal'],
-                    current_price,
-                    current_time,
-                    prediction_result['confidence'],
-                    position_size
-                )
-                signals_executed += 1
-            
-            # Registrar predicción para análisis
-            predictions.append({
-                'timestamp': df.iloc[i]['datetime'],
-                'actual_price': df.iloc[i]['close'],
-                'predicted_signal': prediction_result['signal'],
-                'confidence': prediction_result['confidence'],
-                'prediction': prediction_result['prediction']
-            })
-            
-            # Actualizar curva de equity
-            current_equity = self.balance
-            if self.current_position:
-                current_price = df.iloc[i]['close']
-                position_value = self.current_position['shares'] * current_price
-                current_equity += position_value
-            
-            self.equity_curve.append({
-                'timestamp': df.iloc[i]['datetime'],
-                'equity': current_equity,
-                'balance': self.balance
-            })
-        
-        # Cerrar posición abierta al final
-        if self.current_position:
-            final_price = df.iloc[-1]['close']
-            final_time = df.iloc[-1]['datetime']
-            self.execute_trade("SELL", final_price, final_time, 1.0, 0)
+        # Operaciones y curva de equity se materializan al final
+        self.balance = simulation['final_balance']
+        self.current_position = None
+        self.trades = trade_records(simulation, close, confidence, timestamps)
+        self.equity_curve = pd.DataFrame({
+            'timestamp': timestamps.to_numpy(),
+            'equity': simulation['equity'],
+            'balance': simulation['balance']
+        })
         
         # Calcular métricas
-        results = self.calculate_performance_metrics(predictions, y_true)
+        y_pred = (signal == SIGNAL_BUY).astype(np.int64)
+        results = self.calculate_performance_metrics(y_pred, y_true)
         
         print(f"✅ Backtest completado!")
         print(f"   Señales ejecutadas: {signals_executed}")
@@ -262,16 +326,127 @@ class AdvancedBacktester:
         
         return results
     
-    def calculate_performance_metrics(self, predictions: List[Dict], y_true: np.ndarray) -> Dict:
-        """Calcula métricas de rendimiento"""
-        
-        # Convertir predicciones a formato de evaluación
-        y_pred = []
-        for pred in predictions:
-            if pred['predicted_signal'] == 'BUY':
-                y_pred.append(1)
-            else:
-                y_pred.append(0)
+    def run_binary_backtest(self, data: pd.DataFrame, seq_length: int = 30, expiry_bars: int = 1,
+                            payout: float = 0.8, stake: float = 100.0, stake_rule: str = 'fixed',
+                            confidence_threshold: float = 0.6, batch_inference: bool = True,
+                            batch_size: int = 1024) -> Dict:
+        """
+        Backtest con el producto de Binomo: contratos arriba/abajo que vencen
+        expiry_bars barras después y pagan payout sobre el stake, en lugar
+        de posiciones largas con comisión (ver trade_engine.settle_binary_options).
+        stake_rule: 'fixed' o 'confidence' (stake * confianza).
+        """
+        
+        print("🔄 Iniciando backtest de opciones binarias...")
+        
+        df, signal, confidence, y_true = self.bar_signals(data, seq_length, batch_inference, batch_size)
+        print(f"   Balance inicial: ${self.initial_balance:,.2f}")
+        print(f"   Vencimiento: {expiry_bars} barras, payout: {payout*100:.0f}%, stake: {stake} ({stake_rule})")
+        print(f"   Umbral de confianza: {confidence_threshold}")
+        
+        close = df['close'].to_numpy(dtype=np.float64)[seq_length:]
+        timestamps = df['datetime'].iloc[seq_length:]
+        if len(close) <= expiry_bars:
+            raise ValueError("No hay barras suficientes para el vencimiento")
+        settlement = settle_binary_options(close, signal, confidence, expiry_bars, payout, stake, stake_rule,
+                                           confidence_threshold, self.initial_balance)
+        summary = binary_metrics(settlement, self.initial_balance)
+        
+        # Contratos y curva de equity se materializan al final
+        self.balance = summary['final_balance']
+        self.current_position = None
+        self.trades = contract_records(settlement, close, confidence, timestamps).to_dict('records')
+        self.equity_curve = pd.DataFrame({
+            'timestamp': timestamps.to_numpy(),
+            'equity': settlement['equity'],
+            'balance': settlement['balance']
+        })
+        
+        y_pred = (signal == SIGNAL_BUY).astype(np.int64)
+        results = self.calculate_performance_metrics(y_pred, y_true)
+        results.update({
+            'expiry_bars': expiry_bars,
+            'payout': payout,
+            'ties': summary['ties'],
+            'unfunded_contracts': summary['unfunded'],
+            'break_even_win_rate': summary['break_even_win_rate'],
+            'total_staked': summary['total_staked'],
+            'max_open_contracts': int(settlement['open_contracts'].max())
+        })
+        
+        print(f"✅ Backtest completado!")
+        print(f"   Contratos: {summary['contracts']} (win rate {summary['win_rate']*100:.1f}%, "
+              f"equilibrio {summary['break_even_win_rate']*100:.1f}%)")
+        if summary['unfunded']:
+            print(f"   ⚠️ {summary['unfunded']} contratos omitidos por falta de balance libre")
+        print(f"   Balance final: ${self.balance:,.2f}")
+        print(f"   Retorno total: {summary['total_return_pct']:.2f}%")
+        
+        return results
+    
+    def binary_parameter_sweep(self, data: pd.DataFrame, expiries, payouts, thresholds,
+                               seq_length: int = 30, stake: float = 100.0, stake_rule: str = 'fixed',
+                               batch_inference: bool = True, batch_size: int = 1024) -> pd.DataFrame:
+        """
+        Métricas de opciones binarias para cada combinación de vencimiento,
+        payout y umbral de confianza, con una sola pasada de predicciones.
+        """
+        df, signal, confidence, _ = self.bar_signals(data, seq_length, batch_inference, batch_size)
+        close = df['close'].to_numpy(dtype=np.float64)[seq_length:]
+        return binary_grid(close, signal, confidence, expiries, payouts, thresholds, stake, stake_rule,
+                           self.initial_balance)
+    
+    def parameter_sweep(self, data: pd.DataFrame, thresholds, position_sizes, commissions,
+                        seq_length: int = 30, n_jobs: int = None, batch_size: int = 1024) -> pd.DataFrame:
+        """
+        Evalúa run_backtest en la grilla umbral de confianza x tamaño de
+        posición x comisión con una sola inferencia; la simulación se reparte
+        en un pool de procesos (ver parameter_sweep.sweep). Retorna la tabla
+        ordenada por retorno, Sharpe y drawdown.
+        """
+        df, signal, confidence, _ = self.bar_signals(data, seq_length, batch_size=batch_size)
+        close = df['close'].to_numpy(dtype=np.float64)[seq_length:]
+        return sweep(close, signal, confidence, thresholds, position_sizes, commissions,
+                     self.initial_balance, n_jobs)
+    
+    def compare_inference_modes(self, data: pd.DataFrame, **kwargs) -> Dict:
+        """
+        Ejecuta el backtest barra a barra y por lotes; compara resultados y
+        tiempos. Las confianzas se comparan con INFERENCE_TOLERANCE y el
+        equity con la misma tolerancia relativa ('equivalent'); 'identical'
+        indica además igualdad bit a bit de confianzas y equity.
+        """
+        import time
+        
+        timings, runs, confidences = {}, {}, {}
+        for mode, batch_inference in (('per_bar', False), ('batch', True)):
+            self.reset()
+            self._signal_cache = None
+            start = time.perf_counter()
+            runs[mode] = self.run_backtest(data, batch_inference=batch_inference, **kwargs)
+            timings[mode] = time.perf_counter() - start
+            confidences[mode] = self._signal_cache[1][2]
+        
+        per_bar, batch = runs['per_bar'], runs['batch']
+        # La confianza es |p - 0.5| * 2: el doble de la diferencia en probabilidad
+        confidence_diff = float(np.max(np.abs(confidences['per_bar'] - confidences['batch']), initial=0.0))
+        equivalent = (confidence_diff <= 2 * INFERENCE_TOLERANCE and
+                      per_bar['total_trades'] == batch['total_trades'] and
+                      np.allclose(per_bar['equity_curve']['equity'], batch['equity_curve']['equity'],
+                                  rtol=INFERENCE_TOLERANCE, atol=0))
+        identical = (confidence_diff == 0 and per_bar['equity_curve'].equals(batch['equity_curve'])
+                     and per_bar['final_balance'] == batch['final_balance'])
+        return {
+            'equivalent': equivalent,
+            'identical': identical,
+            'max_confidence_diff': confidence_diff,
+            'per_bar_seconds': timings['per_bar'],
+            'batch_seconds': timings['batch'],
+            'speedup': timings['per_bar'] / timings['batch'] if timings['batch'] > 0 else float('inf')
+        }
+    
+    def calculate_performance_metrics(self, y_pred: np.ndarray, y_true: np.ndarray) -> Dict:
+        """Calcula métricas de rendimiento (y_pred: 1 para BUY, 0 para el resto)"""
         
         # Ajustar longitudes
         min_len = min(len(y_pred), len(y_true))
@@ -296,26 +471,10 @@ class AdvancedBacktester:
         total_profit = sum([t.get('profit', 0) for t in self.trades])
         total_commission = sum([t.get('commission', 0) for t in self.trades])
         
-        # Calcular drawdown
-        equity_values = [e['equity'] for e in self.equity_curve]
-        peak = self.initial_balance
-        max_drawdown = 0
-        
-        for equity in equity_values:
-            if equity > peak:
-                peak = equity
-            drawdown = (peak - equity) / peak
-            max_drawdown = max(max_drawdown, drawdown)
-        
-        # Sharpe ratio (simplificado)
-        returns = []
-        for i in range(1, len(self.equity_curve)):
-            prev_equity = self.equity_curve[i-1]['equity']
-            curr_equity = self.equity_curve[i]['equity']
-            ret = (curr_equity - prev_equity) / prev_equity
-            returns.append(ret)
-        
-        sharpe_ratio = np.mean(returns) / np.std(returns) if len(returns) > 0 and np.std(returns) > 0 else 0
+        # Drawdown con el máximo acumulado y Sharpe (simplificado) con los retornos por barra
+        equity = self.equity_curve['equity'].to_numpy() if len(self.equity_curve) else np.array([])
+        drawdown = max_drawdown(equity, self.initial_balance)
+        sharpe = sharpe_ratio(equity_returns(equity))
         
         return {
             'initial_balance': self.initial_balance,
@@ -328,8 +487,8 @@ class AdvancedBacktester:
             'win_rate': win_rate,
             'total_profit': total_profit,
             'total_commission': total_commission,
-            'max_drawdown': max_drawdown,
-            'sharpe_ratio': sharpe_ratio,
+            'max_drawdown': drawdown,
+            'sharpe_ratio': sharpe,
             'accuracy': accuracy,
             'precision': precision,
             'recall': recall,
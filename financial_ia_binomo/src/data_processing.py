@@ -1,20 +1,30 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import json
 import os
+from typing import Dict, Tuple
+from ohlcv_store import REQUIRED_COLUMNS, read_frame, source_exists
 
-def load_data(filepath):
+def load_data(filepath, start=None, end=None, symbols=None, columns=None):
     """
-    Carga datos desde un archivo CSV
+    Carga datos desde un archivo CSV, o desde el almacén columnar si ese CSV
+    ya fue migrado (ver migrate_to_store.py).
+    
+    start/end (rango de fechas), symbols y columns limitan lo que se lee: en el
+    almacén solo se abren las particiones y columnas necesarias.
     """
     try:
         # Verificar si el archivo existe
-        if not os.path.exists(filepath):
+        if not os.path.isdir(filepath) and not source_exists(filepath):
             print(f"❌ Archivo no encontrado: {filepath}")
             return None
         
-        # Cargar datos
-        df = pd.read_csv(filepath, parse_dates=['datetime'])
+        # Cargar datos (las columnas requeridas siempre se leen)
+        if columns is not None:
+            columns = list(dict.fromkeys(REQUIRED_COLUMNS + list(columns)))
+        df = read_frame(filepath, start, end, symbols, columns)
+        df['datetime'] = pd.to_datetime(df['datetime'])
         
         # Ordenar por fecha
         df.sort_values('datetime', inplace=True)
@@ -37,6 +47,39 @@ def load_data(filepath):
         print(f"❌ Error cargando datos: {e}")
         return None
 
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# Reglas de validación en el orden en que se aplican (cada fila rechazada
+# se atribuye a la primera regla que no cumple)
+VALIDATION_RULES = ['nulls'] + [f'{col}_non_positive' for col in PRICE_COLUMNS] + ['ohlc', 'volume']
+
+
+def validation_mask(df) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Evalúa todas las reglas de clean_data en una sola pasada vectorizada.
+    Retorna la máscara de filas válidas y cuántas filas rechazó cada regla.
+    """
+    # Los valores no numéricos cuentan como inválidos
+    values = {col: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+              for col in PRICE_COLUMNS + ['volume']}
+    body_high = np.maximum(values['open'], values['close'])
+    body_low = np.minimum(values['open'], values['close'])
+    
+    # Cada regla marca las filas que la incumplen (NaN incumple todas las comparaciones)
+    failures = [df.isna().any(axis=1).to_numpy()]
+    failures += [~(values[col] > 0) for col in PRICE_COLUMNS]
+    failures.append(~((values['high'] >= body_high) & (values['low'] <= body_low)))
+    failures.append(~(values['volume'] > 0))
+    
+    rejected = np.zeros(len(df), dtype=bool)
+    counts = {}
+    for rule, failed in zip(VALIDATION_RULES, failures):
+        counts[rule] = int(np.count_nonzero(failed & ~rejected))
+        rejected |= failed
+    
+    return ~rejected, counts
+
+
 def clean_data(df):
     """
     Limpia y valida los datos
@@ -44,41 +87,84 @@ def clean_data(df):
     if df is None:
         return None
     
-    # Eliminar filas con valores nulos
-    initial_rows = len(df)
-    df = df.dropna()
-    
-    if len(df) < initial_rows:
-        print(f"⚠️ Se eliminaron {initial_rows - len(df)} filas con valores nulos")
-    
-    # Verificar valores negativos en precios
-    price_columns = ['open', 'high', 'low', 'close']
-    for col in price_columns:
-        negative_count = (df[col] <= 0).sum()
-        if negative_count > 0:
-            print(f"⚠️ {negative_count} valores negativos en {col}")
-            df = df[df[col] > 0]
-    
-    # Verificar que high >= max(open, close) y low <= min(open, close)
-    invalid_high = (df['high'] < df[['open', 'close']].max(axis=1)).sum()
-    invalid_low = (df['low'] > df[['open', 'close']].min(axis=1)).sum()
-    
-    if invalid_high > 0 or invalid_low > 0:
-        print(f"⚠️ {invalid_high + invalid_low} registros con OHLC inválido")
-        df = df[
-            (df['high'] >= df[['open', 'close']].max(axis=1)) &
-            (df['low'] <= df[['open', 'close']].min(axis=1))
-        ]
-    
-    # Verificar volumen
-    zero_volume = (df['volume'] <= 0).sum()
-    if zero_volume > 0:
-        print(f"⚠️ {zero_volume} registros con volumen cero")
-        df = df[df['volume'] > 0]
+    valid, counts = validation_mask(df)
+    
+    if counts['nulls'] > 0:
+        print(f"⚠️ Se eliminaron {counts['nulls']} filas con valores nulos")
+    for col in PRICE_COLUMNS:
+        if counts[f'{col}_non_positive'] > 0:
+            print(f"⚠️ {counts[f'{col}_non_positive']} valores negativos en {col}")
+    if counts['ohlc'] > 0:
+        print(f"⚠️ {counts['ohlc']} registros con OHLC inválido")
+    if counts['volume'] > 0:
+        print(f"⚠️ {counts['volume']} registros con volumen cero")
+    
+    df = df[valid]
     
     print(f"✅ Datos limpios: {len(df)} registros válidos")
     return df
 
+
+def clean_csv_chunked(input_path, output_path, chunksize=100_000, report_path=None) -> Dict:
+    """
+    Versión por bloques de clean_data para CSV más grandes que la memoria.
+    
+    Lee input_path de a chunksize filas, aplica validation_mask a cada bloque
+    y agrega las filas válidas a output_path tal como venían. El reporte de
+    rechazos por regla (por defecto <output>.report.json) se reescribe después
+    de cada bloque, así que refleja el progreso si el proceso se interrumpe.
+    La salida se escribe en un archivo temporal y se renombra al terminar.
+    """
+    report_path = report_path or os.path.splitext(output_path)[0] + '.report.json'
+    tmp_output = output_path + '.tmp'
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    
+    report = {
+        'input': os.path.realpath(input_path),
+        'output': os.path.realpath(output_path),
+        'chunks': 0,
+        'rows_read': 0,
+        'rows_written': 0,
+        'rejected': {rule: 0 for rule in VALIDATION_RULES},
+        'completed': False
+    }
+    
+    def write_report():
+        tmp_report = report_path + '.tmp'
+        with open(tmp_report, 'w') as f:
+            json.dump(report, f, indent=2)
+        os.replace(tmp_report, report_path)
+    
+    try:
+        # dtype=str conserva los valores exactamente como en el archivo original
+        reader = pd.read_csv(input_path, chunksize=chunksize, dtype=str, keep_default_na=False,
+                             na_values=[''])
+        with open(tmp_output, 'w', newline='') as out:
+            for i, chunk in enumerate(reader):
+                valid, counts = validation_mask(chunk)
+                chunk[valid].to_csv(out, index=False, header=(i == 0))
+                
+                report['chunks'] += 1
+                report['rows_read'] += len(chunk)
+                report['rows_written'] += int(np.count_nonzero(valid))
+                for rule, count in counts.items():
+                    report['rejected'][rule] += count
+                write_report()
+        
+        os.replace(tmp_output, output_path)
+        report['completed'] = True
+        write_report()
+    except Exception:
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+        raise
+    
+    rejected = report['rows_read'] - report['rows_written']
+    print(f"✅ Datos limpios: {report['rows_written']:,} de {report['rows_read']:,} registros "
+          f"({rejected:,} rechazados, {report['chunks']} bloques)")
+    return report
+
 def resample_data(df, timeframe='1min'):
     """
     Re-muestrea los datos a un timeframe específico
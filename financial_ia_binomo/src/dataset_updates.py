@@ -0,0 +1,356 @@
+import io
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from file_lock import file_lock
+
+# Cada cuántas filas el índice guarda (fila, timestamp, posición en bytes)
+CHECKPOINT_EVERY = 1000
+
+# Formatos de fecha del CSV: el del archivo queda en el índice y las filas nuevas se escriben con él
+SECONDS_FORMAT = '%Y-%m-%d %H:%M:%S'
+MICROSECONDS_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def index_path(csv_path: str) -> str:
+    """Índice auxiliar del CSV: <nombre>.index.json junto al archivo"""
+    return os.path.splitext(csv_path)[0] + '.index.json'
+
+
+def _pending_paths(csv_path: str):
+    base = os.path.splitext(csv_path)[0]
+    return base + '.pending.json', base + '.pending.tail'
+
+
+def _write_json(path: str, payload: Dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _parse_times(values) -> np.ndarray:
+    return pd.to_datetime(pd.Series(values), format='mixed').to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def _split_lines(data: bytes) -> List[bytes]:
+    """Líneas de un bloque CSV conservando el salto de línea"""
+    lines = data.split(b'\n')
+    if lines and lines[-1] == b'':
+        lines.pop()
+    return [line + b'\n' for line in lines]
+
+
+def _datetime_format(times: pd.Series) -> str:
+    """Formato con microsegundos solo si alguna fecha los tiene"""
+    return MICROSECONDS_FORMAT if (times.dt.microsecond != 0).any() else SECONDS_FORMAT
+
+
+def _render_lines(df: pd.DataFrame, datetime_format: str) -> List[bytes]:
+    return _split_lines(df.to_csv(index=False, header=False, lineterminator='\n',
+                                  date_format=datetime_format).encode())
+
+
+def _keys(times: np.ndarray, symbols: Optional[np.ndarray]) -> List:
+    if symbols is None:
+        return list(times)
+    return list(zip(symbols, times))
+
+
+def _checkpoints(lines: List[bytes], times: np.ndarray, first_row: int, first_offset: int,
+                 every: int) -> List[List[int]]:
+    """Checkpoints de las filas first_row, first_row+1, ... con su posición en bytes"""
+    offsets = first_offset + np.concatenate([[0], np.cumsum([len(line) for line in lines])[:-1]]) \
+        if lines else np.empty(0, dtype=np.int64)
+    rows = first_row + np.arange(len(lines))
+    selected = np.flatnonzero(rows % every == 0)
+    return [[int(rows[i]), int(times[i]), int(offsets[i])] for i in selected]
+
+
+def _last_by_symbol(times: np.ndarray, symbols: Optional[np.ndarray]) -> Dict[str, int]:
+    if len(times) == 0:
+        return {}
+    if symbols is None:
+        return {'': int(times.max())}
+    last = pd.Series(times).groupby(symbols).max()
+    return {str(symbol): int(value) for symbol, value in last.items()}
+
+
+def _file_stamp(csv_path: str) -> Dict:
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def load_index(csv_path: str) -> Optional[Dict]:
+    """Índice del CSV si existe y corresponde al archivo actual"""
+    path = index_path(csv_path)
+    if not os.path.exists(path) or not os.path.exists(csv_path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    stamp = _file_stamp(csv_path)
+    if index.get('size') != stamp['size'] or index.get('mtime') != stamp['mtime']:
+        return None
+    return index
+
+
+def _recover(csv_path: str):
+    """Completa una actualización interrumpida (el diario se aplica de nuevo)"""
+    journal_path, tail_path = _pending_paths(csv_path)
+    if not os.path.exists(journal_path):
+        if os.path.exists(tail_path):
+            os.remove(tail_path)
+        return
+    with open(journal_path, 'r') as f:
+        journal = json.load(f)
+    _apply(csv_path, journal['offset'], tail_path)
+    _write_json(index_path(csv_path), dict(journal['index'], **_file_stamp(csv_path)))
+    os.remove(journal_path)
+    os.remove(tail_path)
+
+
+def _apply(csv_path: str, offset: int, tail_path: str):
+    """Reemplaza el CSV desde offset con el contenido de tail_path"""
+    with open(tail_path, 'rb') as f:
+        tail = f.read()
+    with open(csv_path, 'r+b') as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(tail)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _rewrite(csv_path: str, df: pd.DataFrame, every: int) -> Dict:
+    """
+    Reescribe el CSV completo ordenado y sin duplicados (creación, o un
+    archivo sin índice válido) y genera su índice. Costo O(total).
+    """
+    df = df.copy()
+    df['datetime'] = pd.to_datetime(df['datetime'], format='mixed')
+    subset = ['symbol', 'datetime'] if 'symbol' in df.columns else ['datetime']
+    df = df.drop_duplicates(subset=subset).sort_values('datetime', kind='stable')
+
+    header = (','.join(str(c) for c in df.columns) + '\n').encode()
+    datetime_format = _datetime_format(df['datetime'])
+    lines = _render_lines(df, datetime_format)
+    times = df['datetime'].to_numpy(dtype='datetime64[ns]').view('int64')
+    symbols = df['symbol'].astype(str).to_numpy() if 'symbol' in df.columns else None
+
+    tmp_path = csv_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, csv_path)
+
+    index = {
+        'columns': [str(c) for c in df.columns],
+        'rows': len(lines),
+        'data_offset': len(header),
+        'datetime_format': datetime_format,
+        'checkpoint_every': every,
+        'checkpoints': _checkpoints(lines, times, 0, len(header), every),
+        'last': _last_by_symbol(times, symbols),
+    }
+    index.update(_file_stamp(csv_path))
+    _write_json(index_path(csv_path), index)
+    return index
+
+
+def append_rows(csv_path: str, new_df: pd.DataFrame,
+                checkpoint_every: int = CHECKPOINT_EVERY) -> Dict:
+    """
+    Agrega new_df a un CSV ordenado por fecha sin reescribirlo completo.
+
+    El índice auxiliar guarda el último timestamp por símbolo y checkpoints
+    (fila, timestamp, byte) cada checkpoint_every filas. Las filas posteriores
+    al final del archivo se agregan al final; si hay solapamiento se relee
+    solo la cola desde el último checkpoint anterior a la fila nueva más
+    antigua y se mezcla ordenadamente (las filas existentes ganan ante
+    duplicados de símbolo + fecha). La cola nueva se escribe primero en un
+    diario, así que una actualización interrumpida se completa en la
+    siguiente llamada. Sin índice válido se reescribe el archivo una vez.
+    Las fechas nuevas se escriben con el formato del archivo (guardado en
+    el índice), para que load_data pueda seguir leyéndolo; si el lote trae
+    microsegundos y el archivo no, se reescribe con microsegundos.
+    Un bloqueo de archivo serializa las llamadas concurrentes sobre el mismo CSV.
+
+    Retorna un resumen: modo ('create', 'rebuild', 'append', 'merge'),
+    filas agregadas, duplicados descartados, filas releídas y total.
+    """
+    with file_lock(csv_path):
+        return _append_rows(csv_path, new_df, checkpoint_every)
+
+
+def _append_rows(csv_path: str, new_df: pd.DataFrame, checkpoint_every: int) -> Dict:
+    _recover(csv_path)
+
+    if not os.path.exists(csv_path):
+        index = _rewrite(csv_path, new_df, checkpoint_every)
+        return {'mode': 'create', 'added': index['rows'], 'duplicates': len(new_df) - index['rows'],
+                'reread': 0, 'rows': index['rows']}
+
+    index = load_index(csv_path)
+    new_df = new_df.copy()
+    new_df['datetime'] = pd.to_datetime(new_df['datetime'], format='mixed')
+    # Índices anteriores sin formato, o un lote con más precisión que el archivo
+    datetime_format = index.get('datetime_format') if index else None
+    if (index is None or index['checkpoint_every'] != checkpoint_every or
+            sorted(index['columns']) != sorted(str(c) for c in new_df.columns) or
+            datetime_format not in (MICROSECONDS_FORMAT, _datetime_format(new_df['datetime']))):
+        existing = pd.read_csv(csv_path)
+        before = len(existing)
+        combined = pd.concat([existing, new_df], ignore_index=True)
+        index = _rewrite(csv_path, combined, checkpoint_every)
+        return {'mode': 'rebuild', 'added': index['rows'] - before,
+                'duplicates': before + len(new_df) - index['rows'], 'reread': before, 'rows': index['rows']}
+
+    columns = index['columns']
+    has_symbol = 'symbol' in columns
+    new_df = new_df[columns]
+    new_df = new_df.drop_duplicates(subset=['symbol', 'datetime'] if has_symbol else ['datetime'])
+    new_df = new_df.sort_values('datetime', kind='stable')
+
+    new_times = new_df['datetime'].to_numpy(dtype='datetime64[ns]').view('int64')
+    new_symbols = new_df['symbol'].astype(str).to_numpy() if has_symbol else None
+    new_lines = _render_lines(new_df, index['datetime_format'])
+
+    # Las filas no posteriores al final del archivo se intercalan en la cola
+    last = index['last']
+    global_last = max(last.values()) if last else None
+    overlapping = new_times <= global_last if global_last is not None else np.zeros(len(new_times), bool)
+
+    checkpoint = [0, 0, index['data_offset']]
+    if overlapping.any():
+        first_time = int(new_times[overlapping].min())
+        earlier = [c for c in index['checkpoints'] if c[1] < first_time]
+        if earlier:
+            checkpoint = earlier[-1]
+    else:
+        checkpoint = [index['rows'], 0, index['size']]
+    start_row, _, offset = checkpoint
+
+    with open(csv_path, 'rb') as f:
+        f.seek(offset)
+        tail_lines = _split_lines(f.read())
+
+    if tail_lines:
+        tail = pd.read_csv(io.BytesIO(b''.join(tail_lines)), header=None, names=columns,
+                           usecols=['datetime', 'symbol'] if has_symbol else ['datetime'], dtype=str)
+        tail_times = _parse_times(tail['datetime'])
+        tail_symbols = tail['symbol'].astype(str).to_numpy() if has_symbol else None
+    else:
+        tail_times = np.empty(0, dtype=np.int64)
+        tail_symbols = np.empty(0, dtype=object) if has_symbol else None
+
+    # Solo pueden repetirse filas no posteriores al último timestamp de su símbolo
+    existing_keys = set(_keys(tail_times, tail_symbols))
+    keep = np.ones(len(new_lines), dtype=bool)
+    for i, key in enumerate(_keys(new_times, new_symbols)):
+        symbol_last = last.get(str(key[0]) if has_symbol else '')
+        if symbol_last is not None and new_times[i] <= symbol_last and key in existing_keys:
+            keep[i] = False
+
+    kept = np.flatnonzero(keep)
+    merged_times = np.concatenate([tail_times, new_times[kept]])
+    merged_lines = tail_lines + [new_lines[i] for i in kept]
+    order = np.argsort(merged_times, kind='stable')
+    merged_lines = [merged_lines[i] for i in order]
+    merged_times = merged_times[order]
+
+    checkpoints = [c for c in index['checkpoints'] if c[0] < start_row]
+    checkpoints += _checkpoints(merged_lines, merged_times, start_row, offset, checkpoint_every)
+    updated_last = dict(last)
+    for symbol, value in _last_by_symbol(new_times[kept], new_symbols[kept] if has_symbol else None).items():
+        updated_last[symbol] = max(value, updated_last.get(symbol, value))
+
+    new_index = dict(index, rows=start_row + len(merged_lines), checkpoints=checkpoints, last=updated_last)
+    for key in ('size', 'mtime'):
+        new_index.pop(key, None)
+
+    # Diario: primero la cola nueva, después la intención, después el reemplazo
+    journal_path, tail_path = _pending_paths(csv_path)
+    with open(tail_path, 'wb') as f:
+        f.writelines(merged_lines)
+        f.flush()
+        os.fsync(f.fileno())
+    _write_json(journal_path, {'offset': offset, 'index': new_index})
+    _recover(csv_path)
+
+    return {'mode': 'merge' if overlapping.any() else 'append', 'added': int(len(kept)),
+            'duplicates': int(len(new_lines) - len(kept)), 'reread': len(tail_lines),
+            'rows': new_index['rows']}
+
+
+def main():
+    """Compara la actualización incremental con la reescritura completa"""
+    import shutil
+    import tempfile
+    import time
+
+    print("➕ ACTUALIZACIÓN INCREMENTAL DE DATASETS")
+    print("=" * 50)
+
+    df = pd.read_csv('../data/extracted_data_20250625_214110.csv')
+    df['datetime'] = pd.to_datetime(df['datetime'], format='mixed')
+    df = df.sort_values('datetime', kind='stable').reset_index(drop=True)
+    history, batch = df.iloc[:-600], df.iloc[-600:]
+    # Lote con solapamiento: 200 filas ya guardadas y 400 nuevas
+    overlap = pd.concat([history.iloc[-200:], batch.iloc[:400]])
+
+    tmp_dir = tempfile.mkdtemp(prefix='dataset_updates_')
+    path = os.path.join(tmp_dir, 'price_data.csv')
+    append_rows(path, history)
+
+    for label, data in [('Lote solapado', overlap), ('Lote nuevo', batch.iloc[400:])]:
+        start = time.perf_counter()
+        summary = append_rows(path, data)
+        elapsed = time.perf_counter() - start
+        print(f"   {label}: {summary['mode']} en {elapsed*1000:.1f}ms "
+              f"(+{summary['added']}, {summary['duplicates']} duplicados, {summary['reread']} releídas)")
+
+    # Reescritura completa como la hacían los colectores
+    reference = os.path.join(tmp_dir, 'reference.csv')
+    start = time.perf_counter()
+    existing = pd.read_csv(path)
+    existing['datetime'] = pd.to_datetime(existing['datetime'], format='mixed')
+    combined = pd.concat([existing, batch.iloc[400:]])
+    combined.drop_duplicates(subset=['symbol', 'datetime']).sort_values('datetime').to_csv(reference, index=False)
+    print(f"   Reescritura completa: {(time.perf_counter() - start)*1000:.1f}ms")
+
+    result = pd.read_csv(path)
+    result['datetime'] = pd.to_datetime(result['datetime'], format='mixed')
+    expected = df.sort_values('datetime', kind='stable').reset_index(drop=True)
+    same = result.equals(expected)
+    print(f"   Mismas filas que el dataset completo: {'✅' if same else '❌'}")
+
+    # Un lote en segundos enteros se escribe con el formato del archivo y load_data lo sigue leyendo
+    from data_processing import load_data
+    later = batch.iloc[-50:].assign(datetime=batch['datetime'].iloc[-50:].dt.floor('s') + pd.Timedelta(days=1))
+    rows = append_rows(path, later)['rows']
+    reloaded = load_data(path)
+    print(f"   Recarga tras agregar un lote: {'✅' if reloaded is not None and len(reloaded) == rows else '❌'}")
+
+    # Varios procesos agregando a la vez: el bloqueo serializa las actualizaciones
+    from concurrent.futures import ProcessPoolExecutor
+    batches = [later.assign(datetime=later['datetime'] + pd.Timedelta(days=2 + i)) for i in range(4)]
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(append_rows, [path] * len(batches), batches))
+    final = pd.read_csv(path)
+    print(f"   Agregados concurrentes sin pérdidas: "
+          f"{'✅' if len(final) == rows + sum(len(b) for b in batches) and load_index(path) else '❌'}")
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from functools import partial
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from features import INDICATOR_VERSION, TECHNICAL_INDICATORS, add_technical_indicators, indicator_version
+from feature_pipeline import add_indicators_by_symbol
+from file_lock import file_lock
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'cache')
+
+# Al agregar filas nuevas se recalcula la cola con este historial previo por símbolo.
+# Las primeras TAIL_WARMUP filas del historial solo sirven de arranque: las
+# ventanas son de <= 26 barras y las EMA pierden memoria como (1 - alpha)^n,
+# así que tras 1000 barras el efecto del historial omitido es < 1e-30.
+# Las filas restantes del historial se recalculan y reemplazan a las guardadas
+# (corrige los valores que el ffill final había copiado al final del prefijo).
+TAIL_LOOKBACK = 1500
+TAIL_WARMUP = 1000
+
+# La cola no es idéntica a un recálculo completo: las ventanas móviles de
+# pandas acumulan sumas desde el inicio de la serie y el redondeo depende de
+# dónde empieza. La diferencia máxima, relativa a la escala de cada columna
+# (máximo valor absoluto), queda por debajo de esta tolerancia (medido ~5e-9)
+TAIL_TOLERANCE = 1e-8
+
+# Filas iniciales que identifican un dataset dentro de un linaje: agregar
+# filas al final no cambia la huella, así que la entrada se sigue extendiendo
+FINGERPRINT_ROWS = 256
+# Entradas (datasets) que se conservan por linaje; se descartan las menos usadas
+MAX_ENTRIES = 8
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Hash de cada fila de datos crudos (uint64)"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def dataset_fingerprint(hashes: np.ndarray) -> str:
+    """Huella de un dataset: hash de sus primeras FINGERPRINT_ROWS filas"""
+    return hashlib.sha256(hashes[:FINGERPRINT_ROWS].tobytes()).hexdigest()[:16]
+
+
+def tail_error(actual: pd.DataFrame, expected: pd.DataFrame) -> float:
+    """Diferencia máxima entre dos resultados, relativa a la escala de cada columna"""
+    numeric = expected.select_dtypes('number').columns
+    actual_values = actual[numeric].to_numpy(float)
+    expected_values = expected[numeric].to_numpy(float)
+    scale = np.maximum(np.nanmax(np.abs(expected_values), axis=0), 1e-12)
+    return float(np.nanmax(np.abs(actual_values - expected_values) / scale))
+
+
+class FeatureCache:
+    """
+    Caché persistente de indicadores técnicos direccionada por contenido.
+
+    La clave depende del hash de los datos crudos, de la lista de columnas
+    pedidas y de la versión del código de indicadores. El resultado se guarda
+    en disco por columnas (un .npy por columna) y se lee de vuelta sin
+    recalcular. Cada linaje (código y columnas) guarda una entrada por
+    dataset, identificada por la huella de sus primeras filas, así que
+    alternar entre datasets no sobrescribe la caché (hasta max_entries).
+    Si los datos nuevos solo agregan filas al final, se reutiliza el
+    prefijo guardado y se calcula únicamente la cola; el resultado coincide
+    con un recálculo completo dentro de TAIL_TOLERANCE (no bit a bit).
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 lookback: int = TAIL_LOOKBACK, warmup: int = TAIL_WARMUP,
+                 max_entries: int = MAX_ENTRIES):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.lookback = lookback
+        self.warmup = warmup
+        self.max_entries = max_entries
+        self.last_status = None
+
+    def get_or_compute(self, df: pd.DataFrame, features: Optional[List[str]] = None,
+                       compute_fn: Optional[Callable] = None, namespace: str = 'features',
+                       version: Optional[str] = None,
+                       symbol_column: Optional[str] = 'symbol', dtype=None) -> pd.DataFrame:
+        """
+        Retorna df con los indicadores calculados por compute_fn
+        (por defecto add_indicators_by_symbol, limitado a `features`).
+
+        features limita las columnas guardadas a las columnas crudas más esas;
+        None guarda todas. compute_fn debe tener memoria finita (ventanas y
+        EMA) para que el recálculo de la cola sea válido. symbol_column indica
+        si compute_fn calcula cada símbolo por separado (None si no lo hace).
+        dtype se aplica a los indicadores del cálculo por defecto (float32 opcional).
+        Sin version, el cálculo por defecto usa indicator_version de sus columnas
+        (cambia si cambia una fórmula); un compute_fn propio debe pasar la suya.
+        """
+        if df is None:
+            return None
+
+        if version is None:
+            if compute_fn is None:
+                version = indicator_version(TECHNICAL_INDICATORS if features is None else features)
+            else:
+                version = INDICATOR_VERSION
+        if compute_fn is None:
+            # Solo los indicadores pedidos (y sus dependencias)
+            indicator_fn = partial(add_technical_indicators, features=features, dtype=dtype)
+            compute_fn = partial(add_indicators_by_symbol, indicator_fn=indicator_fn)
+        raw_columns = list(df.columns)
+        lineage = self._lineage_key(namespace, version, raw_columns, features, dtype)
+
+        hashes = _row_hashes(df)
+        entry_dir = os.path.join(self.cache_dir, lineage, dataset_fingerprint(hashes))
+        content_key = hashlib.sha256(hashes.tobytes()).hexdigest()
+        manifest = self._read_manifest(entry_dir)
+
+        try:
+            if manifest and manifest['content_key'] == content_key:
+                result = self._load(entry_dir, manifest)
+                os.utime(entry_dir)
+                self.last_status = 'hit'
+            elif manifest and self._is_prefix(entry_dir, manifest, hashes):
+                cached = self._load(entry_dir, manifest)
+                result = self._extend(df, cached, manifest['rows'], compute_fn, symbol_column)
+                if result is None:
+                    result = self._select(compute_fn(df.copy()), raw_columns, features)
+                    self.last_status = 'miss'
+                else:
+                    self.last_status = 'append'
+                self._save(entry_dir, result, hashes, content_key, raw_columns, features)
+            else:
+                result = self._select(compute_fn(df.copy()), raw_columns, features)
+                self._save(entry_dir, result, hashes, content_key, raw_columns, features)
+                self.last_status = 'miss'
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Caché de características no disponible: {e}")
+            result = self._select(compute_fn(df.copy()), raw_columns, features)
+            self.last_status = 'error'
+
+        if self.last_status in ('miss', 'append'):
+            self._evict(os.path.dirname(entry_dir))
+        result.index = df.index
+        return result
+
+    def _evict(self, lineage_dir: str):
+        """Conserva solo las max_entries entradas usadas más recientemente del linaje"""
+        try:
+            entries = [os.path.join(lineage_dir, name) for name in os.listdir(lineage_dir)
+                       if not name.startswith('.') and os.path.isdir(os.path.join(lineage_dir, name))]
+            entries.sort(key=os.path.getmtime, reverse=True)
+        except OSError:
+            return
+        for stale in entries[self.max_entries:]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def _lineage_key(self, namespace: str, version: str, raw_columns: List[str],
+                     features: Optional[List[str]], dtype=None) -> str:
+        """Identifica la serie de entradas que comparten código y columnas"""
+        payload = json.dumps({
+            'namespace': namespace,
+            'version': version,
+            'raw_columns': raw_columns,
+            'features': features,
+            'dtype': np.dtype(dtype).name if dtype is not None else None
+        }, sort_keys=True)
+        return f"{namespace}_{hashlib.sha256(payload.encode()).hexdigest()[:16]}"
+
+    @staticmethod
+    def _select(df: pd.DataFrame, raw_columns: List[str], features: Optional[List[str]]) -> pd.DataFrame:
+        """Conserva las columnas crudas y las características pedidas"""
+        if features is None:
+            return df
+        keep = raw_columns + [f for f in features if f in df.columns and f not in raw_columns]
+        return df[keep]
+
+    @staticmethod
+    def _read_manifest(entry_dir: str) -> Optional[dict]:
+        path = os.path.join(entry_dir, 'manifest.json')
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _is_prefix(entry_dir: str, manifest: dict, hashes: np.ndarray) -> bool:
+        """True si los datos guardados son exactamente las primeras filas de los nuevos"""
+        rows = manifest['rows']
+        if rows == 0 or rows >= len(hashes):
+            return False
+        cached_hashes = np.load(os.path.join(entry_dir, 'row_hashes.npy'))
+        return np.array_equal(cached_hashes, hashes[:rows])
+
+    def _extend(self, df: pd.DataFrame, cached: pd.DataFrame, rows: int,
+                compute_fn: Callable, symbol_column: Optional[str]) -> Optional[pd.DataFrame]:
+        """
+        Calcula solo la cola (filas >= rows) con un historial previo de
+        `lookback` filas por símbolo. Retorna None si no es posible.
+        """
+        raw = df.reset_index(drop=True)
+        result = pd.concat([cached, raw.iloc[rows:].reindex(columns=cached.columns)], ignore_index=True)
+        feature_columns = [c for c in cached.columns if c not in raw.columns]
+
+        if symbol_column and symbol_column in raw.columns:
+            symbols = raw[symbol_column].to_numpy()
+            groups = [(symbols[:rows] == s, symbols[rows:] == s) for s in pd.unique(symbols[rows:])]
+        else:
+            groups = [(np.ones(rows, dtype=bool), np.ones(len(raw) - rows, dtype=bool))]
+
+        for prefix_mask, tail_mask in groups:
+            prefix_pos = np.flatnonzero(prefix_mask)
+            truncated = len(prefix_pos) > self.lookback
+            prefix_pos = prefix_pos[-self.lookback:]
+            window_pos = np.concatenate([prefix_pos, rows + np.flatnonzero(tail_mask)])
+
+            window = raw.iloc[window_pos].reset_index(drop=True)
+            if 'datetime' in window.columns and not window['datetime'].is_monotonic_increasing:
+                return None
+
+            computed = compute_fn(window.copy())
+            keep_from = self.warmup if truncated else 0
+            keep_pos = window_pos[keep_from:]
+            for col in feature_columns:
+                result.iloc[keep_pos, result.columns.get_loc(col)] = computed[col].to_numpy()[keep_from:]
+
+        return result
+
+    def _load(self, entry_dir: str, manifest: dict) -> pd.DataFrame:
+        """Lee las columnas guardadas (un .npy por columna)"""
+        data = {}
+        for i, (col, dtype) in enumerate(zip(manifest['columns'], manifest['dtypes'])):
+            values = np.load(os.path.join(entry_dir, f'col_{i}.npy'), allow_pickle=False)
+            if dtype == 'category':
+                data[col] = pd.Categorical.from_codes(values, categories=manifest['categories'][col])
+            elif dtype == 'object':
+                values = values.astype(object)
+                if col in manifest.get('null_columns', []):
+                    values[np.load(os.path.join(entry_dir, f'col_{i}_null.npy'))] = np.nan
+                data[col] = values
+            else:
+                data[col] = values
+        return pd.DataFrame(data, columns=manifest['columns'])
+
+    def _save(self, entry_dir: str, df: pd.DataFrame, hashes: np.ndarray, content_key: str,
+              raw_columns: List[str], features: Optional[List[str]]):
+        """Escribe la entrada en un directorio temporal y la reemplaza atómicamente"""
+        parent = os.path.dirname(entry_dir)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp_', dir=parent)
+
+        try:
+            dtypes = []
+            categories = {}
+            null_columns = []
+            for i, col in enumerate(df.columns):
+                series = df[col]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    # Categóricas (symbol del almacén columnar): códigos + categorías
+                    values = series.cat.codes.to_numpy()
+                    dtypes.append('category')
+                    categories[str(col)] = [str(c) for c in series.cat.categories]
+                elif series.dtype == object:
+                    # astype(str) convierte NaN en 'nan': la máscara de nulos permite restaurarlo
+                    values = series.astype(str).to_numpy(dtype=str)
+                    dtypes.append('object')
+                    nulls = series.isna().to_numpy()
+                    if nulls.any():
+                        np.save(os.path.join(tmp_dir, f'col_{i}_null.npy'), nulls, allow_pickle=False)
+                        null_columns.append(str(col))
+                else:
+                    values = series.to_numpy()
+                    dtypes.append(str(series.dtype))
+                np.save(os.path.join(tmp_dir, f'col_{i}.npy'), values, allow_pickle=False)
+
+            np.save(os.path.join(tmp_dir, 'row_hashes.npy'), hashes)
+            manifest = {
+                'content_key': content_key,
+                'rows': len(df),
+                'columns': [str(c) for c in df.columns],
+                'dtypes': dtypes,
+                'categories': categories,
+                'null_columns': null_columns,
+                'raw_columns': raw_columns,
+                'features': features,
+                'created': datetime.now().isoformat()
+            }
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+            # Entrada anterior apartada con nombre único y reemplazo bajo bloqueo
+            old_dir = None
+            with file_lock(entry_dir):
+                if os.path.exists(entry_dir):
+                    old_dir = tempfile.mkdtemp(prefix='.old_', dir=parent)
+                    os.replace(entry_dir, os.path.join(old_dir, 'entry'))
+                os.replace(tmp_dir, entry_dir)
+            if old_dir:
+                shutil.rmtree(old_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+
+_default_cache = None
+
+
+def get_feature_cache() -> FeatureCache:
+    """Instancia compartida de la caché en el directorio por defecto"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = FeatureCache()
+    return _default_cache
+
+
+def cached_indicators(df: pd.DataFrame, features: Optional[List[str]] = None, **kwargs) -> pd.DataFrame:
+    """Atajo: indicadores técnicos a través de la caché compartida"""
+    cache = get_feature_cache()
+    result = cache.get_or_compute(df, features, **kwargs)
+    if cache.last_status == 'hit':
+        print("⚡ Características leídas desde caché")
+    elif cache.last_status == 'append':
+        print("⚡ Caché reutilizada: solo se calcularon las filas nuevas")
+    return result
+
+
+def main():
+    """Demuestra los casos de la caché: fallo, acierto, filas agregadas y otro dataset"""
+    import time
+    from data_processing import load_data
+
+    print("🗄️ CACHÉ DE CARACTERÍSTICAS")
+    print("=" * 50)
+
+    df = load_data('../data/extracted_data_20250625_214110.csv')
+    if df is None:
+        return
+
+    cache = FeatureCache(cache_dir=tempfile.mkdtemp(prefix='feature_cache_'))
+    prefix = df.iloc[:-500]
+
+    for label, data in [('Primer cálculo', prefix), ('Mismos datos', prefix), ('Filas nuevas', df)]:
+        start = time.perf_counter()
+        result = cache.get_or_compute(data)
+        elapsed = time.perf_counter() - start
+        print(f"   {label}: {cache.last_status} en {elapsed*1000:.1f}ms ({len(result):,} filas)")
+
+    # Se compara contra la escala de cada columna para no amplificar valores
+    # casi nulos (BB_width, MACD)
+    error = tail_error(result, add_indicators_by_symbol(df.copy()))
+    status = "✅" if error <= TAIL_TOLERANCE else "❌"
+    print(f"   {status} Error máximo de la cola frente a recálculo completo: {error:.2e} "
+          f"(relativo a la escala, tolerancia {TAIL_TOLERANCE:.0e})")
+
+    # Filas sin símbolo: un acierto debe devolver NaN (no 'nan') igual que el cálculo
+    with_nan = df.iloc[:5000].copy()
+    with_nan.loc[with_nan.index[::7], 'symbol'] = np.nan
+    computed = cache.get_or_compute(with_nan)
+    loaded = cache.get_or_compute(with_nan)
+    same = cache.last_status == 'hit' and loaded.equals(computed) and loaded['symbol'].isna().sum() == with_nan['symbol'].isna().sum()
+    print(f"   {'✅' if same else '❌'} Símbolo NaN conservado en un acierto de caché")
+
+    # Otro dataset con el mismo linaje tiene su propia entrada: volver al primero es un acierto
+    other = load_data('../data/extracted_data_20250625_214131.csv')
+    if other is not None:
+        cache.get_or_compute(other)
+        cache.get_or_compute(df)
+        print(f"   Otro dataset y de vuelta al primero: {cache.last_status}")
+
+    shutil.rmtree(cache.cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
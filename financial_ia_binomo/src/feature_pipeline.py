@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from features import add_technical_indicators
+
+# Por debajo de este tamaño el costo de lanzar procesos supera la ganancia
+MIN_PARALLEL_ROWS = 20000
+
+
+def _compute_partition(args):
+    """Calcula los indicadores de una partición (se ejecuta en un proceso hijo)"""
+    part, indicator_fn = args
+    return indicator_fn(part)
+
+
+def split_by_symbol(df: pd.DataFrame, symbol_column: str = 'symbol') -> List[pd.DataFrame]:
+    """
+    Separa el DataFrame en una partición por símbolo, ordenada por fecha.
+    Cada partición conserva en '_row' la posición original de sus filas.
+    Las filas sin símbolo (NaN) forman su propia partición en lugar de perderse.
+    """
+    df = df.copy()
+    df['_row'] = np.arange(len(df))
+
+    parts = []
+    for _, part in df.groupby(symbol_column, sort=False, dropna=False, observed=True):
+        if 'datetime' in part.columns:
+            part = part.sort_values('datetime', kind='stable')
+        parts.append(part.reset_index(drop=True))
+    return parts
+
+
+def add_indicators_by_symbol(df: pd.DataFrame, symbol_column: str = 'symbol',
+                             n_jobs: Optional[int] = None,
+                             indicator_fn: Callable = add_technical_indicators) -> pd.DataFrame:
+    """
+    Calcula indicadores técnicos por instrumento.
+
+    Si el DataFrame tiene varios símbolos intercalados, cada símbolo se procesa
+    por separado (las ventanas móviles no mezclan instrumentos), en paralelo
+    con un pool de procesos, y el resultado se reensambla en el orden original.
+    Con un solo símbolo equivale a llamar indicator_fn(df).
+
+    n_jobs=1 fuerza ejecución secuencial; usarlo cuando se llama durante la
+    importación de un módulo (los procesos hijos lo volverían a importar).
+    """
+    if df is None:
+        return None
+
+    if symbol_column not in df.columns or df[symbol_column].nunique(dropna=False) <= 1:
+        return indicator_fn(df)
+
+    original_index = df.index
+    parts = split_by_symbol(df, symbol_column)
+
+    workers = min(n_jobs or os.cpu_count() or 1, len(parts))
+    if workers > 1 and len(df) >= MIN_PARALLEL_ROWS:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_compute_partition, [(p, indicator_fn) for p in parts]))
+    else:
+        results = [indicator_fn(p) for p in parts]
+
+    # Reensamblar en el orden original de las filas
+    combined = pd.concat(results, ignore_index=True)
+    combined = combined.sort_values('_row', kind='stable').drop(columns='_row')
+    combined.index = original_index
+    return combined
+
+
+def main():
+    """Compara el cálculo secuencial y el paralelo sobre los datos extraídos"""
+    import glob
+    import time
+    from data_processing import load_data
+
+    print("🧩 PIPELINE DE INDICADORES POR SÍMBOLO")
+    print("=" * 50)
+
+    files = sorted(glob.glob('../data/extracted_data_*.csv'))
+    if not files:
+        print("❌ No hay archivos extracted_data_*.csv")
+        return
+
+    df = load_data(files[0])
+    if df is None or 'symbol' not in df.columns:
+        return
+
+    # Completar los cinco símbolos de config.json duplicando uno existente
+    configured = ['EURUSD', 'GBPUSD', 'USDJPY', 'BTCUSD', 'ETHUSD']
+    frames = [df]
+    for symbol in configured:
+        if symbol not in df['symbol'].unique():
+            copy = df[df['symbol'] == df['symbol'].iloc[0]].copy()
+            copy['symbol'] = symbol
+            frames.append(copy)
+    df = pd.concat(frames, ignore_index=True).sort_values('datetime', kind='stable').reset_index(drop=True)
+    print(f"📊 {len(df):,} filas, {df['symbol'].nunique()} símbolos")
+
+    start = time.perf_counter()
+    sequential = add_indicators_by_symbol(df, n_jobs=1)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = add_indicators_by_symbol(df)
+    parallel_time = time.perf_counter() - start
+
+    same = sequential.equals(parallel)
+    print(f"   Secuencial: {sequential_time:.2f}s")
+    print(f"   Paralelo ({os.cpu_count()} núcleos): {parallel_time:.2f}s")
+    print(f"   Resultados idénticos: {'✅' if same else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
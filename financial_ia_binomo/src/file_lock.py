@@ -0,0 +1,46 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_path(path: str) -> str:
+    """Archivo de bloqueo de path: <path>.lock junto al recurso"""
+    return path.rstrip('/\\') + '.lock'
+
+
+@contextmanager
+def file_lock(path: str, poll_seconds: float = 0.05):
+    """
+    Bloqueo exclusivo entre procesos sobre <path>.lock (flock en POSIX,
+    msvcrt.locking en Windows). Bloquea hasta obtenerlo; el sistema lo
+    libera si el proceso termina, así que no quedan bloqueos huérfanos.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(poll_seconds)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
@@ -0,0 +1,385 @@
+import hashlib
+import inspect
+import json
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+from rolling_kernels import rolling_mad, rolling_min, rolling_max, true_range
+from precision import cast_columns
+
+# Versión del cálculo de indicadores: incrementarla al cambiar compute_indicators
+# (relleno, tipos) invalida las entradas guardadas en la caché de características.
+# Los cambios de fórmula de un indicador ya cambian indicator_version por sí solos
+INDICATOR_VERSION = '1'
+
+# Columnas de precio que toman los indicadores directamente del DataFrame
+RAW_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class Indicator:
+    """
+    Definición declarativa de un indicador: nombre, columnas de entrada
+    (crudas u otros indicadores), ventana de barras y función de cálculo.
+    La función recibe un dict nombre -> Series con las entradas ya calculadas.
+    """
+
+    def __init__(self, name: str, inputs: List[str], func: Callable, window: int = 1):
+        self.name = name
+        self.inputs = inputs
+        self.func = func
+        self.window = window
+
+    def __repr__(self):
+        return f"Indicator({self.name}, inputs={self.inputs}, window={self.window})"
+
+
+INDICATORS: Dict[str, Indicator] = {}
+
+
+def register(name: str, inputs: List[str], window: int = 1):
+    """Decorador que agrega un indicador al registro"""
+    def decorator(func):
+        INDICATORS[name] = Indicator(name, inputs, func, window)
+        return func
+    return decorator
+
+
+def _register_sma(name: str, source: str, window: int):
+    register(name, [source], window)(lambda c: c[source].rolling(window=window).mean())
+
+
+def _register_ema(name: str, source: str, span: int):
+    register(name, [source], span)(lambda c: c[source].ewm(span=span).mean())
+
+
+# Medias móviles
+_register_sma('SMA_5', 'close', 5)
+_register_sma('SMA_10', 'close', 10)
+_register_sma('SMA_20', 'close', 20)
+_register_ema('EMA_12', 'close', 12)
+_register_ema('EMA_26', 'close', 26)
+
+
+# MACD
+@register('MACD', ['EMA_12', 'EMA_26'])
+def _macd(c):
+    return c['EMA_12'] - c['EMA_26']
+
+
+_register_ema('MACD_signal', 'MACD', 9)
+
+
+@register('MACD_histogram', ['MACD', 'MACD_signal'])
+def _macd_histogram(c):
+    return c['MACD'] - c['MACD_signal']
+
+
+# RSI (medias simples de ganancias y pérdidas de 14 barras)
+@register('RSI_14', ['close'], 15)
+def _rsi(c):
+    delta = c['close'].diff()
+    gain = delta.clip(lower=0).rolling(window=14).mean()
+    loss = (-delta.clip(upper=0)).rolling(window=14).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+# Bandas de Bollinger (la media de 20 barras se comparte con SMA_20)
+@register('BB_middle', ['SMA_20'])
+def _bb_middle(c):
+    return c['SMA_20']
+
+
+@register('BB_std', ['close'], 20)
+def _bb_std(c):
+    return c['close'].rolling(window=20).std()
+
+
+@register('BB_upper', ['BB_middle', 'BB_std'])
+def _bb_upper(c):
+    return c['BB_middle'] + (c['BB_std'] * 2)
+
+
+@register('BB_lower', ['BB_middle', 'BB_std'])
+def _bb_lower(c):
+    return c['BB_middle'] - (c['BB_std'] * 2)
+
+
+@register('BB_range', ['BB_upper', 'BB_lower'])
+def _bb_range(c):
+    return c['BB_upper'] - c['BB_lower']
+
+
+@register('BB_width', ['BB_upper', 'BB_lower', 'BB_middle'])
+def _bb_width(c):
+    return (c['BB_upper'] - c['BB_lower']) / c['BB_middle']
+
+
+@register('BB_position', ['close', 'BB_upper', 'BB_lower'])
+def _bb_position(c):
+    return (c['close'] - c['BB_lower']) / (c['BB_upper'] - c['BB_lower'])
+
+
+# Mínimo/máximo de 14 barras compartidos por Estocástico y Williams %R
+@register('HH_14', ['high'], 14)
+def _highest_high(c):
+    return pd.Series(rolling_max(c['high'], 14), index=c['high'].index)
+
+
+@register('LL_14', ['low'], 14)
+def _lowest_low(c):
+    return pd.Series(rolling_min(c['low'], 14), index=c['low'].index)
+
+
+@register('Stoch_K', ['close', 'HH_14', 'LL_14'])
+def _stoch_k(c):
+    return 100 * ((c['close'] - c['LL_14']) / (c['HH_14'] - c['LL_14']))
+
+
+_register_sma('Stoch_D', 'Stoch_K', 3)
+
+
+@register('Williams_R', ['close', 'HH_14', 'LL_14'])
+def _williams_r(c):
+    return -100 * ((c['HH_14'] - c['close']) / (c['HH_14'] - c['LL_14']))
+
+
+# Volumen
+_register_sma('Volume_SMA', 'volume', 20)
+
+
+@register('Volume_ratio', ['volume', 'Volume_SMA'])
+def _volume_ratio(c):
+    return c['volume'] / c['Volume_SMA']
+
+
+# Momentum y volatilidad
+def _register_pct_change(name: str, periods: int):
+    register(name, ['close'], periods + 1)(lambda c: c['close'].pct_change(periods=periods))
+
+
+_register_pct_change('Price_change', 1)
+_register_pct_change('Price_change_5', 5)
+_register_pct_change('Price_change_10', 10)
+
+
+@register('Volatility', ['Price_change'], 20)
+def _volatility(c):
+    return c['Price_change'].rolling(window=20).std()
+
+
+@register('ROC_10', ['close'], 11)
+def _rate_of_change(c):
+    return ((c['close'] - c['close'].shift(10)) / c['close'].shift(10)) * 100
+
+
+def _register_momentum(name: str, periods: int):
+    register(name, ['close'], periods + 1)(lambda c: c['close'] - c['close'].shift(periods))
+
+
+_register_momentum('MOM_4', 4)
+_register_momentum('MOM_10', 10)
+
+
+# ATR (Average True Range)
+@register('TR', ['high', 'low', 'close'], 2)
+def _true_range(c):
+    return pd.Series(true_range(c['high'], c['low'], c['close']), index=c['close'].index)
+
+
+_register_sma('ATR', 'TR', 14)
+
+
+# CCI (Commodity Channel Index)
+@register('Typical_price', ['high', 'low', 'close'])
+def _typical_price(c):
+    return (c['high'] + c['low'] + c['close']) / 3
+
+
+_register_sma('TP_SMA_20', 'Typical_price', 20)
+
+
+@register('TP_MAD_20', ['Typical_price'], 20)
+def _typical_price_mad(c):
+    return pd.Series(rolling_mad(c['Typical_price'], 20), index=c['Typical_price'].index)
+
+
+@register('CCI', ['Typical_price', 'TP_SMA_20', 'TP_MAD_20'])
+def _cci(c):
+    return (c['Typical_price'] - c['TP_SMA_20']) / (0.015 * c['TP_MAD_20'])
+
+
+# Nombres heredados de start_api.py, recreate_model.py, train_ai.py y check_accuracy.py.
+# 'rsi' usa la misma definición que RSI_14: la versión anterior solo difería en la
+# primera barra válida, que esos scripts descartan por los NaN de SMA_20.
+ALIASES = {
+    'sma_5': 'SMA_5',
+    'sma_10': 'SMA_10',
+    'sma_20': 'SMA_20',
+    'ema_12': 'EMA_12',
+    'ema_26': 'EMA_26',
+    'rsi': 'RSI_14',
+    'macd': 'MACD',
+    'macd_signal': 'MACD_signal',
+    'macd_histogram': 'MACD_histogram',
+    'bb_middle': 'BB_middle',
+    'bb_upper': 'BB_upper',
+    'bb_lower': 'BB_lower',
+    'bb_width': 'BB_range',
+    'bb_position': 'BB_position',
+    'stoch_k': 'Stoch_K',
+    'stoch_d': 'Stoch_D',
+    'volume_sma': 'Volume_SMA',
+    'volume_ratio': 'Volume_ratio',
+    'momentum': 'MOM_4',
+    'rate_of_change': 'ROC_10',
+    'atr': 'ATR',
+    'williams_r': 'Williams_R',
+    'price_change': 'Price_change',
+    'price_change_5': 'Price_change_5',
+    'price_change_10': 'Price_change_10',
+    'ROC': 'ROC_10',
+    'MOM': 'MOM_10',
+}
+
+# Alias que dependen del origen del modelo: train_ai.py llama BB_width al ancho
+# absoluto (superior - inferior), mientras features.py lo normaliza por la media
+PROFILE_ALIASES = {
+    'train_ai': {'BB_width': 'BB_range'},
+}
+
+# Columnas que calcula cada perfil, con los nombres que usan sus modelos
+PROFILE_COLUMNS = {
+    # train_ai.py y check_accuracy.py (BB_width es el ancho absoluto de las bandas)
+    'train_ai': [
+        'SMA_5', 'SMA_10', 'SMA_20', 'EMA_12', 'EMA_26',
+        'MACD', 'MACD_signal', 'MACD_histogram', 'RSI_14',
+        'BB_middle', 'BB_upper', 'BB_lower', 'BB_width', 'BB_position',
+        'Stoch_K', 'Stoch_D', 'Volume_SMA', 'Volume_ratio',
+        'ROC', 'MOM', 'ATR', 'Williams_R'
+    ],
+    # start_api.py y recreate_model.py: el modelo simple (alias en minúsculas)
+    'simple_model': [
+        'sma_5', 'sma_20', 'ema_12', 'ema_26', 'rsi',
+        'macd', 'macd_signal', 'macd_histogram',
+        'bb_middle', 'bb_upper', 'bb_lower', 'bb_width', 'bb_position',
+        'stoch_k', 'stoch_d', 'volume_sma', 'volume_ratio',
+        'momentum', 'rate_of_change', 'atr', 'williams_r',
+        'price_change', 'price_change_5', 'price_change_10'
+    ],
+}
+
+# Columnas que agrega add_technical_indicators, en su orden
+TECHNICAL_INDICATORS = [
+    'SMA_5', 'SMA_10', 'SMA_20', 'EMA_12', 'EMA_26',
+    'MACD', 'MACD_signal', 'MACD_histogram', 'RSI_14',
+    'BB_middle', 'BB_upper', 'BB_lower', 'BB_width',
+    'Stoch_K', 'Stoch_D', 'Volume_SMA', 'Volume_ratio',
+    'Price_change', 'Price_change_5', 'Volatility',
+    'ATR', 'Williams_R', 'CCI'
+]
+
+
+def resolve(name: str, profile: Optional[str] = None) -> Optional[str]:
+    """Nombre canónico de un indicador (o alias); None si no está registrado"""
+    name = PROFILE_ALIASES.get(profile, {}).get(name, ALIASES.get(name, name))
+    return name if name in INDICATORS else None
+
+
+def profile_columns(profile: str, features: Optional[List[str]] = None) -> List[str]:
+    """Columnas del perfil, limitadas a `features` si se pasa"""
+    columns = PROFILE_COLUMNS[profile]
+    return list(columns) if features is None else [f for f in columns if f in features]
+
+
+def indicator_version(columns: List[str], profile: Optional[str] = None) -> str:
+    """
+    Versión de caché de un conjunto de columnas: INDICATOR_VERSION, las
+    columnas pedidas y la definición (entradas, ventana y código) de cada
+    indicador que las calcula. Cambiar la lista o una fórmula cambia la versión.
+    """
+    names = [resolve(c, profile) for c in columns]
+    definitions = []
+    for name in dependency_closure([n for n in names if n is not None]):
+        indicator = INDICATORS[name]
+        try:
+            source = inspect.getsource(indicator.func)
+        except (OSError, TypeError):
+            source = indicator.func.__qualname__
+        definitions.append([name, indicator.inputs, indicator.window, source])
+    payload = json.dumps({'version': INDICATOR_VERSION, 'columns': list(columns), 'profile': profile,
+                          'definitions': definitions})
+    return f"{INDICATOR_VERSION}-{hashlib.sha256(payload.encode()).hexdigest()[:12]}"
+
+
+def dependency_closure(names: List[str]) -> List[str]:
+    """
+    Indicadores necesarios para calcular `names`, en orden topológico
+    (cada dependencia antes que quien la usa, cada una una sola vez)
+    """
+    order = []
+    visited = set()
+
+    def visit(name):
+        if name in visited or name not in INDICATORS:
+            return
+        visited.add(name)
+        for dependency in INDICATORS[name].inputs:
+            visit(dependency)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def required_history(names: List[str]) -> int:
+    """Barras de historial necesarias: suma de ventanas en la cadena más larga"""
+    memo = {}
+
+    def depth(name):
+        if name not in INDICATORS:
+            return 0
+        if name not in memo:
+            indicator = INDICATORS[name]
+            memo[name] = indicator.window + max([depth(d) for d in indicator.inputs] or [0]) - 1
+        return memo[name]
+
+    return max([depth(n) for n in names] or [0]) + 1
+
+
+def compute_indicators(df: pd.DataFrame, features: Optional[List[str]] = None,
+                       profile: Optional[str] = None, fill: bool = True,
+                       dtype=None) -> pd.DataFrame:
+    """
+    Agrega a df solo las columnas pedidas (nombres canónicos o alias), calculando
+    el cierre mínimo de dependencias. Los intermedios compartidos (HH_14/LL_14,
+    medias, True Range) se calculan una vez y no se agregan si no se pidieron.
+    Los nombres desconocidos y las columnas crudas se ignoran.
+
+    fill=True rellena los NaN iniciales como add_technical_indicators (bfill + ffill).
+    dtype (p. ej. float32) convierte las columnas agregadas al final: el cálculo
+    siempre se hace en float64 para no acumular error en las sumas móviles.
+    """
+    targets = []
+    for name in features if features is not None else TECHNICAL_INDICATORS:
+        if name in RAW_COLUMNS:
+            continue
+        canonical = resolve(name, profile)
+        if canonical is not None:
+            targets.append((name, canonical))
+
+    columns = {c: df[c] for c in RAW_COLUMNS if c in df.columns}
+    for name in dependency_closure([canonical for _, canonical in targets]):
+        indicator = INDICATORS[name]
+        columns[name] = indicator.func(columns)
+
+    for name, canonical in targets:
+        df[name] = columns[canonical]
+
+    if fill:
+        df = df.bfill().ffill()
+
+    if dtype is not None:
+        df = cast_columns(df, [name for name, _ in targets], dtype)
+
+    return df
@@ -0,0 +1,418 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model_bundle import ModelBundle, add_export
+
+# Orden de preferencia con backend='auto' (se usa el primero disponible)
+AUTO_ORDER = ('tflite', 'numpy', 'keras')
+NUMPY_WEIGHTS = 'weights.npz'
+TFLITE_FILE = 'model.tflite'
+# Diferencia máxima aceptada entre la red numpy (float32) y la referencia float64
+REFERENCE_TOLERANCE = 1e-5
+
+
+def _sigmoid(x):
+    # Forma con tanh: sin desbordes de exp para valores muy negativos
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+ACTIVATIONS = {
+    'sigmoid': _sigmoid,
+    'tanh': np.tanh,
+    'relu': lambda x: np.maximum(x, 0),
+    'linear': lambda x: x,
+}
+
+
+def _activation(name: str) -> Callable:
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Activación no soportada: {name}")
+    return ACTIVATIONS[name]
+
+
+def lstm_step(z_input: np.ndarray, h: np.ndarray, c: np.ndarray, recurrent: np.ndarray,
+              activation: Callable, recurrent_activation: Callable):
+    """
+    Un paso de una capa LSTM de Keras (compuertas en orden i, f, c, o).
+    z_input es la proyección de la entrada ya calculada: x @ kernel + bias.
+    """
+    units = h.shape[-1]
+    z = z_input + h @ recurrent
+    gates = recurrent_activation(z)
+    i, f, o = gates[..., :units], gates[..., units:2 * units], gates[..., 3 * units:]
+    c = f * c + i * activation(z[..., 2 * units:3 * units])
+    h = o * activation(c)
+    return h, c
+
+
+class NumpyLSTM:
+    """
+    Pasada hacia adelante en numpy de un Sequential de capas LSTM/Dense
+    (la arquitectura de model_train), a partir de los pesos exportados.
+    No necesita TensorFlow y evita el costo fijo por llamada de model.predict.
+    """
+
+    def __init__(self, layers: List[Dict], weights: Dict[str, np.ndarray]):
+        self.layers = []
+        for index, spec in enumerate(layers):
+            layer = dict(spec)
+            layer['kernel'] = weights[f'l{index}_kernel']
+            layer['bias'] = weights.get(f'l{index}_bias')
+            layer['fn'] = _activation(spec['activation'])
+            if spec['type'] == 'lstm':
+                layer['recurrent'] = weights[f'l{index}_recurrent']
+                layer['recurrent_fn'] = _activation(spec['recurrent_activation'])
+            self.layers.append(layer)
+        self.dtype = self.layers[0]['kernel'].dtype if self.layers else np.float32
+
+    @classmethod
+    def load(cls, path: str, layers: List[Dict]) -> 'NumpyLSTM':
+        with np.load(path, allow_pickle=False) as weights:
+            return cls(layers, {name: weights[name] for name in weights.files})
+
+    def _lstm(self, layer: Dict, x: np.ndarray) -> np.ndarray:
+        batch, steps, _ = x.shape
+        units = layer['units']
+        projected = x @ layer['kernel']
+        if layer['bias'] is not None:
+            projected += layer['bias']
+        h = np.zeros((batch, units), dtype=self.dtype)
+        c = np.zeros((batch, units), dtype=self.dtype)
+        outputs = np.empty((batch, steps, units), dtype=self.dtype) if layer['return_sequences'] else None
+        for t in range(steps):
+            h, c = lstm_step(projected[:, t], h, c, layer['recurrent'], layer['fn'], layer['recurrent_fn'])
+            if outputs is not None:
+                outputs[:, t] = h
+        return outputs if outputs is not None else h
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        x = np.asarray(X, dtype=self.dtype)
+        for layer in self.layers:
+            if layer['type'] == 'lstm':
+                x = self._lstm(layer, x)
+            else:
+                x = x @ layer['kernel']
+                if layer['bias'] is not None:
+                    x = x + layer['bias']
+                x = layer['fn'](x)
+        return x
+
+
+def keras_layers(model) -> Tuple[List[Dict], Dict[str, np.ndarray]]:
+    """Especificación y pesos de las capas LSTM/Dense de un Sequential (Dropout se omite)"""
+    layers, weights = [], {}
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in ('Dropout', 'InputLayer'):
+            continue
+        config = layer.get_config()
+        values = layer.get_weights()
+        index = len(layers)
+        if kind == 'LSTM':
+            layers.append({'type': 'lstm', 'units': int(config['units']),
+                           'return_sequences': bool(config['return_sequences']),
+                           'activation': config['activation'],
+                           'recurrent_activation': config['recurrent_activation']})
+            weights[f'l{index}_kernel'], weights[f'l{index}_recurrent'] = values[0], values[1]
+        elif kind == 'Dense':
+            layers.append({'type': 'dense', 'units': int(config['units']),
+                           'activation': config['activation']})
+            weights[f'l{index}_kernel'] = values[0]
+        else:
+            raise ValueError(f"Capa no soportada para exportar: {kind}")
+        if config.get('use_bias', True):
+            weights[f'l{index}_bias'] = values[-1]
+        _activation(layers[-1]['activation'])
+    return layers, weights
+
+
+def load_network(bundle: ModelBundle) -> NumpyLSTM:
+    """
+    Red numpy con los pesos del paquete: la exportación 'numpy' si existe,
+    si no los pesos del modelo Keras (requiere TensorFlow). No depende del
+    backend de servicio (TFLite no expone los pesos).
+    """
+    exports = bundle.exports
+    if 'numpy' in exports:
+        return NumpyLSTM.load(os.path.join(bundle.path, exports['numpy']['file']), exports['numpy']['layers'])
+    try:
+        model = bundle.load_model()
+    except ImportError as e:
+        raise RuntimeError(f"El paquete {bundle.path} no tiene exportación numpy y no se pudo cargar "
+                           f"el modelo Keras para leer sus pesos: {e}") from e
+    return NumpyLSTM(*keras_layers(model))
+
+
+def export_numpy(bundle: ModelBundle) -> Dict:
+    """Exporta los pesos del modelo Keras del paquete a weights.npz"""
+    layers, weights = keras_layers(bundle.model)
+    np.savez(os.path.join(bundle.path, NUMPY_WEIGHTS), **weights)
+    info = {'file': NUMPY_WEIGHTS, 'layers': layers}
+    bundle.manifest = add_export(bundle.path, 'numpy', info)
+    return info
+
+
+def export_tflite(bundle: ModelBundle, seq_length: int) -> Dict:
+    """Convierte el modelo Keras del paquete a TFLite (entrada de una secuencia: 1 x seq x features)"""
+    import tensorflow as tf
+
+    model = bundle.model
+    n_features = model.inputs[0].shape[-1]
+    run = tf.function(lambda x: model(x, training=False))
+    concrete = run.get_concrete_function(tf.TensorSpec([1, seq_length, n_features], tf.float32))
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], model)
+    with open(os.path.join(bundle.path, TFLITE_FILE), 'wb') as f:
+        f.write(converter.convert())
+    info = {'file': TFLITE_FILE, 'seq_length': int(seq_length), 'n_features': int(n_features)}
+    bundle.manifest = add_export(bundle.path, 'tflite', info)
+    return info
+
+
+def _tflite_interpreter(path: str, allow_tensorflow: bool = True):
+    """Intérprete de tflite_runtime si está instalado (liviano), si no el de TensorFlow"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        if not allow_tensorflow:
+            raise
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path)
+
+
+class InferenceBackend:
+    """
+    Interfaz común de inferencia: predict(X) recibe un lote de secuencias
+    (lote x seq x características) y retorna la probabilidad de subida por
+    secuencia; predict_one(secuencia) retorna un float.
+    """
+
+    name = 'base'
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict_one(self, sequence: np.ndarray) -> float:
+        return float(self.predict(np.asarray(sequence)[None])[0])
+
+
+class KerasBackend(InferenceBackend):
+    """Llama al modelo directamente (sin el bucle de model.predict)"""
+
+    name = 'keras'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X):
+        return np.asarray(self.model(np.asarray(X, dtype=np.float32), training=False)).reshape(len(X), -1)[:, 0]
+
+
+class NumpyBackend(InferenceBackend):
+    name = 'numpy'
+
+    def __init__(self, network: NumpyLSTM):
+        self.network = network
+
+    def predict(self, X):
+        return self.network(X).reshape(len(X), -1)[:, 0]
+
+
+class TFLiteBackend(InferenceBackend):
+    """Intérprete TFLite de una secuencia por invocación"""
+
+    name = 'tflite'
+
+    def __init__(self, path: str, allow_tensorflow: bool = True):
+        self.interpreter = _tflite_interpreter(path, allow_tensorflow)
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=np.float32)
+        for i in range(len(X)):
+            self.interpreter.set_tensor(self.input_index, X[i:i + 1])
+            self.interpreter.invoke()
+            out[i] = self.interpreter.get_tensor(self.output_index).reshape(-1)[0]
+        return out
+
+
+def _build(bundle: ModelBundle, name: str, auto: bool = False) -> Optional[InferenceBackend]:
+    exports = bundle.exports
+    if name == 'numpy' and 'numpy' in exports:
+        return NumpyBackend(NumpyLSTM.load(os.path.join(bundle.path, exports['numpy']['file']),
+                                           exports['numpy']['layers']))
+    if name == 'tflite' and 'tflite' in exports:
+        try:
+            # En modo auto solo con tflite_runtime: importar TensorFlow anularía la ventaja
+            return TFLiteBackend(os.path.join(bundle.path, exports['tflite']['file']), allow_tensorflow=not auto)
+        except ImportError:
+            return None
+    if name == 'keras':
+        return KerasBackend(bundle.load_model())
+    return None
+
+
+def load_backend(bundle: ModelBundle, preference: str = 'auto') -> InferenceBackend:
+    """
+    Backend de inferencia para un paquete Keras. preference es 'auto'
+    (AUTO_ORDER: el primer formato exportado que se pueda cargar) o un
+    nombre concreto; si ese formato no está exportado se usa Keras.
+    El modelo Keras (y TensorFlow) solo se carga si hace falta.
+    """
+    if bundle.model_type != 'keras':
+        raise ValueError(f"Los backends de inferencia son para modelos Keras, no {bundle.model_type}")
+    for name in (AUTO_ORDER if preference == 'auto' else (preference, 'keras')):
+        backend = _build(bundle, name, auto=preference == 'auto')
+        if backend is not None:
+            return backend
+    raise ValueError(f"Backend de inferencia desconocido: {preference}")
+
+
+def random_network(n_features: int, seed: int = 0) -> NumpyLSTM:
+    """Red con la arquitectura de model_train y pesos aleatorios (para demos y benchmarks)"""
+    rng = np.random.default_rng(seed)
+    layers, weights, inputs = [], {}, n_features
+    for index, (kind, units, extra) in enumerate([('lstm', 128, True), ('lstm', 64, True), ('lstm', 32, False),
+                                                  ('dense', 16, 'relu'), ('dense', 1, 'sigmoid')]):
+        width = units * (4 if kind == 'lstm' else 1)
+        weights[f'l{index}_kernel'] = rng.normal(0, 0.1, (inputs, width)).astype(np.float32)
+        weights[f'l{index}_bias'] = np.zeros(width, dtype=np.float32)
+        if kind == 'lstm':
+            weights[f'l{index}_recurrent'] = rng.normal(0, 0.1, (units, width)).astype(np.float32)
+            layers.append({'type': 'lstm', 'units': units, 'return_sequences': extra,
+                           'activation': 'tanh', 'recurrent_activation': 'sigmoid'})
+        else:
+            layers.append({'type': 'dense', 'units': units, 'activation': extra})
+        inputs = units
+    return NumpyLSTM(layers, weights)
+
+
+def reference_forward(network: NumpyLSTM, X: np.ndarray) -> np.ndarray:
+    """
+    Referencia independiente de NumpyLSTM: float64, una compuerta a la vez
+    con sus propias rebanadas de pesos y un bucle por muestra, sin lstm_step.
+    Es lenta; solo sirve para validar los backends.
+    """
+    def sigmoid(v):
+        return 1.0 / (1.0 + np.exp(-v))
+
+    outputs = []
+    for sample in np.asarray(X, dtype=np.float64):
+        x = sample
+        for layer in network.layers:
+            kernel = layer['kernel'].astype(np.float64)
+            bias = np.zeros(kernel.shape[1]) if layer['bias'] is None else layer['bias'].astype(np.float64)
+            if layer['type'] != 'lstm':
+                x = ACTIVATIONS[layer['activation']](x @ kernel + bias)
+                continue
+            units = layer['units']
+            recurrent = layer['recurrent'].astype(np.float64)
+            gate = {name: (kernel[:, k * units:(k + 1) * units], recurrent[:, k * units:(k + 1) * units],
+                           bias[k * units:(k + 1) * units])
+                    for k, name in enumerate(('i', 'f', 'c', 'o'))}
+            act = np.tanh if layer['activation'] == 'tanh' else ACTIVATIONS[layer['activation']]
+            rec = sigmoid if layer['recurrent_activation'] == 'sigmoid' else ACTIVATIONS[layer['recurrent_activation']]
+            h, c, sequence = np.zeros(units), np.zeros(units), []
+            for x_t in x:
+                i = rec(x_t @ gate['i'][0] + h @ gate['i'][1] + gate['i'][2])
+                f = rec(x_t @ gate['f'][0] + h @ gate['f'][1] + gate['f'][2])
+                candidate = act(x_t @ gate['c'][0] + h @ gate['c'][1] + gate['c'][2])
+                o = rec(x_t @ gate['o'][0] + h @ gate['o'][1] + gate['o'][2])
+                c = f * c + i * candidate
+                h = o * act(c)
+                sequence.append(h)
+            x = np.array(sequence) if layer['return_sequences'] else h
+        outputs.append(x)
+    return np.array(outputs)
+
+
+def check_reference(network: NumpyLSTM, X: np.ndarray, atol: float = REFERENCE_TOLERANCE) -> Dict:
+    """Compara la red numpy (en su dtype) con la referencia float64 por compuerta"""
+    diff = float(np.max(np.abs(network(X).astype(np.float64) - reference_forward(network, X))))
+    return {'max_abs_diff': diff, 'ok': diff <= atol}
+
+
+def latency(fn: Callable, sample: np.ndarray, calls: int = 300, warmup: int = 20) -> Dict[str, float]:
+    """Latencia por llamada de fn(sample) en µs (p50/p99)"""
+    for _ in range(warmup):
+        fn(sample)
+    times = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(sample)
+        times[i] = time.perf_counter() - start
+    return {'p50': float(np.percentile(times, 50) * 1e6), 'p99': float(np.percentile(times, 99) * 1e6)}
+
+
+def benchmark(backends: Dict[str, Callable], sample: np.ndarray, calls: int = 300) -> Dict[str, Dict]:
+    results = {}
+    for name, fn in backends.items():
+        results[name] = latency(fn, sample, calls)
+        print(f"   {name:<14} p50 {results[name]['p50']:>9.0f}µs   p99 {results[name]['p99']:>9.0f}µs")
+    return results
+
+
+def _print_reference_check(network: NumpyLSTM, X: np.ndarray):
+    report = check_reference(network, X)
+    print(f"   {'✅' if report['ok'] else '❌'} Red numpy vs referencia float64 por compuerta: "
+          f"máx. diferencia {report['max_abs_diff']:.2e} (tolerancia {REFERENCE_TOLERANCE:.0e})")
+
+
+def main():
+    """Exporta el LSTM del paquete y compara la latencia por llamada con model.predict"""
+    from model_bundle import bundle_path, is_bundle, load_bundle
+
+    print("⚡ BACKENDS DE INFERENCIA")
+    print("=" * 50)
+
+    seq_length = 30
+    path = bundle_path('../models/lstm_model.h5')
+    try:
+        import tensorflow  # noqa: F401
+        has_tf = True
+    except ImportError:
+        has_tf = False
+
+    if is_bundle(path) and has_tf:
+        bundle = load_bundle(path)
+        export_numpy(bundle)
+        try:
+            export_tflite(bundle, seq_length)
+        except Exception as e:
+            print(f"⚠️ Exportación TFLite no disponible: {e}")
+        n_features = len(bundle.features)
+        sample = np.random.default_rng(0).random((1, seq_length, n_features), dtype=np.float32)
+
+        backends = {'model.predict': lambda x: bundle.model.predict(x, verbose=0)}
+        for name in ('keras', 'tflite', 'numpy'):
+            backend = _build(bundle, name)
+            if backend is not None:
+                backends[name] = backend.predict
+        reference = bundle.model.predict(sample, verbose=0).reshape(-1)
+        for name, fn in backends.items():
+            print(f"   {name}: máx. diferencia con model.predict {np.max(np.abs(fn(sample) - reference)):.2e}")
+        _print_reference_check(load_network(bundle), sample)
+        benchmark(backends, sample)
+        return
+
+    # Sin paquete o sin TensorFlow: pesos aleatorios con la arquitectura de model_train
+    print("⚠️ Sin paquete Keras o sin TensorFlow: red aleatoria con la arquitectura de model_train")
+    rng = np.random.default_rng(0)
+    n_features = 19
+    backend = NumpyBackend(random_network(n_features))
+    sample = rng.random((1, seq_length, n_features), dtype=np.float32)
+    batch = rng.random((64, seq_length, n_features), dtype=np.float32)
+    same = np.allclose(backend.predict(batch)[:1], backend.predict(batch[:1]), rtol=0, atol=1e-6)
+    print(f"   Lote y fila individual coinciden: {'✅' if same else '❌'}")
+    _print_reference_check(backend.network, batch[:8])
+    benchmark({'numpy': backend.predict, 'numpy (x64)': lambda _: backend.predict(batch)}, sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from file_lock import file_lock
+
+DEFAULT_MATRIX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'matrix')
+
+
+def file_stamp(path: Optional[str]) -> Optional[Dict]:
+    """Ruta, tamaño y fecha de modificación de un archivo (None si no existe)"""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return {'path': os.path.realpath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def matrix_key(*parts) -> str:
+    """Clave de una matriz a partir de lo que determina su contenido"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def matrix_path(source: str, namespace: str, root: str = DEFAULT_MATRIX_DIR) -> str:
+    """Directorio de la matriz de un origen de datos: <raíz>/<namespace>/<archivo>"""
+    name = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+    return os.path.join(os.path.abspath(root), namespace, name)
+
+
+def build_lock(path: str):
+    """
+    Bloqueo entre procesos para construir la matriz de path una sola vez:
+    quien lo obtiene vuelve a abrirla (otro pudo construirla mientras
+    esperaba) y solo si sigue desactualizada la calcula.
+    """
+    return file_lock(path + '.build')
+
+
+class MappedMatrix:
+    """
+    Matriz OHLCV + características mapeada en memoria en modo solo lectura.
+
+    El directorio contiene timestamps.npy (int64 en ns, ordenado dentro de cada
+    símbolo), values.npy (filas x columnas), opcionalmente scaled.npy (las
+    características ya escaladas para el modelo) y meta.json. Varios procesos
+    que abren la misma matriz comparten las páginas a través de la caché del
+    sistema operativo, y abrirla no lee los datos hasta que se usan.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        with open(os.path.join(self.path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+
+        self.columns: List[str] = self.meta['columns']
+        self.scaled_columns: List[str] = self.meta.get('scaled_columns') or []
+        self.symbols: Dict[str, List[int]] = self.meta.get('symbols') or {}
+        self._positions = {c: i for i, c in enumerate(self.columns)}
+
+        self.timestamps = np.load(os.path.join(self.path, 'timestamps.npy'), mmap_mode='r')
+        self.values = np.load(os.path.join(self.path, 'values.npy'), mmap_mode='r')
+        scaled_path = os.path.join(self.path, 'scaled.npy')
+        self.scaled = np.load(scaled_path, mmap_mode='r') if os.path.exists(scaled_path) else None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def datetimes(self) -> np.ndarray:
+        """Timestamps como datetime64[ns] (vista, sin copia)"""
+        return self.timestamps.view('datetime64[ns]')
+
+    def column(self, name: str) -> np.ndarray:
+        """Vista de una columna"""
+        return self.values[:, self._positions[name]]
+
+    def select(self, columns: List[str]) -> np.ndarray:
+        """
+        Columnas pedidas en ese orden: vista si son contiguas en la matriz,
+        copia en otro caso
+        """
+        positions = [self._positions[c] for c in columns]
+        first = positions[0] if positions else 0
+        if positions == list(range(first, first + len(positions))):
+            return self.values[:, first:first + len(positions)]
+        return self.values[:, positions]
+
+    def segment(self, symbol: str) -> slice:
+        """Filas de un símbolo (las filas están agrupadas por símbolo)"""
+        start, stop = self.symbols[symbol]
+        return slice(start, stop)
+
+    def frame(self) -> pd.DataFrame:
+        """
+        DataFrame con datetime, las columnas de la matriz y symbol si existe.
+        El bloque numérico apunta al archivo mapeado (no se copia), así que
+        es de solo lectura: agregar o reemplazar columnas sí está permitido.
+        """
+        df = pd.DataFrame(self.values, columns=self.columns, copy=False)
+        df.insert(0, 'datetime', self.datetimes)
+        if self.symbols:
+            symbols = np.empty(len(self), dtype=object)
+            for symbol, (start, stop) in self.symbols.items():
+                symbols[start:stop] = symbol
+            df['symbol'] = symbols
+        return df
+
+
+def write_matrix(path: str, df: pd.DataFrame, columns: Optional[List[str]] = None,
+                 scaled: Optional[np.ndarray] = None, scaled_columns: Optional[List[str]] = None,
+                 dtype=np.float64, key: Optional[str] = None,
+                 symbol_column: str = 'symbol') -> MappedMatrix:
+    """
+    Escribe df como matriz mapeable y la abre.
+
+    columns son las columnas numéricas a guardar (por defecto todas las
+    numéricas). Las filas se ordenan por símbolo y fecha (orden estable);
+    scaled, si se pasa, debe estar alineado con las filas de df y se reordena
+    igual. El directorio se reemplaza atómicamente; los escritores
+    concurrentes se serializan con un bloqueo de archivo.
+    """
+    if columns is None:
+        columns = [c for c in df.select_dtypes('number').columns if c != symbol_column]
+
+    timestamps = pd.to_datetime(df['datetime']).to_numpy(dtype='datetime64[ns]').view('int64')
+    symbol_values = None
+    if symbol_column in df.columns:
+        symbol_values = df[symbol_column].astype(str).to_numpy()
+        order = np.lexsort((timestamps, symbol_values))
+    else:
+        order = np.argsort(timestamps, kind='stable')
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp_', dir=parent)
+
+    try:
+        np.save(os.path.join(tmp_dir, 'timestamps.npy'), timestamps[order])
+        np.save(os.path.join(tmp_dir, 'values.npy'),
+                np.ascontiguousarray(df[columns].to_numpy(dtype=dtype)[order]))
+        if scaled is not None:
+            np.save(os.path.join(tmp_dir, 'scaled.npy'), np.ascontiguousarray(np.asarray(scaled)[order]))
+
+        symbols = {}
+        if symbol_values is not None:
+            sorted_symbols = symbol_values[order]
+            starts = np.flatnonzero(np.r_[True, sorted_symbols[1:] != sorted_symbols[:-1]])
+            stops = np.r_[starts[1:], len(sorted_symbols)]
+            symbols = {str(sorted_symbols[a]): [int(a), int(b)] for a, b in zip(starts, stops)}
+
+        meta = {
+            'key': key,
+            'rows': int(len(df)),
+            'columns': [str(c) for c in columns],
+            'scaled_columns': list(scaled_columns) if scaled_columns is not None else None,
+            'dtype': np.dtype(dtype).name,
+            'symbols': symbols,
+            'created': datetime.now().isoformat()
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        # Directorio anterior apartado con nombre único y reemplazo bajo bloqueo
+        old_dir = None
+        with file_lock(path):
+            if os.path.exists(path):
+                old_dir = tempfile.mkdtemp(prefix='.old_', dir=parent)
+                os.replace(path, os.path.join(old_dir, 'data'))
+            os.replace(tmp_dir, path)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return MappedMatrix(path)
+
+
+def open_matrix(path: str, key: Optional[str] = None) -> Optional[MappedMatrix]:
+    """Abre la matriz si existe y (si se pasa key) corresponde a esa clave"""
+    try:
+        matrix = MappedMatrix(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    if key is not None and matrix.meta.get('key') != key:
+        return None
+    return matrix
+
+
+def load_feature_matrix(source: str, namespace: str, features: Optional[List[str]] = None,
+                        dtype=None, root: str = DEFAULT_MATRIX_DIR) -> Optional[MappedMatrix]:
+    """
+    Matriz con OHLCV e indicadores de un CSV: la abre si está al día con el
+    archivo, las características y la versión de los indicadores; si no, la
+    construye. Las características pedidas quedan primero y contiguas, así que
+    select(features) es una vista. Retorna None si no hay datos.
+    """
+    from data_processing import load_data
+    from feature_cache import cached_indicators
+    from features import TECHNICAL_INDICATORS, indicator_version
+    from precision import get_feature_dtype
+
+    dtype = get_feature_dtype(dtype)
+    version = indicator_version(TECHNICAL_INDICATORS if features is None else features)
+    key = matrix_key(namespace, file_stamp(source), features, version, dtype.name)
+    path = matrix_path(source, namespace, root)
+    matrix = open_matrix(path, key)
+    if matrix is not None:
+        return matrix
+
+    with build_lock(path):
+        matrix = open_matrix(path, key)
+        if matrix is not None:
+            return matrix
+
+        df = load_data(source)
+        if df is None:
+            return None
+        df = cached_indicators(df, features, dtype=dtype)
+
+        numeric = [c for c in df.select_dtypes('number').columns if c != 'symbol']
+        wanted = [f for f in (features or []) if f in numeric]
+        columns = list(dict.fromkeys(wanted + numeric))
+        return write_matrix(path, df, columns=columns, key=key)
+
+
+def main():
+    """Compara el arranque desde CSV con la apertura de la matriz mapeada"""
+    import time
+    from data_processing import load_data
+    from feature_cache import cached_indicators
+
+    print("🗺️ MATRIZ MAPEADA EN MEMORIA")
+    print("=" * 50)
+
+    source = '../data/extracted_data_20250625_214110.csv'
+    start = time.perf_counter()
+    df = load_data(source)
+    if df is None:
+        return
+    df = cached_indicators(df)
+    csv_seconds = time.perf_counter() - start
+
+    path = matrix_path(source, 'demo', root=tempfile.mkdtemp(prefix='matrix_'))
+    write_matrix(path, df)
+
+    start = time.perf_counter()
+    matrix = open_matrix(path)
+    frame = matrix.frame()
+    open_seconds = time.perf_counter() - start
+
+    expected = df.sort_values(['symbol', 'datetime'], kind='stable').reset_index(drop=True)
+    same = np.array_equal(frame[matrix.columns].to_numpy(), expected[matrix.columns].to_numpy(float),
+                          equal_nan=True)
+    print(f"   CSV + indicadores: {csv_seconds*1000:.1f}ms")
+    print(f"   Matriz mapeada: {open_seconds*1000:.1f}ms ({matrix.values.nbytes / 1e6:.1f}MB en disco)")
+    print(f"   Valores idénticos: {'✅' if same else '❌'}")
+    print(f"   Bloque numérico sin copia: {'✅' if np.shares_memory(frame[matrix.columns[0]].to_numpy(), matrix.values) else '❌'}")
+
+    shutil.rmtree(os.path.dirname(os.path.dirname(path)), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
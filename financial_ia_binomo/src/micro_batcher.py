@@ -0,0 +1,177 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Agrupa peticiones de inferencia concurrentes en una sola llamada al modelo.
+
+    Cada hilo llama a predict(fila) (o submit) y espera su resultado. Un hilo
+    de fondo toma la primera petición en cola, junta las que lleguen durante
+    max_wait_ms (hasta max_batch), ejecuta fn con el lote apilado y entrega a
+    cada petición su fila del resultado. Mientras el modelo procesa un lote,
+    las nuevas peticiones se acumulan y salen en el siguiente, así que el
+    tamaño de lote crece con la carga. La espera extra de una petición está
+    acotada por max_wait_ms más la duración de un lote; sin carga (último
+    lote de un elemento y cola vacía) la petición sale sin esperar.
+
+    fn recibe un array (lote x ...) y retorna un array con una fila por
+    elemento. Si fn lanza una excepción, todas las peticiones del lote la reciben.
+    """
+
+    def __init__(self, fn: Callable[[np.ndarray], np.ndarray], max_batch: int = 64,
+                 max_wait_ms: float = 2.0, name: str = 'micro-batcher'):
+        self.fn = fn
+        self.max_batch = max(int(max_batch), 1)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._closed = False
+        self.stats = {'batches': 0, 'items': 0, 'max_batch_seen': 0}
+        self._last_size = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        if self._closed:
+            raise RuntimeError("MicroBatcher cerrado")
+        future = Future()
+        self._queue.put((np.asarray(item), future))
+        return future
+
+    def predict(self, item, timeout: Optional[float] = None):
+        """Resultado para un elemento (bloquea hasta que su lote se procese)"""
+        return self.submit(item).result(timeout)
+
+    __call__ = predict
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        if self._last_size <= 1 and self._queue.empty():
+            return batch
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                # Lo que ya está en cola se toma sin esperar
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            stop = any(entry is None for entry in batch)
+            batch = [entry for entry in batch if entry is not None]
+            live = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if live:
+                try:
+                    results = self.fn(np.stack([item for item, _ in live]))
+                    for i, (_, future) in enumerate(live):
+                        future.set_result(results[i])
+                except Exception as e:
+                    for _, future in live:
+                        future.set_exception(e)
+                self.stats['batches'] += 1
+                self.stats['items'] += len(live)
+                self.stats['max_batch_seen'] = max(self.stats['max_batch_seen'], len(live))
+            self._last_size = len(live)
+            if stop:
+                return
+
+    @property
+    def mean_batch(self) -> float:
+        return self.stats['items'] / self.stats['batches'] if self.stats['batches'] else 0.0
+
+    def close(self, timeout: Optional[float] = None):
+        """Procesa lo pendiente y detiene el hilo de fondo"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+def load_test(call: Callable, sample, clients: int, requests_per_client: int) -> Dict[str, float]:
+    """Throughput y latencia (p50/p99 en ms) con `clients` hilos llamando a call(sample) en bucle"""
+    latencies = [[] for _ in range(clients)]
+
+    def client(out):
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            call(sample)
+            out.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(latencies[i],)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    values = np.concatenate([np.asarray(l) for l in latencies])
+    return {
+        'throughput': len(values) / elapsed,
+        'p50': float(np.percentile(values, 50) * 1000),
+        'p99': float(np.percentile(values, 99) * 1000)
+    }
+
+
+def main():
+    """Compara llamadas individuales con micro-batching bajo carga concurrente"""
+    import os
+    from model_bundle import load_model_files
+
+    print("🧺 MICRO-BATCHING DE PREDICCIONES")
+    print("=" * 50)
+
+    model_path = '../models/simple_model.pkl'
+    if not os.path.exists(model_path):
+        print("❌ Modelo no encontrado")
+        return
+    bundle = load_model_files(model_path, '../models/simple_model_scaler.pkl',
+                              '../models/simple_model_features.pkl')
+    model, scaler = bundle.model, bundle.scaler
+    model.set_params(n_jobs=1)
+
+    def predict_rows(X):
+        return model.predict_proba(scaler.transform(X))
+
+    sample = np.random.default_rng(0).normal(size=len(bundle.features))
+
+    def direct(row):
+        # Una llamada al modelo por petición, como /predict sin batcher
+        return predict_rows(row.reshape(1, -1))[0]
+
+    for clients in (1, 8, 32):
+        batcher = MicroBatcher(predict_rows, max_batch=64, max_wait_ms=2)
+        single = load_test(direct, sample, clients, 40)
+        batched = load_test(batcher, sample, clients, 40)
+        batcher.close()
+        print(f"   {clients:>2} clientes: individual {single['throughput']:>6.0f} req/s "
+              f"(p50 {single['p50']:.1f}ms, p99 {single['p99']:.1f}ms) | "
+              f"lotes {batched['throughput']:>6.0f} req/s "
+              f"(p50 {batched['p50']:.1f}ms, p99 {batched['p99']:.1f}ms, lote medio {batcher.mean_batch:.1f})")
+
+    batcher = MicroBatcher(predict_rows)
+    same = np.array_equal(batcher.predict(sample), predict_rows(sample.reshape(1, -1))[0])
+    batcher.close()
+    print(f"   Mismo resultado que la llamada individual: {'✅' if same else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+
+from file_lock import file_lock
+
+# Versión del formato del paquete; load_bundle rechaza versiones más nuevas
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = 'manifest.json'
+MODEL_FILES = {'sklearn': 'model.joblib', 'keras': 'model.h5'}
+BUNDLE_SUFFIX = '.bundle'
+
+
+def bundle_path(model_path: str) -> str:
+    """Directorio del paquete que corresponde a un modelo suelto (models/x.pkl -> models/x.bundle)"""
+    return os.path.splitext(model_path)[0] + BUNDLE_SUFFIX
+
+
+def is_bundle(path: Optional[str]) -> bool:
+    return bool(path) and os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def data_hash(data) -> Optional[str]:
+    """
+    Huella sha256 de los datos de entrenamiento: contenido de un archivo,
+    filas de un DataFrame (sin índice) o bytes de un array.
+    """
+    if data is None:
+        return None
+    digest = hashlib.sha256()
+    if isinstance(data, str):
+        with open(data, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    elif hasattr(data, 'columns'):
+        import pandas as pd
+        digest.update(json.dumps([str(c) for c in data.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    else:
+        values = np.ascontiguousarray(data)
+        digest.update(f'{values.dtype.str}{values.shape}'.encode())
+        digest.update(values.tobytes())
+    return 'sha256:' + digest.hexdigest()
+
+
+def _encode(value):
+    """Valores de numpy a JSON (los arrays conservan su dtype)"""
+    if isinstance(value, np.ndarray):
+        return {'__ndarray__': value.tolist(), 'dtype': value.dtype.str}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if '__ndarray__' in value:
+            return np.array(value['__ndarray__'], dtype=np.dtype(value['dtype']))
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def scaler_params(scaler) -> Optional[Dict]:
+    """
+    Clase, hiperparámetros y estado ajustado (atributos terminados en '_')
+    de un scaler de sklearn, serializables en el manifiesto. Los floats se
+    guardan con repr, así que el scaler reconstruido transforma igual.
+    """
+    if scaler is None:
+        return None
+    cls = type(scaler)
+    state = {k: v for k, v in vars(scaler).items() if k.endswith('_') and not k.startswith('_')}
+    return {
+        'class': f'{cls.__module__}.{cls.__name__}',
+        'params': _encode(scaler.get_params()),
+        'state': _encode(state)
+    }
+
+
+def build_scaler(spec: Optional[Dict]):
+    """Reconstruye un scaler a partir de scaler_params"""
+    if spec is None:
+        return None
+    module_name, class_name = spec['class'].rsplit('.', 1)
+    cls = getattr(importlib.import_module(module_name), class_name)
+    scaler = cls(**_decode(spec['params']))
+    for name, value in _decode(spec['state']).items():
+        setattr(scaler, name, value)
+    return scaler
+
+
+def model_type_of(model) -> str:
+    """'keras' para modelos de TensorFlow/Keras, 'sklearn' para el resto"""
+    root = type(model).__module__.split('.')[0]
+    return 'keras' if root in ('keras', 'tensorflow', 'tf_keras') else 'sklearn'
+
+
+def load_model_file(path: str, model_type: str):
+    if model_type == 'keras':
+        # TensorFlow solo se importa si el paquete realmente tiene un modelo Keras
+        from tensorflow.keras.models import load_model
+        return load_model(path)
+    return joblib.load(path)
+
+
+class ModelBundle:
+    """
+    Modelo listo para usar con su scaler, características y manifiesto.
+
+    El manifiesto registra tipo de modelo, lista de características,
+    parámetros del scaler, huella de los datos de entrenamiento y fecha de
+    creación. Los modelos sueltos de versiones anteriores se cargan con
+    legacy=True y un manifiesto sintetizado. El scaler de un paquete se
+    reconstruye al usarlo por primera vez (importa sklearn).
+    """
+
+    def __init__(self, model, scaler, features: List[str], manifest: Dict, path: Optional[str] = None):
+        self.model = model
+        self._scaler = scaler
+        self.features = features
+        self.manifest = manifest
+        self.path = path
+
+    @property
+    def scaler(self):
+        if self._scaler is None and self.manifest.get('scaler') is not None:
+            self._scaler = build_scaler(self.manifest['scaler'])
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+
+    @property
+    def model_type(self) -> str:
+        return self.manifest['model_type']
+
+    @property
+    def legacy(self) -> bool:
+        return self.manifest.get('legacy', False)
+
+    @property
+    def exports(self) -> Dict:
+        """Formatos de inferencia exportados dentro del paquete (ver inference.py)"""
+        return self.manifest.get('exports', {})
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifica el contenido del paquete (para claves de caché); no cambia al exportar"""
+        content = {k: v for k, v in self.manifest.items() if k != 'exports'}
+        payload = json.dumps(content, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def load_model(self):
+        """Modelo del paquete, cargándolo si se abrió con with_model=False"""
+        if self.model is None:
+            self.model = load_model_file(os.path.join(self.path, self.manifest['model_file']),
+                                         self.model_type)
+        return self.model
+
+    def __repr__(self):
+        return (f"ModelBundle({self.model_type}, {len(self.features)} features, "
+                f"created={self.manifest.get('created')})")
+
+
+def save_bundle(path: str, model, features: List[str], scaler=None, training_data=None,
+                model_type: Optional[str] = None, extra: Optional[Dict] = None) -> ModelBundle:
+    """
+    Guarda modelo, scaler y características en un único directorio con su
+    manifiesto. La escritura es atómica: se arma en un directorio temporal y
+    reemplaza al paquete anterior solo cuando está completo. Los guardados
+    concurrentes se serializan con un bloqueo de archivo (como write_matrix).
+    """
+    model_type = model_type or model_type_of(model)
+    if model_type not in MODEL_FILES:
+        raise ValueError(f"Tipo de modelo no soportado: {model_type}")
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp_', dir=parent)
+
+    try:
+        model_file = MODEL_FILES[model_type]
+        if model_type == 'keras':
+            model.save(os.path.join(tmp_dir, model_file))
+        else:
+            joblib.dump(model, os.path.join(tmp_dir, model_file))
+
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'model_type': model_type,
+            'model_class': f'{type(model).__module__}.{type(model).__name__}',
+            'model_file': model_file,
+            'features': [str(f) for f in features],
+            'scaler': scaler_params(scaler),
+            'data_hash': training_data if isinstance(training_data, str) and training_data.startswith('sha256:')
+            else data_hash(training_data),
+            'created': datetime.now().isoformat()
+        }
+        if extra:
+            manifest['extra'] = _encode(extra)
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Paquete anterior apartado con nombre único y reemplazo bajo bloqueo
+        old_dir = None
+        with file_lock(path):
+            if os.path.exists(path):
+                old_dir = tempfile.mkdtemp(prefix='.old_', dir=parent)
+                os.replace(path, os.path.join(old_dir, 'bundle'))
+            os.replace(tmp_dir, path)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return ModelBundle(model, scaler, list(manifest['features']), manifest, path)
+
+
+def read_manifest(path: str) -> Dict:
+    with open(os.path.join(path, MANIFEST_NAME), 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('format', 0) > BUNDLE_FORMAT:
+        raise ValueError(f"Paquete con formato {manifest['format']} (soportado hasta {BUNDLE_FORMAT})")
+    return manifest
+
+
+def write_manifest(path: str, manifest: Dict):
+    """Reemplaza el manifiesto de un paquete de forma atómica"""
+    tmp_path = os.path.join(path, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, MANIFEST_NAME))
+
+
+def add_export(path: str, name: str, info: Dict) -> Dict:
+    """Registra en el manifiesto un formato exportado (archivos ya escritos en el paquete)"""
+    with file_lock(path):
+        manifest = read_manifest(path)
+        manifest.setdefault('exports', {})[name] = info
+        write_manifest(path, manifest)
+    return manifest
+
+
+def load_bundle(path: str, with_model: bool = True) -> ModelBundle:
+    """
+    Carga un paquete; solo importa el framework del tipo de modelo que
+    contiene. Con with_model=False no se carga el modelo (p. ej. para usar
+    un formato exportado sin TensorFlow).
+    """
+    manifest = read_manifest(path)
+    model = None
+    if with_model:
+        model = load_model_file(os.path.join(path, manifest['model_file']), manifest['model_type'])
+    return ModelBundle(model, None, list(manifest['features']), manifest, path)
+
+
+def load_legacy(model_path: str, scaler_path: Optional[str] = None,
+                features_path: Optional[str] = None) -> ModelBundle:
+    """Carga un modelo en archivos sueltos (.pkl/.h5 + scaler + características)"""
+    model_type = 'keras' if model_path.endswith('.h5') else 'sklearn'
+    model = load_model_file(model_path, model_type)
+    scaler = joblib.load(scaler_path) if scaler_path and os.path.exists(scaler_path) else None
+    features = list(joblib.load(features_path)) if features_path and os.path.exists(features_path) else []
+    manifest = {
+        'format': 0,
+        'legacy': True,
+        'model_type': model_type,
+        'model_class': f'{type(model).__module__}.{type(model).__name__}',
+        'model_file': os.path.basename(model_path),
+        'features': features,
+        'scaler': scaler_params(scaler),
+        'data_hash': None,
+        'created': datetime.fromtimestamp(os.path.getmtime(model_path)).isoformat()
+    }
+    return ModelBundle(model, scaler, features, manifest, model_path)
+
+
+def load_model_files(model_path: str, scaler_path: Optional[str] = None,
+                     features_path: Optional[str] = None, with_model: bool = True) -> ModelBundle:
+    """
+    Punto de entrada único para los servicios: model_path puede ser un
+    paquete, o un modelo suelto cuyo paquete (bundle_path) se prefiere si
+    existe. Sin paquete se cargan los archivos sueltos (siempre con el modelo).
+    """
+    for candidate in (model_path, bundle_path(model_path)):
+        if is_bundle(candidate):
+            return load_bundle(candidate, with_model=with_model)
+    if not os.path.isfile(model_path) or os.path.getsize(model_path) == 0:
+        raise FileNotFoundError(f"Modelo no encontrado: {model_path}")
+    return load_legacy(model_path, scaler_path, features_path)
+
+
+def migrate(model_path: str, scaler_path: Optional[str] = None, features_path: Optional[str] = None,
+            training_data=None) -> ModelBundle:
+    """Convierte un modelo en archivos sueltos a un paquete junto a él"""
+    legacy = load_legacy(model_path, scaler_path, features_path)
+    return save_bundle(bundle_path(model_path), legacy.model, legacy.features, legacy.scaler,
+                       training_data=training_data, model_type=legacy.model_type)
+
+
+def main():
+    """Migra los modelos sueltos a paquetes y mide la carga en frío"""
+    import subprocess
+    import sys
+    import time
+
+    print("📦 PAQUETES DE MODELO")
+    print("=" * 50)
+
+    models_dir = '../models'
+    legacy_models = [
+        ('simple_model.pkl', 'simple_model_scaler.pkl', 'simple_model_features.pkl'),
+        ('best_model.pkl', 'scaler.pkl', 'features.pkl'),
+    ]
+
+    for model_file, scaler_file, features_file in legacy_models:
+        paths = [os.path.join(models_dir, name) for name in (model_file, scaler_file, features_file)]
+        if not os.path.exists(paths[0]):
+            continue
+        bundle = migrate(*paths)
+        legacy = load_legacy(*paths)
+        reloaded = load_bundle(bundle.path)
+
+        X = np.random.default_rng(0).normal(size=(256, len(reloaded.features)))
+        same_scaler = np.array_equal(legacy.scaler.transform(X), reloaded.scaler.transform(X))
+        same_model = np.array_equal(legacy.model.predict_proba(X), reloaded.model.predict_proba(X))
+        print(f"   {model_file} → {os.path.basename(bundle.path)}: {reloaded}")
+        print(f"      scaler igual: {'✅' if same_scaler else '❌'}, predicciones iguales: {'✅' if same_model else '❌'}")
+
+        # Proceso nuevo: importar el módulo y cargar el paquete, sin TensorFlow
+        code = ("import sys, time; start = time.perf_counter(); import model_bundle; "
+                f"model_bundle.load_bundle({bundle.path!r}); "
+                "print(time.perf_counter() - start, 'tensorflow' in sys.modules)")
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        total = time.perf_counter() - start
+        if output:
+            print(f"      Carga en frío: {float(output[0])*1000:.0f}ms (proceso {total*1000:.0f}ms), "
+                  f"TensorFlow importado: {output[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,17 @@ from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping
 from sklearn.preprocessing import MinMaxScaler
 from data_processing import load_data
-from features import add_technical_indicators, get_feature_columns
-import os
+from features import get_feature_columns
+from feature_cache import cached_indicators
+from precision import get_feature_dtype
+from sequences import build_sequences
+from window_pipeline import SHUFFLE_BUFFER, WindowDataset, fit_kwargs
+from model_bundle import save_bundle
+from inference import export_numpy, export_tflite
 
 def create_sequences(data, seq_length=30):
-    X, y = [], []
-    for i in range(len(data) - seq_length - 1):
-        X.append(data[i:i+seq_length])
-        # Predicción: 1 si el precio sube, 0 si baja
-        y.append(1 if data[i+seq_length][0] > data[i+seq_length-1][0] else 0)
-    return np.array(X), np.array(y)
+    # Ventanas como vistas de solo lectura; predicción: 1 si el precio sube, 0 si baja
+    return build_sequences(data, seq_length)
 
 def main():
     print("🤖 Iniciando entrenamiento del modelo LSTM...")
@@ -23,7 +24,9 @@ def main():
     df = load_data('../data/price_data.csv')
     print(f"   Datos cargados: {len(df)} registros")
     
-    df = add_technical_indicators(df)
+    # float32 opcional (model.dtype en config.json): la mitad de memoria
+    dtype = get_feature_dtype()
+    df = cached_indicators(df, get_feature_columns(), dtype=dtype)
     print("   Indicadores técnicos calculados")
     
     # Usar características mejoradas
@@ -39,8 +42,8 @@ def main():
         print(f"   Usando {len(features)} características disponibles")
     
     scaler = MinMaxScaler()
-    data = scaler.fit_transform(df[features])
-    print(f"   Datos normalizados con {len(features)} características")
+    data = scaler.fit_transform(df[features].astype(dtype))
+    print(f"   Datos normalizados con {len(features)} características ({dtype.name})")
     
     # Crear secuencias
     print("🔄 Creando secuencias de entrenamiento...")
@@ -51,13 +54,16 @@ def main():
         print("⚠️ ADVERTENCIA: Pocos datos para entrenamiento. Se recomiendan al menos 1000 registros.")
         print("   Considera agregar más datos históricos para mejor rendimiento.")
     
-    # Dividir datos
+    # Dividir datos (por índice de muestra: las ventanas se arman por lotes al entrenar,
+    # así que la memoria escala con el tamaño del lote y no con el dataset)
     split = int(len(X) * 0.8)
-    X_train, X_test = X[:split], X[split:]
-    y_train, y_test = y[:split], y[split:]
+    samples = np.arange(len(X))
+    train_batches = WindowDataset(data, indices=samples[:split], batch_size=32,
+                                  shuffle_buffer=SHUFFLE_BUFFER, prefetch=4)
+    test_batches = WindowDataset(data, indices=samples[split:], batch_size=32, prefetch=4)
     
-    print(f"   Datos de entrenamiento: {len(X_train)} muestras")
-    print(f"   Datos de validación: {len(X_test)} muestras")
+    print(f"   Datos de entrenamiento: {len(train_batches.indices)} muestras")
+    print(f"   Datos de validación: {len(test_batches.indices)} muestras")
     
     # Crear modelo mejorado
     print("🏗️ Construyendo modelo LSTM...")
@@ -91,17 +97,17 @@ def main():
     )
     
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_test, y_test),
+        **fit_kwargs(train_batches, test_batches),
         epochs=100,
-        batch_size=32,
         callbacks=[early_stopping],
         verbose=1
     )
     
     # Evaluar modelo
     print("📊 Evaluando modelo...")
-    test_loss, test_acc, test_precision, test_recall = model.evaluate(X_test, y_test, verbose=0)
+    test_loss, test_acc, test_precision, test_recall = model.evaluate(
+        test_batches.repeat(), steps=len(test_batches), verbose=0
+    )
     print(f"   Precisión: {test_acc:.3f}")
     print(f"   Precisión (precision): {test_precision:.3f}")
     print(f"   Sensibilidad (recall): {test_recall:.3f}")
@@ -110,20 +116,19 @@ def main():
     f1_score = 2 * (test_precision * test_recall) / (test_precision + test_recall) if (test_precision + test_recall) > 0 else 0
     print(f"   F1-Score: {f1_score:.3f}")
     
-    # Guardar modelo
+    # Guardar modelo, scaler y características en un paquete con manifiesto
     print("💾 Guardando modelo...")
-    os.makedirs('../models', exist_ok=True)
-    model.save('../models/lstm_model.h5')
-    print("✅ Modelo guardado exitosamente en models/lstm_model.h5")
-    
-    # Guardar scaler para uso futuro
-    import joblib
-    joblib.dump(scaler, '../models/scaler.pkl')
-    print("✅ Scaler guardado en models/scaler.pkl")
-    
-    # Guardar lista de características
-    joblib.dump(features, '../models/features.pkl')
-    print("✅ Lista de características guardada en models/features.pkl")
+    bundle = save_bundle('../models/lstm_model.bundle', model, features, scaler,
+                         training_data=df[features], model_type='keras')
+    print("✅ Modelo, scaler y características guardados en models/lstm_model.bundle")
+    
+    # Formatos de inferencia livianos (ver inference.load_backend)
+    export_numpy(bundle)
+    try:
+        export_tflite(bundle, X.shape[1])
+        print("✅ Exportado para inferencia: numpy y TFLite")
+    except Exception as e:
+        print(f"⚠️ Exportado para inferencia: numpy (TFLite no disponible: {e})")
     
     print("🎉 Entrenamiento completado!")
     print("\n📋 Resumen del modelo:")
@@ -0,0 +1,352 @@
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from file_lock import file_lock
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'store')
+
+REQUIRED_COLUMNS = ['datetime', 'open', 'high', 'low', 'close', 'volume']
+
+# Partición usada cuando los datos no tienen columna 'symbol'
+NO_SYMBOL = '_all'
+
+# Columna interna con la posición original de cada fila en el CSV
+ROW_COLUMN = '_row'
+
+
+def _to_timestamp(value) -> Optional[pd.Timestamp]:
+    return pd.Timestamp(value) if value is not None else None
+
+
+def _read_block(f, block) -> np.ndarray:
+    """Lee y descomprime un bloque de columna [offset, longitud, dtype]"""
+    offset, length, dtype = block
+    f.seek(offset)
+    return np.frombuffer(zlib.decompress(f.read(length)), dtype=np.dtype(dtype))
+
+
+class OHLCVStore:
+    """
+    Almacén columnar de barras OHLCV particionado por símbolo y día.
+
+    Cada CSV migrado es un dataset: <raíz>/<dataset>/<símbolo>/<AAAA-MM-DD>.bin.
+    Cada partición guarda sus columnas como bloques zlib independientes; el
+    manifest.json registra el rango de fechas de cada partición y la posición
+    de cada bloque. Las lecturas abren solo las particiones del rango y los
+    símbolos pedidos, y de cada archivo descomprimen solo las columnas pedidas.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = os.path.abspath(root)
+
+    def dataset_dir(self, dataset: str) -> str:
+        return os.path.join(self.root, dataset)
+
+    def read_manifest(self, dataset: str) -> Optional[Dict]:
+        path = os.path.join(self.dataset_dir(dataset), 'manifest.json')
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def datasets(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if self.read_manifest(d) is not None)
+
+    def is_fresh(self, csv_path: str) -> bool:
+        """True si el CSV ya fue migrado y no cambió desde entonces"""
+        manifest = self.read_manifest(dataset_name(csv_path))
+        if manifest is None:
+            return False
+        if not os.path.exists(csv_path):
+            # El CSV original se puede borrar después de migrar
+            return True
+        source = manifest.get('source') or {}
+        stat = os.stat(csv_path)
+        return (source.get('path') == os.path.realpath(csv_path) and
+                source.get('size') == stat.st_size and
+                source.get('mtime') == stat.st_mtime)
+
+    def is_stale(self, csv_path: str) -> bool:
+        """True si el CSV fue migrado y cambió después (por ejemplo con dataset_updates.append_rows)"""
+        manifest = self.read_manifest(dataset_name(csv_path))
+        if manifest is None or not os.path.exists(csv_path):
+            return False
+        source = manifest.get('source') or {}
+        return source.get('path') == os.path.realpath(csv_path) and not self.is_fresh(csv_path)
+
+    def refresh(self, csv_path: str) -> bool:
+        """
+        Vuelve a migrar un CSV desactualizado. Usa el mismo bloqueo que
+        append_rows, así que no migra un archivo a medio actualizar.
+        Retorna True si el almacén quedó al día.
+        """
+        with file_lock(csv_path):
+            if self.is_fresh(csv_path):
+                return True
+            try:
+                self.import_csv(csv_path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ No se pudo migrar de nuevo {csv_path}: {e}")
+                return False
+        return True
+
+    def write(self, df: pd.DataFrame, dataset: str, source: Optional[str] = None) -> Dict:
+        """
+        Escribe df como dataset completo (reemplaza uno anterior con el mismo
+        nombre). Retorna el manifiesto escrito.
+        """
+        df = df.reset_index(drop=True)
+        missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Columnas faltantes: {missing}")
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f'.{dataset}_', dir=self.root)
+
+        columns = [c for c in df.columns if c != 'symbol']
+        timestamps = df['datetime'].to_numpy(dtype='datetime64[ns]')
+        days = timestamps.astype('datetime64[D]')
+        symbols = df['symbol'].astype(str).to_numpy() if 'symbol' in df.columns else np.full(len(df), NO_SYMBOL)
+
+        arrays = {}
+        for col in columns:
+            if col == 'datetime':
+                arrays[col] = timestamps.view('int64')
+            elif df[col].dtype == object:
+                arrays[col] = df[col].astype(str).to_numpy(dtype=str)
+            else:
+                arrays[col] = df[col].to_numpy()
+        arrays[ROW_COLUMN] = np.arange(len(df), dtype=np.int64)
+
+        partitions = {}
+        order = np.lexsort((timestamps, days, symbols))
+        keys = np.stack([symbols[order], days[order].astype(str)], axis=1)
+        boundaries = np.flatnonzero((keys[1:] != keys[:-1]).any(axis=1)) + 1
+
+        for part in np.split(order, boundaries):
+            if len(part) == 0:
+                continue
+            symbol, day = symbols[part[0]], str(days[part[0]])
+            os.makedirs(os.path.join(tmp_dir, symbol), exist_ok=True)
+
+            blocks = {}
+            offset = 0
+            with open(os.path.join(tmp_dir, symbol, f'{day}.bin'), 'wb') as f:
+                for name, values in arrays.items():
+                    chunk = np.ascontiguousarray(values[part])
+                    payload = zlib.compress(chunk.tobytes(), 6)
+                    f.write(payload)
+                    blocks[name] = [offset, len(payload), chunk.dtype.str]
+                    offset += len(payload)
+
+            partitions.setdefault(symbol, {})[day] = {
+                'rows': int(len(part)),
+                'start': int(arrays['datetime'][part].min()),
+                'end': int(arrays['datetime'][part].max()),
+                'blocks': blocks
+            }
+
+        manifest = {
+            'columns': columns,
+            'column_order': [str(c) for c in df.columns],
+            'dtypes': {c: ('object' if df[c].dtype == object else str(arrays[c].dtype)) for c in columns},
+            'has_symbol': 'symbol' in df.columns,
+            'rows': int(len(df)),
+            'partitions': partitions,
+            'created': datetime.now().isoformat()
+        }
+        if source:
+            stat = os.stat(source)
+            manifest['source'] = {'path': os.path.realpath(source), 'size': stat.st_size,
+                                  'mtime': stat.st_mtime}
+
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Reemplazo atómico del dataset completo
+        target = self.dataset_dir(dataset)
+        old_dir = None
+        if os.path.exists(target):
+            old_dir = tempfile.mkdtemp(prefix=f'.{dataset}_old_', dir=self.root)
+            os.replace(target, os.path.join(old_dir, 'data'))
+        os.replace(tmp_dir, target)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+        return manifest
+
+    def import_csv(self, csv_path: str, dataset: Optional[str] = None) -> Dict:
+        """Migra un CSV (con columna datetime o timestamp) a un dataset"""
+        df = pd.read_csv(csv_path)
+        if 'datetime' not in df.columns and 'timestamp' in df.columns:
+            df = df.rename(columns={'timestamp': 'datetime'})
+        df['datetime'] = pd.to_datetime(df['datetime'], format='mixed')
+        return self.write(df, dataset or dataset_name(csv_path), source=csv_path)
+
+    def read(self, dataset: str, start=None, end=None, symbols: Optional[List[str]] = None,
+             columns: Optional[List[str]] = None, original_order: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Lee un dataset filtrando por rango [start, end], símbolos y columnas.
+        Con original_order las filas se devuelven en el orden original del
+        CSV; si no, agrupadas por símbolo y día (orden de las particiones).
+        symbol se devuelve como categórica (códigos + nombres de símbolo).
+
+        Cada columna se reserva una vez con el tamaño final y cada partición
+        se escribe directamente en su posición: no se concatenan bloques ni
+        se reordena el resultado completo.
+        """
+        manifest = self.read_manifest(dataset)
+        if manifest is None:
+            return None
+
+        start, end = _to_timestamp(start), _to_timestamp(end)
+        start_ns = start.value if start is not None else None
+        end_ns = end.value if end is not None else None
+
+        wanted = manifest['columns'] if columns is None else [c for c in manifest['columns'] if c in columns]
+        if 'datetime' not in wanted:
+            wanted = ['datetime'] + wanted
+        add_symbol = manifest['has_symbol'] and (columns is None or 'symbol' in columns)
+        base = self.dataset_dir(dataset)
+
+        # Primera pasada: particiones del rango, filas seleccionadas y su posición en el CSV
+        selected = []
+        categories = []
+        for symbol, days in manifest['partitions'].items():
+            if symbols is not None and symbol not in symbols:
+                continue
+            for day, info in days.items():
+                if start_ns is not None and info['end'] < start_ns:
+                    continue
+                if end_ns is not None and info['start'] > end_ns:
+                    continue
+                path = os.path.join(base, symbol, f'{day}.bin')
+                mask = None
+                if ((start_ns is not None and info['start'] < start_ns) or
+                        (end_ns is not None and info['end'] > end_ns)):
+                    # Partición parcialmente dentro del rango
+                    with open(path, 'rb') as f:
+                        timestamps = _read_block(f, info['blocks']['datetime'])
+                    mask = np.ones(len(timestamps), dtype=bool)
+                    if start_ns is not None:
+                        mask &= timestamps >= start_ns
+                    if end_ns is not None:
+                        mask &= timestamps <= end_ns
+                    if not mask.any():
+                        continue
+                rows = None
+                if original_order:
+                    with open(path, 'rb') as f:
+                        rows = _read_block(f, info['blocks'][ROW_COLUMN])
+                    if mask is not None:
+                        rows = rows[mask]
+                if not categories or categories[-1] != symbol:
+                    categories.append(symbol)
+                count = info['rows'] if mask is None else int(mask.sum())
+                selected.append((path, info, mask, rows, len(categories) - 1, count))
+
+        total = sum(part[5] for part in selected)
+        if original_order and total != manifest['rows']:
+            # Lectura filtrada: posición de cada fila entre las seleccionadas
+            all_rows = np.sort(np.concatenate([part[3] for part in selected])) if selected else None
+            selected = [(path, info, mask, np.searchsorted(all_rows, rows), code, count)
+                        for path, info, mask, rows, code, count in selected]
+
+        data = {}
+        for col in wanted:
+            dtype = manifest['dtypes'][col]
+            if col == 'datetime':
+                data[col] = np.empty(total, dtype='datetime64[ns]')
+            else:
+                data[col] = np.empty(total, dtype=object if dtype == 'object' else dtype)
+        codes = None
+        if add_symbol:
+            code_dtype = np.int8 if len(categories) < 128 else np.int16 if len(categories) < 32768 else np.int32
+            codes = np.empty(total, dtype=code_dtype)
+
+        # Segunda pasada: cada partición se descomprime y se escribe en su lugar
+        offset = 0
+        for path, info, mask, positions, code, count in selected:
+            if positions is None:
+                positions = slice(offset, offset + count)
+            offset += count
+            with open(path, 'rb') as f:
+                for col in wanted:
+                    values = _read_block(f, info['blocks'][col])
+                    if mask is not None:
+                        values = values[mask]
+                    if col == 'datetime':
+                        values = values.view('datetime64[ns]')
+                    data[col][positions] = values
+            if codes is not None:
+                codes[positions] = code
+
+        if codes is not None:
+            data['symbol'] = pd.Categorical.from_codes(codes, categories=categories)
+
+        # Mismo orden de columnas que el CSV original, sin copiar las columnas otra vez
+        ordered = {c: data[c] for c in manifest['column_order'] if c in data}
+        return pd.DataFrame(ordered, copy=False)
+
+def dataset_name(path: str) -> str:
+    """Nombre del dataset para un CSV: el nombre del archivo sin extensión"""
+    return os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+
+
+def read_frame(filepath: str, start=None, end=None, symbols: Optional[List[str]] = None,
+               columns: Optional[List[str]] = None,
+               store: Optional[OHLCVStore] = None) -> Optional[pd.DataFrame]:
+    """
+    Lee barras desde el almacén si el CSV fue migrado (o si filepath es un
+    directorio de dataset); si no, desde el CSV aplicando los mismos filtros.
+    Retorna None si no existe ninguno de los dos.
+    """
+    if os.path.isdir(filepath):
+        store = OHLCVStore(os.path.dirname(os.path.normpath(filepath)))
+        return store.read(dataset_name(filepath), start, end, symbols, columns)
+
+    store = store or OHLCVStore()
+    if store.is_stale(filepath):
+        # Sin esto cada lectura volvería en silencio al CSV completo
+        print(f"⚠️ Almacén columnar desactualizado para {filepath} (el CSV cambió); migrando de nuevo")
+        store.refresh(filepath)
+    if store.is_fresh(filepath):
+        return store.read(dataset_name(filepath), start, end, symbols, columns)
+
+    if not os.path.exists(filepath):
+        return None
+
+    usecols = None
+    if columns is not None:
+        usecols = lambda c: c in columns or c in ('datetime', 'symbol')
+    df = pd.read_csv(filepath, usecols=usecols)
+
+    if symbols is not None and 'symbol' in df.columns:
+        df = df[df['symbol'].isin(symbols)]
+    if (start is not None or end is not None) and 'datetime' in df.columns:
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        if start is not None:
+            df = df[df['datetime'] >= _to_timestamp(start)]
+        if end is not None:
+            df = df[df['datetime'] <= _to_timestamp(end)]
+    if columns is not None and 'symbol' not in columns and 'symbol' in df.columns:
+        df = df.drop(columns='symbol')
+    return df.reset_index(drop=True)
+
+
+def source_exists(filepath: str, store: Optional[OHLCVStore] = None) -> bool:
+    """True si los datos están disponibles en CSV o en el almacén"""
+    return os.path.exists(filepath) or (store or OHLCVStore()).is_fresh(filepath)
@@ -9,6 +9,8 @@ from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping
+from window_pipeline import SHUFFLE_BUFFER, WindowDataset, fit_kwargs
+from model_bundle import bundle_path, save_bundle
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -29,15 +31,11 @@ class HyperparameterOptimizer:
     
     def load_data(self):
         """Carga y prepara los datos"""
-        from data_processing import load_data
-        from features import add_technical_indicators
+        from mapped_matrix import load_feature_matrix
+        from precision import get_feature_dtype
         
         print("📊 Cargando datos para optimización...")
         
-        # Cargar datos
-        self.df = load_data(self.data_path)
-        self.df = add_technical_indicators(self.df)
-        
         # Preparar características
         feature_columns = [
             'close', 'SMA_5', 'SMA_10', 'SMA_20', 'EMA_12', 'EMA_26',
@@ -45,6 +43,11 @@ class HyperparameterOptimizer:
             'Stoch_K', 'Stoch_D', 'Volume_ratio', 'Price_change', 'Volatility',
             'ATR', 'Williams_R', 'CCI'
         ]
+        self.dtype = get_feature_dtype()
+        
+        # Cargar datos e indicadores (matriz mapeada compartida entre workers)
+        self.matrix = load_feature_matrix(self.data_path, 'optimizer', feature_columns, self.dtype)
+        self.df = self.matrix.frame()
         
         # Usar solo características disponibles
         self.features = [f for f in feature_columns if f in self.df.columns]
@@ -53,24 +56,18 @@ class HyperparameterOptimizer:
         # Normalizar datos
         from sklearn.preprocessing import MinMaxScaler
         self.scaler = MinMaxScaler()
-        self.data = self.scaler.fit_transform(self.df[self.features])
+        self.data = self.scaler.fit_transform(self.matrix.select(self.features).astype(self.dtype))
         
         # Crear secuencias
         self.X, self.y = self.create_sequences(self.data)
         print(f"✅ Secuencias creadas: {len(self.X)}")
     
     def create_sequences(self, data: np.ndarray, seq_length: int = 30) -> Tuple[np.ndarray, np.ndarray]:
-        """Crea secuencias para entrenamiento"""
-        X, y = [], []
+        """Crea secuencias para entrenamiento (vistas sin copia sobre data)"""
+        from sequences import build_sequences
         
-        for i in range(len(data) - seq_length - 1):
-            X.append(data[i:i+seq_length])
-            # Etiqueta: 1 si el precio sube, 0 si baja
-            future_price = data[i+seq_length][0]
-            current_price = data[i+seq_length-1][0]
-            y.append(1 if future_price > current_price else 0)
-        
-        return np.array(X), np.array(y)
+        # Etiqueta: 1 si el precio sube, 0 si baja
+        return build_sequences(data, seq_length)
     
     def build_model(self, params: Dict) -> Sequential:
         """Construye modelo con parámetros dados"""
@@ -124,8 +121,12 @@ class HyperparameterOptimizer:
             scores = []
             
             for train_idx, val_idx in tscv.split(self.X):
-                X_train, X_val = self.X[train_idx], self.X[val_idx]
-                y_train, y_val = self.y[train_idx], self.y[val_idx]
+                # Lotes generados al vuelo desde self.data (sin copiar las ventanas del fold)
+                train_batches = WindowDataset(self.data, indices=train_idx,
+                                              batch_size=params['batch_size'],
+                                              shuffle_buffer=SHUFFLE_BUFFER)
+                val_batches = WindowDataset(self.data, indices=val_idx,
+                                            batch_size=params['batch_size'])
                 
                 # Construir modelo
                 model = self.build_model(params)
@@ -140,17 +141,15 @@ class HyperparameterOptimizer:
                 
                 # Entrenar modelo
                 history = model.fit(
-                    X_train, y_train,
-                    validation_data=(X_val, y_val),
+                    **fit_kwargs(train_batches, val_batches),
                     epochs=params['epochs'],
-                    batch_size=params['batch_size'],
                     callbacks=[early_stopping],
                     verbose=0
                 )
                 
                 # Evaluar
                 val_loss, val_acc, val_precision, val_recall = model.evaluate(
-                    X_val, y_val, verbose=0
+                    val_batches.repeat(), steps=len(val_batches), verbose=0
                 )
                 
                 # Calcular F1-Score
@@ -350,8 +349,11 @@ class HyperparameterOptimizer:
         
         # Dividir datos finales
         split_idx = int(len(self.X) * 0.8)
-        X_train, X_test = self.X[:split_idx], self.X[split_idx:]
-        y_train, y_test = self.y[:split_idx], self.y[split_idx:]
+        samples = np.arange(len(self.X))
+        batch_size = self.best_params['batch_size']
+        train_batches = WindowDataset(self.data, indices=samples[:split_idx], batch_size=batch_size,
+                                      shuffle_buffer=SHUFFLE_BUFFER)
+        test_batches = WindowDataset(self.data, indices=samples[split_idx:], batch_size=batch_size)
         
         # Construir modelo
         model = self.build_model(self.best_params)
@@ -366,17 +368,15 @@ class HyperparameterOptimizer:
         
         # Entrenar modelo
         history = model.fit(
-            X_train, y_train,
-            validation_data=(X_test, y_test),
+            **fit_kwargs(train_batches, test_batches),
             epochs=self.best_params['epochs'],
-            batch_size=self.best_params['batch_size'],
             callbacks=[early_stopping],
             verbose=1
         )
         
         # Evaluar modelo final
         test_loss, test_acc, test_precision, test_recall = model.evaluate(
-            X_test, y_test, verbose=0
+            test_batches.repeat(), steps=len(test_batches), verbose=0
         )
         
         f1_score = 2 * (test_precision * test_recall) / (test_precision + test_recall) if (test_precision + test_recall) > 0 else 0
@@ -385,17 +385,11 @@ class HyperparameterOptimizer:
         print(f"   Precisión: {test_acc:.4f}")
         print(f"   F1-Score: {f1_score:.4f}")
         
-        # Guardar modelo
-        model.save(save_path)
-        print(f"💾 Modelo guardado en: {save_path}")
-        
-        # Guardar scaler
-        scaler_path = save_path.replace('.h5', '_scaler.pkl')
-        joblib.dump(self.scaler, scaler_path)
-        
-        # Guardar características
-        features_path = save_path.replace('.h5', '_features.pkl')
-        joblib.dump(self.features, features_path)
+        # Guardar modelo, scaler y características en un paquete
+        path = bundle_path(save_path)
+        save_bundle(path, model, self.features, self.scaler, training_data=self.data,
+                    extra={'params': self.best_params})
+        print(f"💾 Modelo guardado en: {path}")
         
         return model
 
@@ -0,0 +1,169 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from trade_engine import long_only_metrics, simulate_long_only
+
+# Por debajo de esta cantidad de puntos el costo de lanzar procesos supera la ganancia
+MIN_PARALLEL_POINTS = 16
+
+# Columnas de ranking: (métrica, mayor es mejor)
+RANKING = (('total_return_pct', True), ('sharpe_ratio', True), ('max_drawdown', False))
+
+# Arrays del proceso hijo, adjuntados una vez por el inicializador del pool
+_ARRAYS: Dict[str, np.ndarray] = {}
+_BLOCKS: List[shared_memory.SharedMemory] = []
+
+
+class SharedArrays:
+    """
+    Copia arrays a bloques de memoria compartida (multiprocessing.shared_memory)
+    para que los procesos del pool los lean sin serializarlos. specs describe
+    cada bloque (nombre, forma, dtype) y es lo único que viaja a los hijos.
+    Usar como context manager: al salir se liberan los bloques.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.specs: Dict[str, Dict] = {}
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.specs[key] = {'name': block.name, 'shape': array.shape, 'dtype': array.dtype.str}
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self) -> 'SharedArrays':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(specs: Dict[str, Dict]) -> Dict[str, np.ndarray]:
+    """Vistas de solo lectura sobre los bloques compartidos de un SharedArrays"""
+    arrays = {}
+    for key, spec in specs.items():
+        # Los hijos del pool comparten el resource_tracker del padre, que libera el bloque
+        block = shared_memory.SharedMemory(name=spec['name'])
+        _BLOCKS.append(block)
+        array = np.ndarray(spec['shape'], dtype=np.dtype(spec['dtype']), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[key] = array
+    return arrays
+
+
+def _init_worker(specs: Dict[str, Dict]):
+    _ARRAYS.update(attach(specs))
+
+
+def _run_point(point: Dict) -> Dict:
+    """Simula un punto de la grilla sobre los arrays compartidos (en un proceso hijo)"""
+    return evaluate_point(_ARRAYS, point)
+
+
+def evaluate_point(arrays: Dict[str, np.ndarray], point: Dict) -> Dict:
+    """Métricas de simulate_long_only para un umbral / tamaño de posición / comisión"""
+    result = simulate_long_only(arrays['close'], arrays['signal'], arrays['confidence'],
+                                point['initial_balance'], point['commission'], point['position_size'],
+                                point['confidence_threshold'])
+    metrics = long_only_metrics(result, point['initial_balance'])
+    return {**{key: point[key] for key in ('confidence_threshold', 'position_size', 'commission')}, **metrics}
+
+
+def rank_results(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ordena por el promedio de las posiciones en retorno, Sharpe y drawdown
+    (1 = mejor en cada una); los empates se resuelven por retorno.
+    """
+    if results.empty:
+        return results
+    ranks = [results[column].rank(ascending=not higher, method='min') for column, higher in RANKING]
+    results = results.assign(rank_score=sum(ranks) / len(ranks))
+    results = results.sort_values(['rank_score', 'total_return_pct'], ascending=[True, False], kind='stable')
+    results.insert(0, 'rank', np.arange(1, len(results) + 1))
+    return results.reset_index(drop=True)
+
+
+def sweep(close: np.ndarray, signal: np.ndarray, confidence: np.ndarray,
+          thresholds: Iterable[float], position_sizes: Iterable[float], commissions: Iterable[float],
+          initial_balance: float = 10000, n_jobs: Optional[int] = None) -> pd.DataFrame:
+    """
+    Evalúa la simulación de AdvancedBacktester en la grilla umbral x tamaño
+    de posición x comisión sobre predicciones ya calculadas. Los arrays se
+    pasan a un pool de procesos por memoria compartida y cada proceso recibe
+    solo los parámetros de sus puntos. n_jobs=1 (o una grilla pequeña)
+    ejecuta en el proceso actual. Retorna la tabla ordenada por rank_results.
+    """
+    arrays = {
+        'close': np.asarray(close, dtype=np.float64),
+        'signal': np.asarray(signal),
+        'confidence': np.asarray(confidence, dtype=np.float64)
+    }
+    points = [{'confidence_threshold': t, 'position_size': p, 'commission': c, 'initial_balance': initial_balance}
+              for t, p, c in itertools.product(thresholds, position_sizes, commissions)]
+
+    workers = min(n_jobs or os.cpu_count() or 1, len(points))
+    if workers > 1 and len(points) >= MIN_PARALLEL_POINTS:
+        with SharedArrays(arrays) as shared:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shared.specs,)) as executor:
+                chunksize = max(1, len(points) // (workers * 4))
+                rows = list(executor.map(_run_point, points, chunksize=chunksize))
+    else:
+        rows = [evaluate_point(arrays, point) for point in points]
+
+    return rank_results(pd.DataFrame(rows))
+
+
+def main():
+    """Barrido secuencial y en paralelo sobre predicciones sintéticas"""
+    import time
+
+    print("🧪 BARRIDO DE PARÁMETROS")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    bars = 100_000
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, bars))
+    probabilities = np.clip(0.5 + rng.normal(0, 0.2, bars), 0, 1)
+    signal = np.where(probabilities > 0.5, 1, -1).astype(np.int8)
+    confidence = np.abs(probabilities - 0.5) * 2
+
+    grid = {
+        'thresholds': np.round(np.arange(0.3, 0.95, 0.05), 2),
+        'position_sizes': [0.02, 0.05, 0.1, 0.2],
+        'commissions': [0.0, 0.0005, 0.001]
+    }
+    points = len(grid['thresholds']) * len(grid['position_sizes']) * len(grid['commissions'])
+
+    start = time.perf_counter()
+    sequential = sweep(close, signal, confidence, n_jobs=1, **grid)
+    sequential_time = time.perf_counter() - start
+
+    workers = max(os.cpu_count() or 1, 2)
+    start = time.perf_counter()
+    parallel = sweep(close, signal, confidence, n_jobs=workers, **grid)
+    parallel_time = time.perf_counter() - start
+
+    print(f"   {points} puntos sobre {bars:,} barras")
+    print(f"   Secuencial: {sequential_time:.2f}s | pool de {workers} procesos ({os.cpu_count()} núcleos): "
+          f"{parallel_time:.2f}s")
+    print(f"   Resultados idénticos: {'✅' if sequential.equals(parallel) else '❌'}")
+    print(parallel.head(5)[['rank', 'confidence_threshold', 'position_size', 'commission',
+                            'total_return_pct', 'sharpe_ratio', 'max_drawdown', 'trades']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
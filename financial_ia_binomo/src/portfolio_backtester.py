@@ -0,0 +1,523 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from risk_manager import RiskManager
+from trade_engine import SIGNAL_BUY, SIGNAL_HOLD, SIGNAL_SELL, equity_returns, max_drawdown, sharpe_ratio
+
+# Por debajo de esta cantidad de barras (todos los símbolos) lanzar procesos no compensa
+MIN_PARALLEL_BARS = 5000
+
+# Motivos por los que se descarta una entrada
+REJECT_REASONS = ('risk', 'daily_trades', 'exposure', 'cash')
+
+# Backtester del proceso hijo, con el modelo cargado una vez por el inicializador del pool
+_WORKER = {}
+
+
+def risk_manager_from_config(config: Dict, initial_balance: Optional[float] = None) -> RiskManager:
+    """RiskManager con los límites de trading y risk_management de config.json"""
+    trading = config.get('trading', {})
+    risk = config.get('risk_management', {})
+    manager = RiskManager(initial_balance=initial_balance or trading.get('initial_balance', 10000))
+    manager.max_position_size = trading.get('max_position_size', manager.max_position_size)
+    manager.min_confidence = trading.get('min_confidence', manager.min_confidence)
+    manager.max_daily_loss = trading.get('max_daily_loss', manager.max_daily_loss)
+    manager.max_drawdown_limit = risk.get('max_drawdown', manager.max_drawdown_limit)
+    manager.max_consecutive_losses = risk.get('max_consecutive_losses', manager.max_consecutive_losses)
+    return manager
+
+
+def split_symbols(data: pd.DataFrame, symbols: Optional[List[str]] = None,
+                  symbol_column: str = 'symbol') -> Dict[str, pd.DataFrame]:
+    """Una serie por símbolo (ordenada por fecha) de un DataFrame con varios instrumentos"""
+    frames = {}
+    for symbol, part in data.groupby(symbol_column, sort=False, observed=True):
+        if symbols is None or symbol in symbols:
+            frames[symbol] = part.sort_values('datetime', kind='stable').reset_index(drop=True)
+    if symbols is not None:
+        frames = {symbol: frames[symbol] for symbol in symbols if symbol in frames}
+    return frames
+
+
+def symbol_signals(backtester, frame: pd.DataFrame, seq_length: int = 30, batch_size: int = 1024) -> Dict:
+    """Señal, confianza, cierre y fecha de cada barra operable de un símbolo (AdvancedBacktester.bar_signals)"""
+    df, signal, confidence, _ = backtester.bar_signals(frame, seq_length, True, batch_size)
+    return {
+        'timestamps': df['datetime'].to_numpy(dtype='datetime64[ns]')[seq_length:],
+        'close': df['close'].to_numpy(dtype=np.float64)[seq_length:],
+        'signal': signal,
+        'confidence': confidence
+    }
+
+
+def _init_worker(model: Dict):
+    from backtester import AdvancedBacktester
+    backtester = AdvancedBacktester(dtype=model['dtype'], inference_backend=model['inference_backend'])
+    backtester.load_model(model['model_path'], model['scaler_path'])
+    _WORKER['backtester'] = backtester
+
+
+def _run_symbol(args) -> Dict:
+    """Inferencia de un símbolo con el modelo del proceso hijo"""
+    frame, seq_length, batch_size = args
+    return symbol_signals(_WORKER['backtester'], frame, seq_length, batch_size)
+
+
+def align_symbols(signals: Dict[str, Dict]) -> Dict:
+    """
+    Reloj común: la unión ordenada de las fechas de todos los símbolos.
+    Retorna 'clock' y arrays (reloj x símbolos): 'close' (NaN donde el
+    símbolo no tiene barra), 'signal' (HOLD sin barra) y 'confidence'.
+    """
+    symbols = list(signals)
+    clock = np.unique(np.concatenate([signals[s]['timestamps'] for s in symbols])) if symbols \
+        else np.array([], dtype='datetime64[ns]')
+    close = np.full((len(clock), len(symbols)), np.nan)
+    signal = np.full((len(clock), len(symbols)), SIGNAL_HOLD, dtype=np.int8)
+    confidence = np.zeros((len(clock), len(symbols)))
+    for column, symbol in enumerate(symbols):
+        rows = np.searchsorted(clock, signals[symbol]['timestamps'])
+        close[rows, column] = signals[symbol]['close']
+        signal[rows, column] = signals[symbol]['signal']
+        confidence[rows, column] = signals[symbol]['confidence']
+    return {'symbols': symbols, 'clock': clock, 'close': close, 'signal': signal, 'confidence': confidence}
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Último valor conocido por columna (NaN antes de la primera barra)"""
+    rows = np.where(np.isnan(values), -1, np.arange(len(values))[:, None])
+    rows = np.maximum.accumulate(rows, axis=0)
+    filled = np.take_along_axis(values, np.maximum(rows, 0), axis=0)
+    return np.where(rows >= 0, filled, np.nan)
+
+
+def _state_per_tick(event_tick: np.ndarray, values: np.ndarray, n_ticks: int, initial: float) -> np.ndarray:
+    """Valor tras el último evento de cada tick (initial antes del primero)"""
+    state = np.searchsorted(event_tick, np.arange(n_ticks), side='right') - 1
+    return np.where(state >= 0, values[np.maximum(state, 0)] if len(values) else initial, initial)
+
+
+def simulate_portfolio(clock: np.ndarray, close: np.ndarray, signal: np.ndarray, confidence: np.ndarray,
+                       risk_manager: RiskManager, commission: float = 0.001,
+                       confidence_threshold: float = 0.6, max_total_exposure: float = 1.0,
+                       max_daily_trades: Optional[int] = None, close_at_end: bool = True) -> Dict:
+    """
+    Un solo bucle de eventos sobre el reloj común con capital compartido:
+    una posición larga por símbolo, BUY abre y SELL cierra (solo señales
+    con confianza >= confidence_threshold). Cada entrada pasa por el
+    RiskManager del libro completo (check_risk_limits: confianza,
+    drawdown, pérdida diaria, pérdidas consecutivas; tamaño por
+    calculate_position_size, acotado por max_position_size del balance del
+    libro), por max_daily_trades entradas por día entre todos los símbolos,
+    por max_total_exposure (valor de entrada de las posiciones abiertas
+    sobre el balance del libro) y por el efectivo disponible. Cada cierre
+    actualiza el RiskManager con el P&L neto de ambas comisiones; sus
+    métricas diarias se reinician al cambiar de día en el reloj.
+
+    El bucle solo visita los ticks con alguna señal activa; efectivo,
+    posiciones y equity por tick se rellenan después a partir de los
+    eventos. Con close_at_end las posiciones abiertas se cierran al último
+    precio de su símbolo, fuera de las curvas (como simulate_long_only).
+
+    Retorna arrays por tick ('cash', 'equity', 'drawdown'), por tick y
+    símbolo ('shares', 'exposure', 'symbol_equity': P&L acumulado de cada
+    símbolo), arrays por operación y 'final_balance'.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    confidence = np.asarray(confidence, dtype=np.float64)
+    n_ticks, n_symbols = close.shape
+    initial_balance = float(risk_manager.current_balance)
+    active = (signal != SIGNAL_HOLD) & (confidence >= confidence_threshold) & ~np.isnan(close)
+    days = np.asarray(clock).astype('datetime64[D]')
+
+    cash = initial_balance
+    shares = [0.0] * n_symbols
+    basis = [0.0] * n_symbols      # valor de entrada + comisión de la posición abierta
+    entry_value = [0.0] * n_symbols
+    realized = [0.0] * n_symbols
+    open_trade = [-1] * n_symbols
+    open_exposure = 0.0
+    rejected = dict.fromkeys(REJECT_REASONS, 0)
+    events = {key: [] for key in ('tick', 'symbol', 'shares', 'basis', 'realized', 'cash')}
+    trades = {key: [] for key in ('trade_symbol', 'entry_tick', 'exit_tick', 'trade_shares', 'entry_price',
+                                  'exit_price', 'entry_value', 'entry_commission', 'exit_value',
+                                  'exit_commission', 'profit', 'trade_confidence', 'closed_at_end')}
+
+    def close_position(s: int, tick: int, price: float, at_end: bool = False):
+        nonlocal cash, open_exposure
+        value = shares[s] * price
+        fee = value * commission
+        profit = value - fee - basis[s]
+        cash += value - fee
+        realized[s] += profit
+        open_exposure -= entry_value[s]
+        k = open_trade[s]
+        trades['exit_tick'][k], trades['exit_price'][k] = tick, price
+        trades['exit_value'][k], trades['exit_commission'][k] = value, fee
+        trades['profit'][k], trades['closed_at_end'][k] = profit, at_end
+        shares[s], basis[s], entry_value[s], open_trade[s] = 0.0, 0.0, 0.0, -1
+        risk_manager.update_risk_metrics({'profit': profit})
+
+    current_day = None
+    daily_trades = 0
+    for t in np.flatnonzero(active.any(axis=1)).tolist():
+        if days[t] != current_day:
+            current_day = days[t]
+            daily_trades = 0
+            risk_manager.reset_daily_metrics()
+        for s in np.flatnonzero(active[t]).tolist():
+            price = float(close[t, s])
+            if signal[t, s] == SIGNAL_SELL:
+                if open_trade[s] < 0:
+                    continue
+                close_position(s, t, price)
+            else:
+                if open_trade[s] >= 0:
+                    continue
+                conf = float(confidence[t, s])
+                if max_daily_trades is not None and daily_trades >= max_daily_trades:
+                    rejected['daily_trades'] += 1
+                    continue
+                check = risk_manager.check_risk_limits('BUY', conf, price)
+                position_shares = check['position_info']['shares']
+                if not check['can_trade'] or position_shares <= 0:
+                    rejected['risk'] += 1
+                    continue
+                value = position_shares * price
+                fee = value * commission
+                if open_exposure + value > max_total_exposure * risk_manager.current_balance:
+                    rejected['exposure'] += 1
+                    continue
+                if value + fee > cash:
+                    rejected['cash'] += 1
+                    continue
+                cash -= value + fee
+                open_exposure += value
+                shares[s], basis[s], entry_value[s] = position_shares, value + fee, value
+                open_trade[s] = len(trades['entry_tick'])
+                daily_trades += 1
+                for key, item in (('trade_symbol', s), ('entry_tick', t), ('trade_shares', position_shares),
+                                  ('entry_price', price), ('entry_value', value), ('entry_commission', fee),
+                                  ('trade_confidence', conf), ('exit_tick', -1), ('exit_price', np.nan),
+                                  ('exit_value', np.nan), ('exit_commission', np.nan), ('profit', np.nan),
+                                  ('closed_at_end', False)):
+                    trades[key].append(item)
+            for key, item in (('tick', t), ('symbol', s), ('shares', shares[s]), ('basis', basis[s]),
+                              ('realized', realized[s]), ('cash', cash)):
+                events[key].append(item)
+
+    # Estado por tick a partir de los eventos (ordenados por tick)
+    event_tick = np.asarray(events['tick'], dtype=np.int64)
+    event_symbol = np.asarray(events['symbol'], dtype=np.int64)
+    tick_cash = _state_per_tick(event_tick, np.asarray(events['cash']), n_ticks, initial_balance)
+    mark = forward_fill(close)
+    tick_shares = np.zeros((n_ticks, n_symbols))
+    symbol_equity = np.zeros((n_ticks, n_symbols))
+    for s in range(n_symbols):
+        mask = event_symbol == s
+        ticks = event_tick[mask]
+        tick_shares[:, s] = _state_per_tick(ticks, np.asarray(events['shares'])[mask], n_ticks, 0.0)
+        open_basis = _state_per_tick(ticks, np.asarray(events['basis'])[mask], n_ticks, 0.0)
+        closed_pnl = _state_per_tick(ticks, np.asarray(events['realized'])[mask], n_ticks, 0.0)
+        symbol_equity[:, s] = closed_pnl - open_basis
+    exposure = np.where(tick_shares > 0, tick_shares * np.nan_to_num(mark), 0.0)
+    symbol_equity += exposure
+    equity = tick_cash + exposure.sum(axis=1)
+
+    if close_at_end:
+        for s in range(n_symbols):
+            if open_trade[s] >= 0:
+                last = int(np.flatnonzero(~np.isnan(close[:, s]))[-1])
+                close_position(s, last, float(close[last, s]), at_end=True)
+
+    peak = np.maximum.accumulate(np.maximum(equity, initial_balance))
+    return {
+        'cash': tick_cash,
+        'equity': equity,
+        'drawdown': (peak - equity) / peak,
+        'shares': tick_shares,
+        'exposure': exposure,
+        'symbol_equity': symbol_equity,
+        'trade_symbol': np.asarray(trades['trade_symbol'], dtype=np.int64),
+        'entry_tick': np.asarray(trades['entry_tick'], dtype=np.int64),
+        'exit_tick': np.asarray(trades['exit_tick'], dtype=np.int64),
+        'closed_at_end': np.asarray(trades['closed_at_end'], dtype=bool),
+        **{key: np.asarray(values, dtype=np.float64) for key, values in trades.items()
+           if key not in ('trade_symbol', 'entry_tick', 'exit_tick', 'closed_at_end')},
+        'rejected': rejected,
+        'final_balance': cash
+    }
+
+
+def portfolio_metrics(result: Dict, symbols: List[str], initial_balance: float) -> Dict:
+    """Resumen del libro y P&L por símbolo de simulate_portfolio"""
+    profit = result['profit'][~np.isnan(result['profit'])]
+    trades = len(result['entry_tick'])
+    winning = int(np.sum(profit > 0))
+    final_balance = result['final_balance']
+    per_symbol = {}
+    for s, symbol in enumerate(symbols):
+        mask = result['trade_symbol'] == s
+        per_symbol[symbol] = {
+            'trades': int(np.sum(mask)),
+            'profit': float(np.nansum(result['profit'][mask])),
+            'max_exposure': float(np.max(result['exposure'][:, s], initial=0.0))
+        }
+    return {
+        'trades': trades,
+        'winning_trades': winning,
+        'losing_trades': int(np.sum(profit < 0)),
+        'win_rate': winning / trades if trades else 0,
+        'total_profit': float(np.sum(profit)),
+        'final_balance': final_balance,
+        'total_return_pct': (final_balance / initial_balance - 1) * 100,
+        'max_drawdown': max_drawdown(result['equity'], initial_balance),
+        'sharpe_ratio': sharpe_ratio(equity_returns(result['equity'])),
+        'max_gross_exposure': float(np.max(result['exposure'].sum(axis=1), initial=0.0)),
+        'rejected_entries': dict(result['rejected']),
+        'per_symbol': per_symbol
+    }
+
+
+def portfolio_trades(result: Dict, symbols: List[str], clock: np.ndarray) -> pd.DataFrame:
+    """Tabla de operaciones del libro (se materializa solo al final)"""
+    clock = pd.DatetimeIndex(clock)
+    entry, exit_ = result['entry_tick'], result['exit_tick']
+    closed = exit_ >= 0
+    return pd.DataFrame({
+        'symbol': [symbols[s] for s in result['trade_symbol'].tolist()],
+        'entry_time': clock.take(entry),
+        'exit_time': clock.take(np.where(closed, exit_, entry)).where(closed),
+        'entry_price': result['entry_price'],
+        'exit_price': result['exit_price'],
+        'shares': result['trade_shares'],
+        'value': result['entry_value'],
+        'commission': result['entry_commission'] + np.nan_to_num(result['exit_commission']),
+        'profit': result['profit'],
+        'confidence': result['trade_confidence'],
+        'closed_at_end': result['closed_at_end']
+    })
+
+
+class PortfolioBacktester:
+    """
+    Backtest de varios símbolos con capital compartido: la inferencia de
+    cada símbolo corre en un proceso del pool (cada proceso carga el
+    modelo una vez), las series se alinean en un reloj común y un solo
+    bucle de eventos aplica capital, límites de exposición y el
+    RiskManager al libro completo (ver simulate_portfolio).
+    """
+
+    def __init__(self, config: Optional[Dict] = None, symbols: Optional[List[str]] = None,
+                 initial_balance: Optional[float] = None, commission: Optional[float] = None,
+                 max_total_exposure: float = 1.0, dtype=None, inference_backend: str = 'auto'):
+        self.config = config or {}
+        backtesting = self.config.get('backtesting', {})
+        self.symbols = symbols or self.config.get('data', {}).get('symbols')
+        self.initial_balance = initial_balance or backtesting.get('initial_balance', 10000)
+        self.commission = commission if commission is not None else backtesting.get('commission', 0.001)
+        self.max_daily_trades = self.config.get('trading', {}).get('max_daily_trades')
+        self.max_total_exposure = max_total_exposure
+        self.dtype = dtype
+        self.inference_backend = inference_backend
+        self.model_spec = None
+        self.backtester = None
+        self.risk_manager = None
+
+    def load_model(self, model_path: str, scaler_path: str = None):
+        """Modelo para la inferencia: se carga aquí y en cada proceso del pool"""
+        from backtester import AdvancedBacktester
+        self.model_spec = {'model_path': model_path, 'scaler_path': scaler_path,
+                           'dtype': self.dtype, 'inference_backend': self.inference_backend}
+        self.backtester = AdvancedBacktester(dtype=self.dtype, inference_backend=self.inference_backend)
+        self.backtester.load_model(model_path, scaler_path)
+
+    def predict_symbols(self, frames: Dict[str, pd.DataFrame], seq_length: int = 30,
+                        batch_size: int = 1024, n_jobs: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Señales de cada símbolo: en paralelo (un símbolo por tarea) si hay
+        varios procesos y datos suficientes; si no, en el proceso actual.
+        """
+        symbols = list(frames)
+        workers = min(n_jobs or os.cpu_count() or 1, len(symbols))
+        total_bars = sum(len(frame) for frame in frames.values())
+        tasks = [(frames[symbol], seq_length, batch_size) for symbol in symbols]
+        if workers > 1 and total_bars >= MIN_PARALLEL_BARS and self.model_spec is not None:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.model_spec,)) as executor:
+                results = list(executor.map(_run_symbol, tasks))
+        else:
+            results = [symbol_signals(self.backtester, *task) for task in tasks]
+        return dict(zip(symbols, results))
+
+    def run_backtest(self, data: Union[pd.DataFrame, Dict[str, pd.DataFrame]], seq_length: int = 30,
+                     confidence_threshold: float = 0.6, batch_size: int = 1024,
+                     n_jobs: Optional[int] = None) -> Dict:
+        """
+        Ejecuta el backtest del libro. data es un DataFrame con columna
+        'symbol' o un dict símbolo -> DataFrame. Retorna el reloj, las
+        curvas como arrays ('equity' del libro, 'symbol_equity' y
+        'exposure' por símbolo en columnas), operaciones y métricas.
+        """
+        print("🔄 Iniciando backtest de portafolio...")
+        frames = data if isinstance(data, dict) else split_symbols(data, self.symbols)
+        signals = self.predict_symbols(frames, seq_length, batch_size, n_jobs)
+        aligned = align_symbols(signals)
+        return self.simulate(aligned, confidence_threshold)
+
+    def simulate(self, aligned: Dict, confidence_threshold: float = 0.6) -> Dict:
+        """Bucle de eventos sobre señales ya alineadas (ver align_symbols)"""
+        self.risk_manager = risk_manager_from_config(self.config, self.initial_balance)
+        symbols = aligned['symbols']
+        print(f"   Símbolos: {', '.join(symbols)} | {len(aligned['clock']):,} ticks en el reloj común")
+        print(f"   Balance inicial: ${self.initial_balance:,.2f}")
+
+        result = simulate_portfolio(aligned['clock'], aligned['close'], aligned['signal'], aligned['confidence'],
+                                    self.risk_manager, self.commission, confidence_threshold,
+                                    self.max_total_exposure, self.max_daily_trades)
+        metrics = portfolio_metrics(result, symbols, self.initial_balance)
+
+        print(f"✅ Backtest de portafolio completado!")
+        print(f"   Operaciones: {metrics['trades']} | descartadas: {metrics['rejected_entries']}")
+        print(f"   Balance final: ${metrics['final_balance']:,.2f} ({metrics['total_return_pct']:.2f}%)")
+        print(f"   Drawdown máximo: {metrics['max_drawdown']*100:.2f}% | "
+              f"trading permitido: {self.risk_manager.trading_allowed}")
+
+        return {
+            'symbols': symbols,
+            'clock': aligned['clock'],
+            'equity': result['equity'],
+            'cash': result['cash'],
+            'symbol_equity': result['symbol_equity'],
+            'exposure': result['exposure'],
+            'drawdown': result['drawdown'],
+            'trades': portfolio_trades(result, symbols, aligned['clock']),
+            'metrics': metrics,
+            'risk_status': self.risk_manager.get_risk_status()
+        }
+
+
+def _reference_portfolio(aligned: Dict, risk_manager: RiskManager, commission: float,
+                         confidence_threshold: float, max_total_exposure: float,
+                         max_daily_trades: Optional[int]) -> Dict:
+    """
+    Referencia ingenua de simulate_portfolio: recorre todos los ticks y
+    símbolos y calcula efectivo, equity y P&L por símbolo en cada tick, sin
+    eventos ni relleno posterior. Solo sirve para validar el bucle de eventos.
+    """
+    close, signal, confidence = aligned['close'], aligned['signal'], aligned['confidence']
+    n_ticks, n_symbols = close.shape
+    days = np.asarray(aligned['clock']).astype('datetime64[D]')
+    cash = float(risk_manager.current_balance)
+    shares, basis, entry_value, realized = (np.zeros(n_symbols) for _ in range(4))
+    last_price = np.zeros(n_symbols)
+    cash_curve, equity_curve, symbol_curve, profits = [], [], [], []
+    current_day, daily_trades = None, 0
+    for t in range(n_ticks):
+        for s in range(n_symbols):
+            price = close[t, s]
+            if np.isnan(price):
+                continue
+            last_price[s] = price
+            if signal[t, s] == SIGNAL_HOLD or confidence[t, s] < confidence_threshold:
+                continue
+            if days[t] != current_day:
+                current_day, daily_trades = days[t], 0
+                risk_manager.reset_daily_metrics()
+            if signal[t, s] == SIGNAL_SELL and shares[s] > 0:
+                value = shares[s] * price
+                profit = value - value * commission - basis[s]
+                cash += value - value * commission
+                realized[s] += profit
+                profits.append(profit)
+                shares[s] = basis[s] = entry_value[s] = 0.0
+                risk_manager.update_risk_metrics({'profit': profit})
+            elif signal[t, s] == SIGNAL_BUY and shares[s] == 0:
+                if max_daily_trades is not None and daily_trades >= max_daily_trades:
+                    continue
+                check = risk_manager.check_risk_limits('BUY', float(confidence[t, s]), float(price))
+                position_shares = check['position_info']['shares']
+                if not check['can_trade'] or position_shares <= 0:
+                    continue
+                value = position_shares * price
+                fee = value * commission
+                if entry_value.sum() + value > max_total_exposure * risk_manager.current_balance or value + fee > cash:
+                    continue
+                cash -= value + fee
+                shares[s], basis[s], entry_value[s] = position_shares, value + fee, value
+                daily_trades += 1
+        held = shares * last_price
+        cash_curve.append(cash)
+        equity_curve.append(cash + held.sum())
+        symbol_curve.append(realized - basis + held)
+    return {'cash': np.array(cash_curve), 'equity': np.array(equity_curve),
+            'symbol_equity': np.array(symbol_curve), 'profit': np.array(profits)}
+
+
+def main():
+    """Backtest de portafolio sobre señales sintéticas de los símbolos de config.json"""
+    import json
+    import time
+
+    print("📚 BACKTEST DE PORTAFOLIO")
+    print("=" * 50)
+
+    config_path = '../config.json'
+    config = json.load(open(config_path)) if os.path.exists(config_path) else {}
+    symbols = config.get('data', {}).get('symbols', ['EURUSD', 'GBPUSD', 'USDJPY', 'BTCUSD', 'ETHUSD'])
+
+    # Series con relojes distintos (huecos aleatorios), tramos de tendencia y señales que los detectan con ruido
+    rng = np.random.default_rng(0)
+    minutes = pd.date_range('2024-01-01', periods=20_000, freq='1min').to_numpy()
+    signals = {}
+    for symbol in symbols:
+        timestamps = np.sort(rng.choice(minutes, size=15_000, replace=False))
+        trend = np.repeat(rng.choice([-1.0, 1.0], size=len(timestamps) // 500 + 1), 500)[:len(timestamps)]
+        close = 100 * np.exp(np.cumsum(rng.normal(5e-5 * trend, 5e-4)))
+        probabilities = np.clip(0.5 + 0.3 * trend + rng.normal(0, 0.15, len(close)), 0, 1)
+        signals[symbol] = {'timestamps': timestamps, 'close': close,
+                           'signal': np.where(probabilities > 0.5, SIGNAL_BUY, SIGNAL_SELL).astype(np.int8),
+                           'confidence': np.abs(probabilities - 0.5) * 2}
+
+    backtester = PortfolioBacktester(config, symbols)
+    aligned = align_symbols(signals)
+    start = time.perf_counter()
+    results = backtester.simulate(aligned, confidence_threshold=0.6)
+    seconds = time.perf_counter() - start
+
+    # Referencia: bucle ingenuo por tick con su propio RiskManager (sin cierre al final)
+    reference_risk = risk_manager_from_config(config, backtester.initial_balance)
+    start = time.perf_counter()
+    reference = _reference_portfolio(aligned, reference_risk, backtester.commission, 0.6,
+                                     backtester.max_total_exposure, backtester.max_daily_trades)
+    reference_seconds = time.perf_counter() - start
+    closed = results['trades'][~results['trades']['closed_at_end']]
+    checks = {
+        'efectivo': np.allclose(results['cash'], reference['cash']),
+        'equity': np.allclose(results['equity'], reference['equity']),
+        'equity por símbolo': np.allclose(results['symbol_equity'], reference['symbol_equity']),
+        'P&L por operación': np.allclose(np.sort(closed['profit'].to_numpy()), np.sort(reference['profit'])),
+    }
+    # El libro cierra las posiciones abiertas al final: el RiskManager suma esos P&L
+    at_end = results['trades'].loc[results['trades']['closed_at_end'], 'profit'].sum()
+    checks['balance del RiskManager'] = np.isclose(results['risk_status']['current_balance'],
+                                                   reference_risk.current_balance + at_end)
+
+    equity, symbol_equity = results['equity'], results['symbol_equity']
+    consistent = np.allclose(equity - backtester.initial_balance, symbol_equity.sum(axis=1))
+    print(f"   {len(results['clock']):,} ticks x {len(symbols)} símbolos en {seconds*1000:.0f}ms")
+    print(f"   Equity del libro = balance inicial + suma de P&L por símbolo: {'✅' if consistent else '❌'}")
+    print(f"   Contra el bucle ingenuo por tick ({reference_seconds*1000:.0f}ms): "
+          + ", ".join(f"{name} {'✅' if ok else '❌'}" for name, ok in checks.items()))
+    exposure = results['exposure'].sum(axis=1) / equity
+    print(f"   Exposición bruta máxima: {exposure.max()*100:.1f}% del equity")
+    for symbol, stats in results['metrics']['per_symbol'].items():
+        print(f"      {symbol}: {stats['trades']} operaciones, P&L ${stats['profit']:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
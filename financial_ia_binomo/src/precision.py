@@ -0,0 +1,135 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+
+# float64 es el modo por defecto; float32 es opcional (model.dtype en config.json)
+SUPPORTED_DTYPES = ('float64', 'float32')
+
+
+def get_feature_dtype(dtype=None) -> np.dtype:
+    """
+    Tipo de las matrices de características: el explícito si se pasa, si no
+    'model.dtype' de config.json, y float64 por defecto.
+    """
+    if dtype is None:
+        try:
+            with open(CONFIG_PATH, 'r') as f:
+                dtype = json.load(f).get('model', {}).get('dtype')
+        except (OSError, ValueError):
+            dtype = None
+
+    dtype = np.dtype(dtype or 'float64')
+    if dtype.name not in SUPPORTED_DTYPES:
+        raise ValueError(f"dtype no soportado: {dtype.name} (usar {', '.join(SUPPORTED_DTYPES)})")
+    return dtype
+
+
+def cast_columns(df: pd.DataFrame, columns: List[str], dtype=None) -> pd.DataFrame:
+    """Convierte las columnas numéricas indicadas al dtype de características"""
+    dtype = get_feature_dtype(dtype)
+    columns = [c for c in columns if c in df.columns and df[c].dtype != dtype]
+    if columns:
+        df[columns] = df[columns].astype(dtype)
+    return df
+
+
+def _nbytes(*arrays) -> int:
+    return sum(a.nbytes for a in arrays)
+
+
+def compare_dtypes(df: pd.DataFrame, features: List[str], seq_length: int = 30,
+                   repeats: int = 3) -> Dict[str, Dict]:
+    """
+    Mide memoria y tiempo de la cadena indicadores -> MinMaxScaler ->
+    secuencias -> entrada del modelo en float64 y float32.
+    La entrada del modelo se aproxima con una proyección densa de 128
+    unidades (la primera operación de la capa LSTM sobre cada secuencia).
+    build_sequences retorna una vista sin copia, así que 'sequence_bytes'
+    es la memoria real (datos escalados + etiquetas) y 'materialized_bytes'
+    lo que ocuparían las ventanas copiadas; la copia para la entrada del
+    modelo se hace fuera de la medición de tiempo.
+    """
+    import time
+    from sklearn.preprocessing import MinMaxScaler
+    from features import add_technical_indicators
+    from sequences import build_sequences
+
+    rng = np.random.default_rng(0)
+    report = {}
+
+    for name in SUPPORTED_DTYPES:
+        dtype = np.dtype(name)
+        timings = {'indicators': [], 'scaling': [], 'sequences': [], 'model_input': []}
+
+        for _ in range(repeats):
+            start = time.perf_counter()
+            frame = add_technical_indicators(df.copy(), features, dtype=dtype)
+            timings['indicators'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            scaled = MinMaxScaler().fit_transform(frame[features].astype(dtype))
+            timings['scaling'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            X, y = build_sequences(scaled, seq_length)
+            timings['sequences'].append(time.perf_counter() - start)
+
+            weights = rng.standard_normal((X.shape[2], 128)).astype(dtype)
+            windows = np.ascontiguousarray(X)
+            start = time.perf_counter()
+            windows.reshape(-1, X.shape[2]) @ weights
+            timings['model_input'].append(time.perf_counter() - start)
+
+        report[name] = {
+            'frame_bytes': int(frame[features].memory_usage(index=False, deep=True).sum()),
+            'scaled_bytes': _nbytes(scaled),
+            'sequence_bytes': _nbytes(scaled, y),
+            'materialized_bytes': _nbytes(windows),
+            'seconds': {k: min(v) for k, v in timings.items()},
+            'scaled': scaled
+        }
+
+    difference = np.abs(report['float32']['scaled'].astype(np.float64) - report['float64']['scaled'])
+    for name in SUPPORTED_DTYPES:
+        del report[name]['scaled']
+    report['max_abs_difference'] = float(np.nanmax(difference))
+    return report
+
+
+def main():
+    """Reporte de memoria y rendimiento float64 vs float32"""
+    from data_processing import load_data
+    from features import get_feature_columns
+
+    print("🧮 COMPARACIÓN FLOAT64 / FLOAT32")
+    print("=" * 50)
+
+    df = load_data('../data/extracted_data_20250625_214110.csv')
+    if df is None:
+        return
+    if 'symbol' in df.columns:
+        df = df[df['symbol'] == df['symbol'].iloc[0]].reset_index(drop=True)
+
+    report = compare_dtypes(df, get_feature_columns())
+    base, compact = report['float64'], report['float32']
+
+    print(f"\n📦 Memoria (float64 → float32):")
+    for key, label in [('frame_bytes', 'Características'), ('scaled_bytes', 'Datos escalados'),
+                       ('sequence_bytes', 'Secuencias LSTM (vista + etiquetas)'),
+                       ('materialized_bytes', 'Secuencias LSTM copiadas (entrada del modelo)')]:
+        print(f"   {label}: {base[key] / 1e6:.1f}MB → {compact[key] / 1e6:.1f}MB "
+              f"({base[key] / compact[key]:.1f}x)")
+
+    print(f"\n⏱️ Tiempo (float64 → float32):")
+    for key, seconds in base['seconds'].items():
+        print(f"   {key}: {seconds*1000:.1f}ms → {compact['seconds'][key]*1000:.1f}ms")
+
+    print(f"\n🎯 Diferencia máxima en datos escalados: {report['max_abs_difference']:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+FOREST_FILE = 'forest.npz'
+
+# Claves enteras que ordenan los floats igual que sus valores (sin NaN)
+_KEY_TYPES = {np.dtype(np.float64): np.int64, np.dtype(np.float32): np.int32}
+
+
+def _to_keys(values: np.ndarray) -> np.ndarray:
+    bits = values.view(_KEY_TYPES[values.dtype])
+    return np.where(bits >= 0, bits, -(bits & np.iinfo(bits.dtype).max) - 1)
+
+
+def _from_keys(keys: np.ndarray, dtype) -> np.ndarray:
+    int_type = _KEY_TYPES[np.dtype(dtype)]
+    keys = keys.astype(int_type)
+    bits = np.where(keys >= 0, keys, (-(keys + 1)) | np.array(np.iinfo(int_type).min, dtype=int_type))
+    return bits.view(dtype)
+
+
+def _fold_thresholds(thresholds: np.ndarray, transform, dtype) -> np.ndarray:
+    """
+    Para cada umbral T busca (bisección sobre los floats finitos de `dtype`,
+    que es lo que aceptan los scalers) el mayor x con transform(x) <= T, con
+    transform no decreciente. Así transform(x) <= T equivale exactamente a
+    x <= resultado. Si ningún x cumple se retorna NaN (x <= NaN es siempre
+    falso); si todos cumplen, +inf.
+    """
+    largest = np.finfo(dtype).max
+    limits = np.array([-largest, largest], dtype=dtype)
+    lo = np.full(len(thresholds), _to_keys(limits)[0])
+    hi = np.full(len(thresholds), _to_keys(limits)[1])
+    lo_ok = transform(np.full(len(thresholds), -largest, dtype=dtype)) <= thresholds
+    hi_ok = transform(np.full(len(thresholds), largest, dtype=dtype)) <= thresholds
+
+    active = lo_ok & ~hi_ok
+    while True:
+        pending = active & (hi > lo + 1)
+        if not pending.any():
+            break
+        # Punto medio sin desbordes: las claves cubren casi todo el rango entero
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        ok = transform(_from_keys(mid, dtype)) <= thresholds
+        lo = np.where(pending & ok, mid, lo)
+        hi = np.where(pending & ~ok, mid, hi)
+
+    folded = _from_keys(lo, dtype).astype(np.float64)
+    folded[~lo_ok] = np.nan
+    folded[hi_ok] = np.inf
+    return folded
+
+
+class CompiledForest:
+    """
+    RandomForestClassifier aplanado en arrays contiguos de nodos, con el
+    scaler (cualquiera que transforme cada característica por separado y de
+    forma monótona, p. ej. MinMaxScaler o StandardScaler) incorporado en los
+    umbrales: predict_proba recibe las características sin escalar.
+
+    Reproduce bit a bit scaler.transform + model.predict_proba de sklearn
+    (con n_jobs=1; con varios hilos sklearn suma los árboles en orden
+    variable): el escalado y el paso a float32 de sklearn se resuelven al
+    compilar buscando el umbral exacto sobre la entrada cruda, los árboles
+    se suman en orden y los NaN siguen missing_go_to_left.
+
+    Los nodos de cada nivel están numerados de forma que el hijo izquierdo
+    es base + 1 y el derecho base; las hojas apuntan a sí mismas con umbral
+    NaN. Así un paso del recorrido es next = base + (x <= umbral) para todas
+    las filas y árboles a la vez, durante max_depth pasos.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, base: np.ndarray,
+                 missing_left: np.ndarray, values: np.ndarray, n_trees: int, max_depth: int,
+                 classes: np.ndarray, n_features: int, sign: np.ndarray, input_dtype='float64'):
+        self.feature = feature
+        self.threshold = threshold
+        self.base = base
+        self.missing_left = missing_left
+        self.values = values
+        self.n_trees = int(n_trees)
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.sign = sign
+        self.flipped = bool(np.any(sign < 0))
+        self.input_dtype = np.dtype(input_dtype)
+        self.roots = np.arange(self.n_trees)
+
+    @classmethod
+    def compile(cls, model, scaler=None, input_dtype=np.float64) -> 'CompiledForest':
+        """Compila un RandomForestClassifier ajustado (y su scaler, si lo hay)"""
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Solo se soportan bosques de una salida")
+        input_dtype = np.dtype(input_dtype)
+        n_features = int(model.n_features_in_)
+        n_classes = len(model.classes_)
+        trees = [estimator.tree_ for estimator in model.estimators_]
+
+        total = sum(tree.node_count for tree in trees)
+        feature = np.zeros(total, dtype=np.intp)
+        raw_threshold = np.full(total, np.nan)
+        base = np.zeros(total, dtype=np.intp)
+        missing_left = np.zeros(total, dtype=bool)
+        values = np.zeros((total, n_classes))
+
+        # Raíces en 0..n_trees-1; cada nodo interno reserva dos posiciones seguidas
+        # (derecho, izquierdo) para sus hijos
+        next_free = len(trees)
+        for t, tree in enumerate(trees):
+            left, right = tree.children_left, tree.children_right
+            missing = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+            leaf_values = tree.value[:, 0, :n_classes]
+            pending = [(0, t)]
+            while pending:
+                node, slot = pending.pop()
+                if left[node] == -1:
+                    base[slot] = slot
+                    values[slot] = leaf_values[node]
+                    continue
+                feature[slot] = tree.feature[node]
+                raw_threshold[slot] = tree.threshold[node]
+                missing_left[slot] = bool(missing[node])
+                base[slot] = next_free
+                pending.append((right[node], next_free))
+                pending.append((left[node], next_free + 1))
+                next_free += 2
+
+        # Umbrales sobre la entrada cruda: sklearn compara float32(scaler.transform(x)) <= T
+        sign = np.ones(n_features)
+        threshold = raw_threshold.copy()
+        internal = ~np.isnan(raw_threshold)
+        for f in range(n_features):
+            nodes = np.flatnonzero(internal & (feature == f))
+            if len(nodes) == 0:
+                continue
+
+            def transform(column, f=f, s=1.0):
+                if scaler is None:
+                    return (column * s).astype(np.float32)
+                rows = np.zeros((len(column), n_features), dtype=input_dtype)
+                rows[:, f] = column * s
+                return scaler.transform(rows)[:, f].astype(np.float32)
+
+            probe = transform(np.array([-1e6, 1e6], dtype=input_dtype))
+            if probe[0] > probe[1]:
+                # Transformación decreciente: se compara -x
+                sign[f] = -1.0
+            unique, inverse = np.unique(raw_threshold[nodes], return_inverse=True)
+            with np.errstate(over='ignore', invalid='ignore'):
+                folded = _fold_thresholds(unique, lambda column: transform(column, s=sign[f]), input_dtype)
+            threshold[nodes] = folded[inverse]
+
+        max_depth = max(tree.max_depth for tree in trees)
+        return cls(feature, threshold, base, missing_left, values, len(trees), max_depth,
+                   np.asarray(model.classes_), n_features, sign, input_dtype)
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Hoja alcanzada por cada fila en cada árbol (filas x árboles)"""
+        # Índices planos: más rápido que X[filas, columnas]
+        flat = np.ascontiguousarray(X).ravel()
+        offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        if np.isnan(X).any():
+            for _ in range(self.max_depth):
+                x = flat[offsets + self.feature[nodes]]
+                go_left = np.where(np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes])
+                nodes = self.base[nodes] + go_left
+            return nodes
+        for _ in range(self.max_depth):
+            nodes = self.base[nodes] + (flat[offsets + self.feature[nodes]] <= self.threshold[nodes])
+        return nodes
+
+    def _prepare(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} características, llegaron {X.shape[1]}")
+        return X * self.sign if self.flipped else X
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Probabilidades por clase para filas sin escalar"""
+        leaves = self._leaves(self._prepare(X))
+        # cumsum suma los árboles en orden, igual que la acumulación de sklearn
+        proba = np.cumsum(self.values[leaves.T], axis=0)[-1]
+        proba /= self.n_trees
+        return proba
+
+    def predict_proba_one(self, x) -> np.ndarray:
+        """Una fila: recorrido escalar por nivel sobre los árboles"""
+        x = self._prepare(x)[0]
+        if np.isnan(x).any():
+            return self.predict_proba(x)[0]
+        nodes = self.roots
+        feature, threshold, base = self.feature, self.threshold, self.base
+        for _ in range(self.max_depth):
+            nodes = base[nodes] + (x[feature[nodes]] <= threshold[nodes])
+        proba = np.cumsum(self.values[nodes], axis=0)[-1]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path: str):
+        np.savez(path, feature=self.feature, threshold=self.threshold, base=self.base,
+                 missing_left=self.missing_left, values=self.values, classes=self.classes_,
+                 sign=self.sign, meta=np.array([self.n_trees, self.max_depth, self.n_features_in_]),
+                 input_dtype=np.array(self.input_dtype.name))
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledForest':
+        with np.load(path, allow_pickle=False) as data:
+            n_trees, max_depth, n_features = (int(v) for v in data['meta'])
+            return cls(data['feature'], data['threshold'], data['base'], data['missing_left'],
+                       data['values'], n_trees, max_depth, data['classes'], n_features,
+                       data['sign'], str(data['input_dtype']))
+
+
+def is_compilable(model) -> bool:
+    """True para RandomForestClassifier/ExtraTreesClassifier (promedio de árboles)"""
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    return isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)) and model.n_outputs_ == 1
+
+
+def export_forest(bundle, input_dtype=np.float64) -> Optional[Dict]:
+    """
+    Compila el bosque de un paquete (con su scaler) y lo guarda como
+    forest.npz; retorna None si el modelo no es un bosque compilable.
+    """
+    from model_bundle import add_export
+
+    if not is_compilable(bundle.load_model()):
+        return None
+    forest = CompiledForest.compile(bundle.load_model(), bundle.scaler, input_dtype)
+    forest.save(os.path.join(bundle.path, FOREST_FILE))
+    info = {'file': FOREST_FILE, 'input_dtype': forest.input_dtype.name,
+            'scaler_folded': bundle.scaler is not None}
+    bundle.manifest = add_export(bundle.path, 'forest', info)
+    return info
+
+
+def load_forest(bundle, input_dtype=None) -> Optional[CompiledForest]:
+    """Bosque compilado del paquete, o None si no se exportó (o para otro dtype de entrada)"""
+    info = bundle.exports.get('forest')
+    if info is None or (input_dtype is not None and np.dtype(input_dtype).name != info['input_dtype']):
+        return None
+    return CompiledForest.load(os.path.join(bundle.path, info['file']))
+
+
+def main():
+    """Compila los bosques guardados, verifica igualdad bit a bit y mide la latencia"""
+    import subprocess
+    import sys
+    import time
+    from model_bundle import is_bundle, load_model_files
+
+    print("🌲 COMPILADOR DE RANDOM FOREST")
+    print("=" * 50)
+
+    for model_file, scaler_file, features_file in [
+        ('simple_model.pkl', 'simple_model_scaler.pkl', 'simple_model_features.pkl'),
+        ('best_model.pkl', 'scaler.pkl', 'features.pkl'),
+    ]:
+        paths = [os.path.join('../models', name) for name in (model_file, scaler_file, features_file)]
+        if not os.path.exists(paths[0]):
+            continue
+        bundle = load_model_files(*paths)
+        model, scaler = bundle.model, bundle.scaler
+        model.set_params(n_jobs=1)
+
+        start = time.perf_counter()
+        forest = CompiledForest.compile(model, scaler)
+        compile_seconds = time.perf_counter() - start
+
+        rng = np.random.default_rng(0)
+        # Filas en el rango de entrenamiento del scaler, más extremos, NaN y valores en los umbrales
+        low = getattr(scaler, 'data_min_', np.full(forest.n_features_in_, -3.0))
+        high = getattr(scaler, 'data_max_', np.full(forest.n_features_in_, 3.0))
+        X = rng.uniform(low - 0.1 * (high - low), high + 0.1 * (high - low), (20000, forest.n_features_in_))
+        X[:50, 0] = np.nan
+        edges = forest.threshold[np.isfinite(forest.threshold)]
+        X[50:2050] = rng.choice(edges, (2000, forest.n_features_in_))
+
+        expected = model.predict_proba(scaler.transform(X))
+        actual = forest.predict_proba(X)
+        same = np.array_equal(expected, actual)
+        same_one = all(np.array_equal(forest.predict_proba_one(X[i]), expected[i]) for i in range(0, 20000, 97))
+        same_class = np.array_equal(model.predict(scaler.transform(X)), forest.predict(X))
+        print(f"   {model_file}: {forest.n_trees} árboles, {len(forest.feature):,} nodos, "
+              f"profundidad {forest.max_depth}, compilado en {compile_seconds:.1f}s")
+        print(f"      Igual bit a bit: lote {'✅' if same else '❌'}, fila {'✅' if same_one else '❌'}, "
+              f"clases {'✅' if same_class else '❌'}")
+
+        row = X[3000]
+
+        def timed(fn, calls=300):
+            for _ in range(20):
+                fn()
+            times = np.empty(calls)
+            for i in range(calls):
+                start = time.perf_counter()
+                fn()
+                times[i] = time.perf_counter() - start
+            return np.percentile(times, 50) * 1e6, np.percentile(times, 99) * 1e6
+
+        sk = timed(lambda: (model.predict_proba(scaler.transform(row.reshape(1, -1))),
+                            model.predict(scaler.transform(row.reshape(1, -1)))), calls=100)
+        one = timed(lambda: forest.predict_proba_one(row))
+        batch = timed(lambda: forest.predict_proba(X[:1000]), calls=30)
+        sk_batch = timed(lambda: model.predict_proba(scaler.transform(X[:1000])), calls=10)
+        print(f"      Una fila: sklearn (transform + predict_proba + predict) p50 {sk[0]:.0f}µs, "
+              f"compilado p50 {one[0]:.0f}µs / p99 {one[1]:.0f}µs")
+        print(f"      1000 filas: sklearn {sk_batch[0]/1000:.0f}ms, compilado {batch[0]/1000:.1f}ms")
+
+        if is_bundle(bundle.path):
+            export_forest(bundle)
+            # Proceso nuevo: cargar el paquete y el bosque compilado sin importar sklearn
+            code = ("import sys, time; start = time.perf_counter(); import model_bundle, rf_compiler; "
+                    f"b = model_bundle.load_bundle({bundle.path!r}, with_model=False); "
+                    "f = rf_compiler.load_forest(b); f.predict_proba_one([0.0] * f.n_features_in_); "
+                    "print(time.perf_counter() - start, 'sklearn' in sys.modules)")
+            output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+            if output:
+                print(f"      Exportado en {os.path.basename(bundle.path)}; carga en frío y primera predicción: "
+                      f"{float(output[0])*1000:.0f}ms, sklearn importado: {output[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+from rolling_kernels import rolling_mean, rolling_std, true_range
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -258,17 +258,19 @@ class RiskManager:
         Analiza la volatilidad del mercado para ajustar parámetros
         """
         
+        # Solo se necesita el último valor: basta con la cola de la serie
+        tail = price_data.iloc[-(window + 1):]
+        
         # Calcular volatilidad
-        returns = price_data['close'].pct_change().dropna()
-        volatility = returns.rolling(window=window).std()
-        current_volatility = volatility.iloc[-1]
+        returns = price_data['close'].iloc[-(window + 1):].pct_change().dropna()
+        if len(returns) < window:
+            # Hay NaN en la cola: usar la serie completa como antes
+            returns = price_data['close'].pct_change().dropna()
+        current_volatility = rolling_std(returns.iloc[-window:], window)[-1]
         
         # Calcular ATR
-        high_low = price_data['high'] - price_data['low']
-        high_close = np.abs(price_data['high'] - price_data['close'].shift())
-        low_close = np.abs(price_data['low'] - price_data['close'].shift())
-        true_range = np.maximum(high_low, np.maximum(high_close, low_close))
-        atr = true_range.rolling(window=window).mean().iloc[-1]
+        tr = true_range(tail['high'], tail['low'], tail['close'])
+        atr = rolling_mean(tr[-window:], window)[-1]
         
         # Determinar condiciones de mercado
         if current_volatility > 0.03:  # 3% volatilidad
@@ -0,0 +1,95 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Filas que se copian por bloque al materializar en disco
+MATERIALIZE_CHUNK = 4096
+
+
+def next_bar_labels(data: np.ndarray, seq_length: int = 30) -> np.ndarray:
+    """Etiquetas vectorizadas: 1 si el cierre (columna 0) de la barra siguiente a la ventana sube"""
+    data = np.asarray(data)
+    n = max(len(data) - seq_length - 1, 0)
+    future = data[seq_length:seq_length + n, 0]
+    current = data[seq_length - 1:seq_length - 1 + n, 0]
+    return (future > current).astype(np.int64)
+
+
+def build_sequences(data: np.ndarray, seq_length: int = 30,
+                    memmap_path: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ventanas de seq_length filas y etiquetas de la barra siguiente, con la
+    misma forma y contenido que el bucle create_sequences original
+    (len(data) - seq_length - 1 muestras).
+
+    X es una vista de solo lectura sobre data (sin copias): X[i] = data[i:i+seq_length].
+    Con memmap_path las ventanas se copian por bloques a un .npy en disco y
+    se retorna ese archivo mapeado, útil para entrenar con más datos que RAM.
+    """
+    data = np.asarray(data)
+    n = len(data) - seq_length - 1
+    if n <= 0:
+        return np.array([]), np.array([])
+
+    # sliding_window_view agrega la ventana como último eje: (muestras, columnas, seq)
+    X = sliding_window_view(data, seq_length, axis=0)[:n].swapaxes(1, 2)
+    y = next_bar_labels(data, seq_length)
+
+    if memmap_path is not None:
+        X = materialize(X, memmap_path)
+    return X, y
+
+
+def materialize(X: np.ndarray, path: str) -> np.ndarray:
+    """Copia las ventanas a un .npy por bloques y lo retorna mapeado en memoria"""
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=X.dtype, shape=X.shape)
+    for start in range(0, len(X), MATERIALIZE_CHUNK):
+        out[start:start + MATERIALIZE_CHUNK] = X[start:start + MATERIALIZE_CHUNK]
+    out.flush()
+    del out
+    return np.load(path, mmap_mode='r')
+
+
+def main():
+    """Compara el constructor por vistas con el bucle original"""
+    import os
+    import tempfile
+    import time
+
+    print("🪟 CONSTRUCTOR DE SECUENCIAS")
+    print("=" * 50)
+
+    data = np.random.default_rng(0).random((100_000, 19))
+
+    def loop(data, seq_length=30):
+        X, y = [], []
+        for i in range(len(data) - seq_length - 1):
+            X.append(data[i:i+seq_length])
+            y.append(1 if data[i+seq_length][0] > data[i+seq_length-1][0] else 0)
+        return np.array(X), np.array(y)
+
+    start = time.perf_counter()
+    X_loop, y_loop = loop(data)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    X, y = build_sequences(data)
+    view_seconds = time.perf_counter() - start
+
+    same = np.array_equal(X, X_loop) and np.array_equal(y, y_loop) and y.dtype == y_loop.dtype
+    print(f"   Bucle: {loop_seconds*1000:.0f}ms, {X_loop.nbytes / 1e6:.0f}MB")
+    print(f"   Vistas: {view_seconds*1000:.2f}ms, sin copia: {'✅' if np.shares_memory(X, data) else '❌'}")
+    print(f"   Mismos X/y: {'✅' if same else '❌'}")
+
+    path = os.path.join(tempfile.mkdtemp(prefix='sequences_'), 'X.npy')
+    start = time.perf_counter()
+    X_disk, _ = build_sequences(data, memmap_path=path)
+    print(f"   Materializado en disco: {(time.perf_counter() - start)*1000:.0f}ms, "
+          f"igual: {'✅' if np.array_equal(X_disk, X_loop) else '❌'}")
+    del X_disk
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
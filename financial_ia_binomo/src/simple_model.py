@@ -4,10 +4,12 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-import joblib
-import os
 from data_processing import load_data
-from features import add_technical_indicators, get_feature_columns
+from features import get_feature_columns
+from feature_cache import cached_indicators
+from model_bundle import bundle_path, data_hash, load_model_files, save_bundle
+from precision import get_feature_dtype
+from rf_compiler import export_forest
 
 class SimpleTradingModel:
     """
@@ -23,6 +25,7 @@ class SimpleTradingModel:
         )
         self.scaler = MinMaxScaler()
         self.features = None
+        self.data_hash = None
         self.is_trained = False
     
     def prepare_data(self, data_path):
@@ -34,11 +37,11 @@ class SimpleTradingModel:
         if df is None:
             return None
         
-        # Agregar indicadores técnicos
-        df = add_technical_indicators(df)
-        
         # Obtener características
         self.features = get_feature_columns()
+        
+        # Agregar indicadores técnicos (por símbolo, reutilizando la caché)
+        df = cached_indicators(df, self.features)
         available_features = [f for f in self.features if f in df.columns]
         
         if len(available_features) < 5:
@@ -79,6 +82,7 @@ class SimpleTradingModel:
             return False
         
         X, y, features = result
+        self.data_hash = data_hash(X)
         
         # Normalizar datos
         X_scaled = self.scaler.fit_transform(X)
@@ -132,26 +136,18 @@ class SimpleTradingModel:
         }
     
     def save_model(self, model_path):
-        """Guarda el modelo"""
+        """Guarda modelo, scaler y características en un paquete (models/x.pkl -> models/x.bundle)"""
         if not self.is_trained:
             print("❌ Modelo no entrenado")
             return False
         
         try:
-            os.makedirs(os.path.dirname(model_path), exist_ok=True)
-            
-            # Guardar modelo
-            joblib.dump(self.model, model_path)
-            
-            # Guardar scaler
-            scaler_path = model_path.replace('.pkl', '_scaler.pkl')
-            joblib.dump(self.scaler, scaler_path)
+            path = bundle_path(model_path)
+            bundle = save_bundle(path, self.model, self.features, self.scaler, training_data=self.data_hash)
+            # Versión compilada para servir predicciones sin sklearn (start_api)
+            export_forest(bundle, get_feature_dtype())
             
-            # Guardar características
-            features_path = model_path.replace('.pkl', '_features.pkl')
-            joblib.dump(self.features, features_path)
-            
-            print(f"💾 Modelo guardado en: {model_path}")
+            print(f"💾 Modelo guardado en: {path}")
             return True
             
         except Exception as e:
@@ -159,18 +155,15 @@ class SimpleTradingModel:
             return False
     
     def load_model(self, model_path):
-        """Carga el modelo"""
+        """Carga el modelo (del paquete si existe, si no de los archivos sueltos)"""
         try:
-            # Cargar modelo
-            self.model = joblib.load(model_path)
-            
-            # Cargar scaler
-            scaler_path = model_path.replace('.pkl', '_scaler.pkl')
-            self.scaler = joblib.load(scaler_path)
-            
-            # Cargar características
-            features_path = model_path.replace('.pkl', '_features.pkl')
-            self.features = joblib.load(features_path)
+            bundle = load_model_files(model_path,
+                                      model_path.replace('.pkl', '_scaler.pkl'),
+                                      model_path.replace('.pkl', '_features.pkl'))
+            self.model = bundle.model
+            self.scaler = bundle.scaler
+            self.features = bundle.features
+            self.data_hash = bundle.manifest.get('data_hash')
             
             self.is_trained = True
             print(f"✅ Modelo cargado desde: {model_path}")
@@ -0,0 +1,220 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from inference import NumpyLSTM, load_network, lstm_step
+
+
+def _to_ns(timestamps) -> np.ndarray:
+    return np.asarray(timestamps).astype('datetime64[ns]').view('int64')
+
+
+class _SymbolState:
+    __slots__ = ('states', 'last_ns', 'steps', 'prediction')
+
+    def __init__(self, states: List, last_ns: Optional[int], prediction: float):
+        self.states = states
+        self.last_ns = last_ns
+        self.steps = 0
+        self.prediction = prediction
+
+
+class StatefulLSTM:
+    """
+    Inferencia incremental del LSTM de model_train: guarda por símbolo el
+    estado (h, c) de cada capa LSTM y avanza un paso por barra nueva, en
+    lugar de recorrer las seq_length barras de la ventana en cada llamada.
+
+    El estado se reconstruye desde la ventana (desde estado cero, igual que
+    en el entrenamiento) la primera vez, tras un reinicio, cuando la última
+    barra procesada ya no está en la ventana, cuando hay un salto entre
+    barras mayor que max_gap_seconds y cada refresh_every pasos. Entre
+    reconstrucciones el estado arrastra historia anterior a la ventana, así
+    que la predicción se aparta algo de la del modelo con la ventana
+    completa; esa diferencia se mide en cada reconstrucción periódica y
+    queda en `drift`. refresh_every=None desactiva la reconstrucción periódica.
+    """
+
+    def __init__(self, network: NumpyLSTM, seq_length: int = 30, refresh_every: Optional[int] = 30,
+                 max_gap_seconds: Optional[float] = None):
+        lstm_count = 0
+        while lstm_count < len(network.layers) and network.layers[lstm_count]['type'] == 'lstm':
+            lstm_count += 1
+        self.lstm_layers = network.layers[:lstm_count]
+        self.head = network.layers[lstm_count:]
+        if not self.lstm_layers or any(l['type'] == 'lstm' for l in self.head):
+            raise ValueError("Se espera un bloque de capas LSTM seguido de capas Dense")
+        if any(not l['return_sequences'] for l in self.lstm_layers[:-1]):
+            raise ValueError("Las capas LSTM intermedias deben tener return_sequences=True")
+
+        self.dtype = network.dtype
+        self.seq_length = seq_length
+        self.refresh_every = refresh_every
+        self.max_gap_ns = int(max_gap_seconds * 1e9) if max_gap_seconds is not None else None
+        self._symbols: Dict[str, _SymbolState] = {}
+        self.drift: Dict[str, float] = {}
+        self.stats = {'steps': 0, 'rebuilds': 0}
+
+    def _head(self, h: np.ndarray) -> float:
+        x = h
+        for layer in self.head:
+            x = x @ layer['kernel']
+            if layer['bias'] is not None:
+                x = x + layer['bias']
+            x = layer['fn'](x)
+        return float(x.reshape(-1)[0])
+
+    def _run_window(self, window: np.ndarray):
+        """Recorre la ventana desde estado cero; retorna (estados finales, predicción)"""
+        x = np.asarray(window, dtype=self.dtype)[None]
+        states = []
+        for layer in self.lstm_layers:
+            units = layer['units']
+            projected = x @ layer['kernel']
+            if layer['bias'] is not None:
+                projected += layer['bias']
+            h = np.zeros((1, units), dtype=self.dtype)
+            c = np.zeros((1, units), dtype=self.dtype)
+            outputs = np.empty((1, projected.shape[1], units), dtype=self.dtype)
+            for t in range(projected.shape[1]):
+                h, c = lstm_step(projected[:, t], h, c, layer['recurrent'], layer['fn'], layer['recurrent_fn'])
+                outputs[:, t] = h
+            states.append((h, c))
+            x = outputs
+        return states, self._head(states[-1][0])
+
+    def _advance(self, states: List, row: np.ndarray) -> float:
+        """Avanza un paso todas las capas con una barra nueva (modifica states)"""
+        x = np.asarray(row, dtype=self.dtype).reshape(1, -1)
+        for i, layer in enumerate(self.lstm_layers):
+            z_input = x @ layer['kernel']
+            if layer['bias'] is not None:
+                z_input += layer['bias']
+            h, c = lstm_step(z_input, states[i][0], states[i][1], layer['recurrent'],
+                             layer['fn'], layer['recurrent_fn'])
+            states[i] = (h, c)
+            x = h
+        self.stats['steps'] += 1
+        return self._head(x)
+
+    def reset(self, symbol: Optional[str] = None):
+        """Descarta el estado de un símbolo (o de todos)"""
+        if symbol is None:
+            self._symbols.clear()
+        else:
+            self._symbols.pop(symbol, None)
+
+    def rebuild(self, symbol: str, window: np.ndarray, last_timestamp=None) -> float:
+        """Reconstruye el estado del símbolo con las últimas seq_length filas de window"""
+        states, prediction = self._run_window(window[-self.seq_length:])
+        last_ns = int(_to_ns([last_timestamp])[0]) if last_timestamp is not None else None
+        self._symbols[symbol] = _SymbolState(states, last_ns, prediction)
+        self.stats['rebuilds'] += 1
+        return prediction
+
+    def step(self, symbol: str, row: np.ndarray, timestamp=None) -> float:
+        """Avanza el estado del símbolo con una barra nueva (requiere un rebuild previo)"""
+        state = self._symbols[symbol]
+        state.prediction = self._advance(state.states, row)
+        state.steps += 1
+        if timestamp is not None:
+            state.last_ns = int(_to_ns([timestamp])[0])
+        return state.prediction
+
+    def predict(self, symbol: str, window: np.ndarray, timestamps) -> float:
+        """
+        Probabilidad de subida para la última barra de window (filas ya
+        escaladas, al menos seq_length) con sus timestamps: avanza solo por
+        las barras posteriores a la última procesada o reconstruye si hace falta.
+        """
+        if len(window) < self.seq_length:
+            raise ValueError(f"Se necesitan al menos {self.seq_length} barras")
+        ns = _to_ns(timestamps)
+        state = self._symbols.get(symbol)
+
+        position = -1
+        if state is not None and state.last_ns is not None:
+            position = int(np.searchsorted(ns, state.last_ns))
+            if position >= len(ns) or ns[position] != state.last_ns:
+                position = -1
+        if position < 0:
+            # Primera llamada, reinicio o hueco mayor que la ventana
+            return self.rebuild(symbol, window, ns[-1])
+
+        new_rows = range(position + 1, len(ns))
+        if not new_rows:
+            return state.prediction
+        if self.max_gap_ns is not None and np.any(np.diff(ns[position:]) > self.max_gap_ns):
+            return self.rebuild(symbol, window, ns[-1])
+
+        for i in new_rows:
+            self.step(symbol, window[i], ns[i])
+        if self.refresh_every is not None and state.steps >= self.refresh_every:
+            stateful = state.prediction
+            exact = self.rebuild(symbol, window, ns[-1])
+            self.drift[symbol] = abs(stateful - exact)
+            return exact
+        return state.prediction
+
+
+def from_bundle(bundle, **kwargs) -> StatefulLSTM:
+    """
+    StatefulLSTM con los pesos de un paquete Keras (inference.load_network:
+    exportación numpy o modelo Keras), sea cual sea el backend de servicio.
+    """
+    return StatefulLSTM(load_network(bundle), **kwargs)
+
+
+def main():
+    """Compara la inferencia incremental con la ventana completa barra a barra"""
+    import time
+    from inference import NumpyBackend, random_network
+
+    print("🔁 LSTM INCREMENTAL")
+    print("=" * 50)
+
+    seq_length, n_features, bars = 30, 19, 600
+    network = random_network(n_features)
+    backend = NumpyBackend(network)
+    rng = np.random.default_rng(1)
+    features = rng.random((bars, n_features)).astype(np.float32)
+    timestamps = np.arange(bars).astype('datetime64[m]')
+
+    full, full_seconds = [], 0.0
+    for end in range(seq_length, bars + 1):
+        start = time.perf_counter()
+        full.append(backend.predict_one(features[end - seq_length:end]))
+        full_seconds += time.perf_counter() - start
+    full = np.array(full)
+    per_bar = full_seconds / len(full)
+    print(f"   Ventana completa: {per_bar*1e6:.0f}µs por barra")
+
+    for refresh_every in (None, seq_length):
+        model = StatefulLSTM(network, seq_length, refresh_every=refresh_every, max_gap_seconds=120)
+        predictions, seconds = [], 0.0
+        for end in range(seq_length, bars + 1):
+            start = time.perf_counter()
+            predictions.append(model.predict('EURUSD', features[end - seq_length:end], timestamps[end - seq_length:end]))
+            seconds += time.perf_counter() - start
+        predictions = np.array(predictions)
+        label = 'sin refresco' if refresh_every is None else f'refresco cada {refresh_every}'
+        print(f"   Incremental ({label}): {seconds / len(predictions)*1e6:.0f}µs por barra "
+              f"(x{per_bar / (seconds / len(predictions)):.1f}), pasos {model.stats['steps']}, "
+              f"reconstrucciones {model.stats['rebuilds']}")
+        print(f"      Primera predicción exacta: {'✅' if predictions[0] == full[0] else '❌'}, "
+              f"diferencia media con la ventana {np.mean(np.abs(predictions - full)):.2e}, "
+              f"máx. {np.max(np.abs(predictions - full)):.2e}")
+
+    # Un hueco mayor que max_gap_seconds obliga a reconstruir
+    model = StatefulLSTM(network, seq_length, max_gap_seconds=120)
+    model.predict('EURUSD', features[:seq_length], timestamps[:seq_length])
+    shifted = timestamps.copy()
+    shifted[seq_length:] += np.timedelta64(10, 'm')
+    after_gap = model.predict('EURUSD', features[1:seq_length + 1], shifted[1:seq_length + 1])
+    exact = backend.predict_one(features[1:seq_length + 1])
+    print(f"   Tras un hueco de 10 minutos se reconstruye: {'✅' if after_gap == exact else '❌'} "
+          f"({model.stats['rebuilds']} reconstrucciones)")
+
+
+if __name__ == "__main__":
+    main()
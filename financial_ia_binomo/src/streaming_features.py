@@ -0,0 +1,506 @@
+import copy
+import math
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from features import add_technical_indicators
+
+# Columnas que agrega add_technical_indicators, en el mismo orden
+INDICATOR_COLUMNS = [
+    'SMA_5', 'SMA_10', 'SMA_20',
+    'EMA_12', 'EMA_26',
+    'MACD', 'MACD_signal', 'MACD_histogram',
+    'RSI_14',
+    'BB_middle', 'BB_upper', 'BB_lower', 'BB_width',
+    'Stoch_K', 'Stoch_D',
+    'Volume_SMA', 'Volume_ratio',
+    'Price_change', 'Price_change_5', 'Volatility',
+    'ATR', 'Williams_R', 'CCI'
+]
+
+# Columnas que el motor puede entregar (indicadores + precios de la barra)
+STREAM_COLUMNS = INDICATOR_COLUMNS + ['open', 'high', 'low', 'close', 'volume']
+
+NAN = float('nan')
+
+
+def _div(a: float, b: float) -> float:
+    """División con la semántica de pandas (x/0 -> ±inf, 0/0 -> NaN)"""
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class _RollingMean:
+    """
+    Media móvil con suma acumulada (O(1) por barra).
+    Igual que pandas con min_periods=window: NaN si falta algún valor en la ventana.
+    La suma se resincroniza cada `window` barras para acotar el error acumulado.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.nan_count = 0
+        self._since_sync = 0
+
+    def push(self, x: float) -> float:
+        self.values.append(x)
+        if x != x:
+            self.nan_count += 1
+        else:
+            self.total += x
+
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old != old:
+                self.nan_count -= 1
+            else:
+                self.total -= old
+
+        self._since_sync += 1
+        if self._since_sync >= self.window:
+            self.total = math.fsum(v for v in self.values if v == v)
+            self._since_sync = 0
+
+        if len(self.values) < self.window or self.nan_count:
+            return NAN
+        return self.total / self.window
+
+
+class _RollingStd:
+    """
+    Desviación estándar móvil (ddof=1) con Welford de alta/baja (O(1) por barra).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.nan_count = 0
+        self._since_sync = 0
+
+    def _add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, x: float):
+        self.count -= 1
+        if self.count == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (x - self.mean)
+
+    def _resync(self):
+        valid = [v for v in self.values if v == v]
+        self.count = len(valid)
+        self.mean = math.fsum(valid) / self.count if valid else 0.0
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in valid)
+
+    def push(self, x: float) -> float:
+        self.values.append(x)
+        if x != x:
+            self.nan_count += 1
+        else:
+            self._add(x)
+
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old != old:
+                self.nan_count -= 1
+            else:
+                self._remove(old)
+
+        self._since_sync += 1
+        if self._since_sync >= self.window:
+            self._resync()
+            self._since_sync = 0
+
+        if len(self.values) < self.window or self.nan_count:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / (self.window - 1))
+
+
+class _RollingExtreme:
+    """
+    Mínimo o máximo móvil con deque monótono (O(1) amortizado por barra).
+    """
+
+    def __init__(self, window: int, mode: str = 'min'):
+        self.window = window
+        self.is_min = mode == 'min'
+        self.candidates = deque()  # (índice, valor)
+        self.index = -1
+        self.last_nan = -1
+
+    def push(self, x: float) -> float:
+        self.index += 1
+        if x != x:
+            self.last_nan = self.index
+        else:
+            if self.is_min:
+                while self.candidates and self.candidates[-1][1] >= x:
+                    self.candidates.pop()
+            else:
+                while self.candidates and self.candidates[-1][1] <= x:
+                    self.candidates.pop()
+            self.candidates.append((self.index, x))
+
+        while self.candidates and self.candidates[0][0] <= self.index - self.window:
+            self.candidates.popleft()
+
+        if self.index < self.window - 1 or self.last_nan > self.index - self.window:
+            return NAN
+        return self.candidates[0][1]
+
+
+class _EWM:
+    """
+    Media exponencial con adjust=True, misma recurrencia que pandas ewm(span).mean()
+    """
+
+    def __init__(self, span: int):
+        self.decay = 1.0 - 2.0 / (span + 1.0)
+        self.weighted = NAN
+        self.old_wt = 0.0
+
+    def push(self, x: float) -> float:
+        if self.weighted != self.weighted:
+            if x == x:
+                self.weighted = x
+                self.old_wt = 1.0
+            return self.weighted
+
+        self.old_wt *= self.decay
+        if x == x:
+            if self.weighted != x:
+                self.weighted = (self.old_wt * self.weighted + x) / (self.old_wt + 1.0)
+            self.old_wt += 1.0
+        return self.weighted
+
+
+class StreamingIndicatorEngine:
+    """
+    Motor incremental de indicadores técnicos.
+
+    Mantiene el estado de cada indicador (sumas móviles, EMAs, deques de
+    mínimos/máximos) y actualiza todas las columnas de add_technical_indicators
+    con cada barra nueva en tiempo constante, sin recalcular el histórico.
+    A diferencia de la versión batch no rellena hacia atrás (bfill): mientras
+    las ventanas no están completas los valores son NaN (ver is_ready).
+    """
+
+    # Barras necesarias para que todas las ventanas estén completas
+    WARMUP_BARS = 21
+
+    def __init__(self, history: int = 0):
+        self.history = history
+        self.reset()
+
+    def reset(self):
+        """Reinicia todo el estado del motor"""
+        self.bars_seen = 0
+        self.last_timestamp = None
+        self.last_values: Dict[str, float] = {}
+        self.rows = deque(maxlen=self.history) if self.history else None
+        self._checkpoint = None
+
+        self._prev_close = NAN
+        self._closes = deque(maxlen=6)
+
+        self._sma_5 = _RollingMean(5)
+        self._sma_10 = _RollingMean(10)
+        self._sma_20 = _RollingMean(20)
+        self._bb_std = _RollingStd(20)
+        self._ema_12 = _EWM(12)
+        self._ema_26 = _EWM(26)
+        self._macd_signal = _EWM(9)
+        self._gain = _RollingMean(14)
+        self._loss = _RollingMean(14)
+        self._low_min = _RollingExtreme(14, 'min')
+        self._high_max = _RollingExtreme(14, 'max')
+        self._stoch_d = _RollingMean(3)
+        self._volume_sma = _RollingMean(20)
+        self._volatility = _RollingStd(20)
+        self._atr = _RollingMean(14)
+        self._tp_sma = _RollingMean(20)
+        self._tp_window = deque(maxlen=20)
+
+    @property
+    def is_ready(self) -> bool:
+        """True cuando todas las ventanas están completas"""
+        return self.bars_seen >= self.WARMUP_BARS
+
+    def update(self, bar, timestamp=None) -> Dict[str, float]:
+        """
+        Procesa una barra nueva (dict o fila con high, low, close y volume)
+        y retorna los valores actuales de todos los indicadores
+        """
+        return self.update_values(
+            float(bar['high']), float(bar['low']),
+            float(bar['close']), float(bar['volume']),
+            timestamp, float(bar['open']) if 'open' in bar else NAN
+        )
+
+    def update_values(self, high: float, low: float, close: float,
+                      volume: float, timestamp=None, open_price: float = NAN) -> Dict[str, float]:
+        """Versión de update con valores escalares"""
+        prev_close = self._prev_close
+        self._closes.append(close)
+
+        # Medias móviles
+        sma_5 = self._sma_5.push(close)
+        sma_10 = self._sma_10.push(close)
+        sma_20 = self._sma_20.push(close)
+        ema_12 = self._ema_12.push(close)
+        ema_26 = self._ema_26.push(close)
+
+        # MACD
+        macd = ema_12 - ema_26
+        macd_signal = self._macd_signal.push(macd)
+
+        # RSI
+        delta = close - prev_close
+        if delta == delta:
+            gain = self._gain.push(max(delta, 0.0))
+            loss = self._loss.push(-min(delta, 0.0))
+        else:
+            gain = self._gain.push(NAN)
+            loss = self._loss.push(NAN)
+        rs = _div(gain, loss)
+        rsi = 100 - _div(100, 1 + rs)
+
+        # Bandas de Bollinger
+        bb_std = self._bb_std.push(close)
+        bb_upper = sma_20 + bb_std * 2
+        bb_lower = sma_20 - bb_std * 2
+
+        # Estocástico y Williams %R comparten el mínimo/máximo de 14 barras
+        low_min = self._low_min.push(low)
+        high_max = self._high_max.push(high)
+        stoch_k = 100 * _div(close - low_min, high_max - low_min)
+        stoch_d = self._stoch_d.push(stoch_k)
+        williams_r = -100 * _div(high_max - close, high_max - low_min)
+
+        # Volumen
+        volume_sma = self._volume_sma.push(volume)
+
+        # Momentum y volatilidad
+        price_change = _div(close - prev_close, prev_close)
+        if len(self._closes) == 6:
+            price_change_5 = _div(close - self._closes[0], self._closes[0])
+        else:
+            price_change_5 = NAN
+        volatility = self._volatility.push(price_change)
+
+        # ATR
+        if prev_close == prev_close:
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        else:
+            true_range = NAN
+        atr = self._atr.push(true_range)
+
+        # CCI (la desviación media es O(ventana), constante respecto al histórico)
+        typical_price = (high + low + close) / 3
+        self._tp_window.append(typical_price)
+        sma_tp = self._tp_sma.push(typical_price)
+        if sma_tp == sma_tp:
+            window_mean = math.fsum(self._tp_window) / len(self._tp_window)
+            mad = math.fsum(abs(v - window_mean) for v in self._tp_window) / len(self._tp_window)
+            cci = _div(typical_price - sma_tp, 0.015 * mad)
+        else:
+            cci = NAN
+
+        self._prev_close = close
+        self.bars_seen += 1
+        self.last_timestamp = timestamp
+
+        values = {
+            'SMA_5': sma_5,
+            'SMA_10': sma_10,
+            'SMA_20': sma_20,
+            'EMA_12': ema_12,
+            'EMA_26': ema_26,
+            'MACD': macd,
+            'MACD_signal': macd_signal,
+            'MACD_histogram': macd - macd_signal,
+            'RSI_14': rsi,
+            'BB_middle': sma_20,
+            'BB_upper': bb_upper,
+            'BB_lower': bb_lower,
+            'BB_width': _div(bb_upper - bb_lower, sma_20),
+            'Stoch_K': stoch_k,
+            'Stoch_D': stoch_d,
+            'Volume_SMA': volume_sma,
+            'Volume_ratio': _div(volume, volume_sma),
+            'Price_change': price_change,
+            'Price_change_5': price_change_5,
+            'Volatility': volatility,
+            'ATR': atr,
+            'Williams_R': williams_r,
+            'CCI': cci,
+            'open': open_price,
+            'close': close,
+            'high': high,
+            'low': low,
+            'volume': volume
+        }
+        self.last_values = values
+        if self.rows is not None:
+            self.rows.append(values)
+        return values
+
+    def checkpoint(self):
+        """Guarda el estado actual para poder deshacer las barras siguientes con rollback"""
+        state = {}
+        for key, value in self.__dict__.items():
+            if key == '_checkpoint':
+                continue
+            # Las filas guardadas no se modifican después de agregarse: basta copiar el contenedor
+            state[key] = copy.copy(value) if key in ('rows', 'last_values') else copy.deepcopy(value)
+        self._checkpoint = state
+
+    def rollback(self) -> bool:
+        """Vuelve al último checkpoint; retorna False si no había ninguno"""
+        if self._checkpoint is None:
+            return False
+        self.__dict__.update(self._checkpoint)
+        self._checkpoint = None
+        return True
+
+    def _iter_frame(self, df: pd.DataFrame):
+        """Alimenta las barras de df una a una, generando los valores de cada una"""
+        timestamps = df['datetime'].to_numpy() if 'datetime' in df.columns else [None] * len(df)
+        opens = df['open'].to_numpy(dtype=float) if 'open' in df.columns else np.full(len(df), NAN)
+        highs = df['high'].to_numpy(dtype=float)
+        lows = df['low'].to_numpy(dtype=float)
+        closes = df['close'].to_numpy(dtype=float)
+        volumes = df['volume'].to_numpy(dtype=float)
+
+        for i in range(len(df)):
+            yield self.update_values(highs[i], lows[i], closes[i], volumes[i],
+                                     timestamps[i], opens[i])
+
+    def feed(self, df: pd.DataFrame, provisional_last: bool = False) -> int:
+        """
+        Alimenta las barras de df sin construir resultados; retorna cuántas procesó.
+        Con provisional_last la última barra (que puede seguir en formación) se
+        procesa después de un checkpoint, y rollback() la deshace antes de
+        volver a alimentarla con sus valores definitivos.
+        """
+        closed = df.iloc[:-1] if provisional_last else df
+        count = 0
+        for _ in self._iter_frame(closed):
+            count += 1
+        if provisional_last and len(df) > 0:
+            self.checkpoint()
+            for _ in self._iter_frame(df.iloc[-1:]):
+                count += 1
+        return count
+
+    def process_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Alimenta todas las barras de un DataFrame y retorna los indicadores
+        calculados barra a barra (mismo índice que df)
+        """
+        records = [[values[col] for col in INDICATOR_COLUMNS] for values in self._iter_frame(df)]
+        return pd.DataFrame(records, index=df.index, columns=INDICATOR_COLUMNS)
+
+    def feature_matrix(self, features: List[str], rows: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Retorna las últimas `rows` filas guardadas (requiere history > 0)
+        con las columnas pedidas, o None si hay valores faltantes
+        """
+        if self.rows is None or len(self.rows) == 0:
+            return None
+
+        selected = list(self.rows)[-rows:] if rows else list(self.rows)
+        try:
+            matrix = np.array([[row[f] for f in features] for row in selected], dtype=float)
+        except KeyError:
+            return None
+
+        if np.isnan(matrix).any():
+            return None
+        return matrix
+
+
+def check_parity(df: pd.DataFrame, rtol: float = 1e-7, atol: float = 1e-9) -> Dict:
+    """
+    Modo paridad: compara el motor incremental contra add_technical_indicators.
+    Solo se comparan las filas donde el motor ya tiene todas las ventanas
+    completas (la versión batch rellena el arranque con bfill).
+    """
+    batch = add_technical_indicators(df.copy())
+    streamed = StreamingIndicatorEngine().process_frame(df)
+
+    comparable = streamed.notna().all(axis=1).to_numpy()
+    report = {'rows_compared': int(comparable.sum()), 'columns': {}, 'ok': True}
+
+    for col in INDICATOR_COLUMNS:
+        expected = batch[col].to_numpy(dtype=float)[comparable]
+        actual = streamed[col].to_numpy(dtype=float)[comparable]
+        finite = np.isfinite(expected) & np.isfinite(actual)
+
+        same_inf = np.array_equal(np.isinf(expected), np.isinf(actual))
+        if finite.any():
+            abs_err = np.abs(expected[finite] - actual[finite])
+            max_err = float(abs_err.max())
+            ok = bool(np.all(abs_err <= atol + rtol * np.abs(expected[finite])))
+        else:
+            max_err = 0.0
+            ok = True
+
+        report['columns'][col] = {'max_abs_error': max_err, 'ok': ok and same_inf}
+        report['ok'] = report['ok'] and ok and same_inf
+
+    return report
+
+
+def main():
+    """Verifica la paridad del motor incremental con la versión batch"""
+    from data_processing import load_data
+    import time
+
+    print("⚡ MOTOR INCREMENTAL DE INDICADORES")
+    print("=" * 50)
+
+    df = load_data('../data/extracted_data_20250625_214110.csv')
+    if df is None:
+        return
+    if 'symbol' in df.columns:
+        df = df[df['symbol'] == df['symbol'].iloc[0]].reset_index(drop=True)
+
+    report = check_parity(df)
+    print(f"📊 Filas comparadas: {report['rows_compared']}")
+    for col, info in report['columns'].items():
+        status = "✅" if info['ok'] else "❌"
+        print(f"   {status} {col}: error máximo {info['max_abs_error']:.2e}")
+    print(f"{'✅ Paridad OK' if report['ok'] else '❌ Paridad fallida'}")
+
+    # Costo por barra
+    engine = StreamingIndicatorEngine()
+    engine.process_frame(df)
+    last = df.iloc[-1]
+    start = time.perf_counter()
+    for _ in range(1000):
+        engine.update(last)
+    per_bar = (time.perf_counter() - start) / 1000
+    print(f"⏱️ Costo por barra: {per_bar * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
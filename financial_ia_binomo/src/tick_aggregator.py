@@ -0,0 +1,220 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from timeframes import TIMEFRAME_LEVELS
+
+BAR_COLUMNS = ['datetime', 'open', 'high', 'low', 'close', 'volume']
+
+
+def _timeframe_ns(timeframe: str) -> int:
+    """Duración de un timeframe ('1m' o frecuencia de pandas como '5min') en ns"""
+    return pd.to_timedelta(TIMEFRAME_LEVELS.get(timeframe, timeframe)).value
+
+
+class _OpenBar:
+    """Barra en construcción; open/close siguen al tick más antiguo/reciente, no al orden de llegada"""
+
+    __slots__ = ('open', 'high', 'low', 'close', 'volume', 'ticks', 'open_ns', 'close_ns')
+
+    def __init__(self, timestamp: int, open_price: float, high: float, low: float,
+                 close: float, volume: float):
+        self.open, self.high, self.low, self.close = open_price, high, low, close
+        self.volume = volume
+        self.ticks = 1
+        self.open_ns = self.close_ns = timestamp
+
+    def add(self, timestamp: int, open_price: float, high: float, low: float,
+            close: float, volume: float):
+        if timestamp < self.open_ns:
+            self.open, self.open_ns = open_price, timestamp
+        if timestamp >= self.close_ns:
+            self.close, self.close_ns = close, timestamp
+        if high > self.high:
+            self.high = high
+        if low < self.low:
+            self.low = low
+        self.volume += volume
+        self.ticks += 1
+
+
+class TickAggregator:
+    """
+    Agregador de ticks irregulares en barras OHLCV de varios timeframes.
+
+    Consume ticks de a uno (push) o por lotes (push_frame), por símbolo, y
+    emite cada barra cuando se cierra. Un tick puede llegar tarde: se suma a
+    su barra mientras la marca de agua del símbolo (el timestamp más reciente
+    visto) no supere el fin de esa barra más `grace`; la barra se emite al
+    superarlo. Los ticks que llegan después se cuentan en `late_ticks` y se
+    descartan. Solo se guardan las barras abiertas, así que la memoria no
+    crece con el historial.
+
+    Las barras usan el inicio del intervalo como 'datetime', igual que
+    resample_data, y los intervalos sin ticks no generan barra.
+    """
+
+    def __init__(self, timeframes: Iterable[str] = ('1m',), grace='0s'):
+        self.timeframes = list(timeframes)
+        self._durations = {tf: _timeframe_ns(tf) for tf in self.timeframes}
+        self.grace_ns = pd.to_timedelta(grace).value
+        self._open: Dict[str, Dict[str, Dict[int, _OpenBar]]] = {}
+        self._watermark: Dict[str, int] = {}
+        self._closed_until: Dict[str, Dict[str, int]] = {}
+        self.late_ticks = 0
+
+    def _emit(self, symbol: str, timeframe: str, start: int, bar: _OpenBar) -> Dict:
+        return {
+            'symbol': symbol, 'timeframe': timeframe, 'datetime': pd.Timestamp(start),
+            'open': bar.open, 'high': bar.high, 'low': bar.low, 'close': bar.close,
+            'volume': bar.volume, 'ticks': bar.ticks
+        }
+
+    def _close_ready(self, symbol: str, watermark: int) -> List[Dict]:
+        """Emite las barras del símbolo cuyo fin + gracia ya quedó atrás"""
+        closed = []
+        for timeframe, duration in self._durations.items():
+            buckets = self._open[symbol][timeframe]
+            if not buckets:
+                continue
+            # Barras con inicio + duración + gracia <= marca de agua
+            limit = watermark - self.grace_ns - duration
+            ready = sorted(start for start in buckets if start <= limit)
+            for start in ready:
+                closed.append(self._emit(symbol, timeframe, start, buckets.pop(start)))
+            if ready:
+                self._closed_until[symbol][timeframe] = ready[-1] + duration
+        return closed
+
+    def _add(self, symbol: str, timestamp: int, open_price: float, high: float, low: float,
+             close: float, volume: float) -> List[Dict]:
+        if symbol not in self._open:
+            self._open[symbol] = {tf: {} for tf in self.timeframes}
+            self._closed_until[symbol] = {tf: None for tf in self.timeframes}
+
+        accepted = False
+        for timeframe, duration in self._durations.items():
+            start = timestamp - timestamp % duration
+            closed_until = self._closed_until[symbol][timeframe]
+            if closed_until is not None and start < closed_until:
+                continue
+            accepted = True
+            bar = self._open[symbol][timeframe].get(start)
+            if bar is None:
+                self._open[symbol][timeframe][start] = _OpenBar(timestamp, open_price, high, low, close, volume)
+            else:
+                bar.add(timestamp, open_price, high, low, close, volume)
+        if not accepted:
+            self.late_ticks += 1
+
+        watermark = self._watermark.get(symbol)
+        if watermark is None or timestamp > watermark:
+            self._watermark[symbol] = timestamp
+            return self._close_ready(symbol, timestamp)
+        return []
+
+    def push(self, symbol: str, timestamp, price: float, volume: float = 0.0) -> List[Dict]:
+        """Agrega un tick de precio; retorna las barras que se cerraron"""
+        price = float(price)
+        return self._add(symbol, pd.Timestamp(timestamp).value, price, price, price, price, float(volume))
+
+    def push_bar(self, symbol: str, timestamp, open_price: float, high: float, low: float,
+                 close: float, volume: float = 0.0) -> List[Dict]:
+        """Agrega un registro OHLCV (p. ej. una fila de los CSV extraídos) como un tick"""
+        return self._add(symbol, pd.Timestamp(timestamp).value, float(open_price), float(high),
+                         float(low), float(close), float(volume))
+
+    def push_frame(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                   symbol_column: str = 'symbol') -> List[Dict]:
+        """
+        Agrega un lote de ticks en el orden de sus filas. Con columnas OHLC se
+        usa cada fila como registro OHLCV; con solo 'price' o 'close', como tick.
+        """
+        timestamps = pd.to_datetime(df['datetime'], format='mixed').to_numpy(dtype='datetime64[ns]').view('int64')
+        if symbol is None and symbol_column in df.columns:
+            symbols = df[symbol_column].astype(str).to_numpy()
+        else:
+            symbols = np.full(len(df), symbol or '')
+
+        price_column = 'close' if 'close' in df.columns else 'price'
+        closes = df[price_column].to_numpy(dtype=float)
+        opens = df['open'].to_numpy(dtype=float) if 'open' in df.columns else closes
+        highs = df['high'].to_numpy(dtype=float) if 'high' in df.columns else closes
+        lows = df['low'].to_numpy(dtype=float) if 'low' in df.columns else closes
+        volumes = df['volume'].to_numpy(dtype=float) if 'volume' in df.columns else np.zeros(len(df))
+
+        closed = []
+        for i in range(len(df)):
+            closed.extend(self._add(symbols[i], int(timestamps[i]), opens[i], highs[i],
+                                    lows[i], closes[i], volumes[i]))
+        return closed
+
+    def flush(self, symbol: Optional[str] = None) -> List[Dict]:
+        """Emite todas las barras abiertas (fin de sesión o de archivo)"""
+        closed = []
+        for sym in ([symbol] if symbol is not None else list(self._open)):
+            for timeframe, duration in self._durations.items():
+                buckets = self._open[sym][timeframe]
+                for start in sorted(buckets):
+                    closed.append(self._emit(sym, timeframe, start, buckets.pop(start)))
+                    self._closed_until[sym][timeframe] = start + duration
+        return closed
+
+
+def bars_to_frame(bars: List[Dict], timeframe: Optional[str] = None) -> pd.DataFrame:
+    """DataFrame de barras emitidas (opcionalmente de un solo timeframe)"""
+    if timeframe is not None:
+        bars = [bar for bar in bars if bar['timeframe'] == timeframe]
+    if not bars:
+        return pd.DataFrame(columns=['symbol'] + BAR_COLUMNS)
+    return pd.DataFrame(bars)[['symbol'] + BAR_COLUMNS]
+
+
+def main():
+    """Compara el agregador con resample_data por símbolo y mide el costo por tick"""
+    import time
+    from data_processing import load_data, resample_data
+
+    print("🕯️ AGREGADOR DE TICKS")
+    print("=" * 50)
+
+    df = load_data('../data/extracted_data_20250625_214110.csv')
+    if df is None:
+        return
+
+    timeframes = ['1m', '5m', '1h']
+    aggregator = TickAggregator(timeframes, grace='2s')
+    start = time.perf_counter()
+    bars = aggregator.push_frame(df) + aggregator.flush()
+    elapsed = time.perf_counter() - start
+    print(f"   {len(df):,} ticks → {len(bars):,} barras en {elapsed*1000:.0f}ms "
+          f"({elapsed / len(df) * 1e6:.1f}µs por tick)")
+
+    for timeframe in timeframes:
+        streamed = bars_to_frame(bars, timeframe)
+        same = True
+        for symbol, part in df.groupby('symbol'):
+            expected = resample_data(part, TIMEFRAME_LEVELS[timeframe])
+            actual = streamed[streamed['symbol'] == symbol].sort_values('datetime').reset_index(drop=True)
+            same = same and np.allclose(expected[BAR_COLUMNS[1:]].to_numpy(float),
+                                        actual[BAR_COLUMNS[1:]].to_numpy(float), rtol=0, atol=1e-9) \
+                and expected['datetime'].equals(actual['datetime'])
+        print(f"   {timeframe}: igual a resample_data {'✅' if same else '❌'}")
+
+    # Ticks desordenados dentro de la ventana de gracia
+    shuffled = df.copy()
+    noise = pd.to_timedelta(np.random.default_rng(0).uniform(0, 1.5, len(df)), unit='s')
+    shuffled['arrival'] = shuffled['datetime'] + noise
+    shuffled = shuffled.sort_values('arrival', kind='stable')
+    late = TickAggregator(['1m'], grace='2s')
+    reordered = bars_to_frame(late.push_frame(shuffled) + late.flush(), '1m')
+    in_order = bars_to_frame(bars, '1m')
+    key = ['symbol', 'datetime']
+    same = reordered.sort_values(key).reset_index(drop=True).equals(in_order.sort_values(key).reset_index(drop=True))
+    print(f"   Ticks con hasta 1.5s de retraso (gracia 2s): {'✅ mismas barras' if same else '❌'} "
+          f"({late.late_ticks} descartados)")
+
+
+if __name__ == "__main__":
+    main()
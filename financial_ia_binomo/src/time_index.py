@@ -0,0 +1,62 @@
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class TimeIndex:
+    """
+    Índice de solo lectura de timestamps ordenados (int64 en ns) para buscar
+    la barra exacta o más cercana a una fecha con búsqueda binaria.
+
+    Se construye una vez al cargar los datos y no se modifica, así que se
+    puede consultar desde varios hilos. Si los timestamps no vienen ordenados
+    (varios símbolos intercalados) se guarda la permutación a las filas.
+    """
+
+    def __init__(self, timestamps):
+        values = np.asarray(timestamps)
+        if np.issubdtype(values.dtype, np.datetime64):
+            values = values.astype('datetime64[ns]').view('int64')
+        values = values.astype(np.int64, copy=False)
+
+        if len(values) > 1 and np.any(values[1:] < values[:-1]):
+            self.rows = np.argsort(values, kind='stable')
+            self.values = values[self.rows]
+            self.rows.setflags(write=False)
+        else:
+            self.rows = None
+            self.values = values
+        self.values.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _row(self, position: int) -> int:
+        return int(self.rows[position]) if self.rows is not None else position
+
+    def nearest(self, when, tolerance=None) -> Optional[Tuple[int, pd.Timestamp, bool]]:
+        """
+        Fila de la barra en `when` o, si no existe, de la más cercana.
+        Retorna (fila, timestamp de la fila, coincidencia exacta), o None si
+        no hay datos o la barra más cercana está a más de `tolerance`.
+        Ante fechas repetidas se usa la primera fila; a igual distancia, la anterior.
+        """
+        if len(self.values) == 0:
+            return None
+
+        target = pd.Timestamp(when).value
+        position = int(np.searchsorted(self.values, target, side='left'))
+
+        if position < len(self.values) and self.values[position] == target:
+            return self._row(position), pd.Timestamp(target), True
+
+        candidates = [p for p in (position - 1, position) if 0 <= p < len(self.values)]
+        best = min(candidates, key=lambda p: abs(int(self.values[p]) - target))
+        distance = abs(int(self.values[best]) - target)
+        if tolerance is not None and distance > pd.Timedelta(tolerance).value:
+            return None
+
+        # Primera fila con ese timestamp
+        best = int(np.searchsorted(self.values, self.values[best], side='left'))
+        return self._row(best), pd.Timestamp(int(self.values[best])), False
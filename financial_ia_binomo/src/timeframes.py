@@ -0,0 +1,222 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data_processing import resample_data
+from indicator_registry import compute_indicators
+from streaming_features import StreamingIndicatorEngine, STREAM_COLUMNS, NAN
+
+# Niveles de la pirámide: etiqueta -> frecuencia de pandas
+TIMEFRAME_LEVELS = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '1h': '1h'
+}
+
+BASE_LEVEL = '1m'
+
+# Características calculadas en cada nivel (columnas '<feature>_<nivel>')
+DEFAULT_FEATURES = ['close', 'RSI_14', 'MACD_histogram', 'BB_width', 'Stoch_K', 'ATR', 'Volatility']
+
+
+def multi_timeframe_columns(features: Sequence[str] = DEFAULT_FEATURES,
+                            levels: Sequence[str] = ('1m', '5m', '15m', '1h')) -> List[str]:
+    """Nombres de las columnas que agrega la pirámide"""
+    return [f"{feature}_{level}" for level in levels for feature in features]
+
+
+def _check_levels(levels: Sequence[str]):
+    unknown = [level for level in levels if level not in TIMEFRAME_LEVELS]
+    if unknown:
+        raise ValueError(f"Timeframes no soportados: {unknown} (usar {list(TIMEFRAME_LEVELS)})")
+
+
+def build_multi_timeframe_features(df: pd.DataFrame, features: Sequence[str] = DEFAULT_FEATURES,
+                                   levels: Sequence[str] = ('5m', '15m', '1h')) -> Optional[pd.DataFrame]:
+    """
+    Construye barras de 1m y de cada nivel superior con resample_data, calcula
+    los indicadores en cada nivel y los alinea sobre el índice de 1m.
+
+    Sin lookahead: una barra de 1m con etiqueta t cierra en t + 1m y solo ve las
+    barras superiores ya cerradas (inicio + duración <= t + 1m). Los indicadores
+    no se rellenan hacia atrás, así que el arranque de cada nivel queda en NaN.
+    Se espera un solo símbolo (ver build_multi_timeframe_by_symbol).
+    """
+    _check_levels(levels)
+
+    base = resample_data(df, TIMEFRAME_LEVELS[BASE_LEVEL])
+    if base is None:
+        return None
+
+    base_step = pd.to_timedelta(TIMEFRAME_LEVELS[BASE_LEVEL])
+    result = base.copy()
+    base_indicators = compute_indicators(base.copy(), list(features), fill=False)
+    for feature in features:
+        result[f"{feature}_{BASE_LEVEL}"] = base_indicators[feature].to_numpy()
+
+    closes_at = pd.DataFrame({'available_at': base['datetime'] + base_step})
+
+    for level in levels:
+        freq = TIMEFRAME_LEVELS[level]
+        bars = resample_data(base, freq)
+        indicators = compute_indicators(bars.copy(), list(features), fill=False)
+        indicators['available_at'] = bars['datetime'] + pd.to_timedelta(freq)
+
+        aligned = pd.merge_asof(closes_at, indicators[['available_at'] + list(features)],
+                                on='available_at', direction='backward')
+        for feature in features:
+            result[f"{feature}_{level}"] = aligned[feature].to_numpy()
+
+    return result
+
+
+def build_multi_timeframe_by_symbol(df: pd.DataFrame, features: Sequence[str] = DEFAULT_FEATURES,
+                                    levels: Sequence[str] = ('5m', '15m', '1h'),
+                                    symbol_column: str = 'symbol') -> Optional[pd.DataFrame]:
+    """Pirámide por símbolo (las barras no mezclan instrumentos)"""
+    if symbol_column not in df.columns:
+        return build_multi_timeframe_features(df, features, levels)
+
+    frames = []
+    for symbol, part in df.groupby(symbol_column, sort=False, observed=True):
+        pyramid = build_multi_timeframe_features(part, features, levels)
+        if pyramid is not None:
+            pyramid.insert(1, symbol_column, symbol)
+            frames.append(pyramid)
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+class _TimeframeLevel:
+    """Barra abierta de un nivel superior y motor incremental de sus indicadores"""
+
+    def __init__(self, freq: str, base_step: pd.Timedelta):
+        self.freq = freq
+        self.step = pd.to_timedelta(freq)
+        self.base_step = base_step
+        self.engine = StreamingIndicatorEngine()
+        self.bucket_start = None
+        self.bar = None
+        self.values: Dict[str, float] = {}
+
+    def push(self, timestamp: pd.Timestamp, bar: Dict[str, float]):
+        """Agrega una barra de 1m a la barra abierta; la cierra al completarse"""
+        bucket_start = timestamp.floor(self.freq)
+
+        # Un salto a otro intervalo cierra la barra anterior aunque esté incompleta
+        if self.bucket_start is not None and bucket_start != self.bucket_start:
+            self._close()
+
+        if self.bucket_start is None:
+            self.bucket_start = bucket_start
+            self.bar = dict(bar)
+        else:
+            self.bar['high'] = max(self.bar['high'], bar['high'])
+            self.bar['low'] = min(self.bar['low'], bar['low'])
+            self.bar['close'] = bar['close']
+            self.bar['volume'] += bar['volume']
+
+        if timestamp + self.base_step >= self.bucket_start + self.step:
+            self._close()
+
+    def _close(self):
+        """Cierra la barra abierta: solo aquí se actualizan los indicadores del nivel"""
+        bar = self.bar
+        self.values = self.engine.update_values(bar['high'], bar['low'], bar['close'],
+                                                bar['volume'], self.bucket_start, bar['open'])
+        self.bucket_start = None
+        self.bar = None
+
+
+class TimeframePyramid:
+    """
+    Versión incremental de build_multi_timeframe_features para un símbolo.
+
+    Cada barra de 1m actualiza su propio motor y la barra abierta de cada nivel
+    superior; los indicadores de un nivel se recalculan solo cuando su barra
+    se cierra, y hasta entonces se entregan los de la última barra cerrada.
+    """
+
+    def __init__(self, features: Sequence[str] = DEFAULT_FEATURES,
+                 levels: Sequence[str] = ('5m', '15m', '1h')):
+        _check_levels(levels)
+        unsupported = [f for f in features if f not in STREAM_COLUMNS]
+        if unsupported:
+            raise ValueError(f"Características sin versión incremental: {unsupported}")
+
+        self.features = list(features)
+        self.levels = list(levels)
+        self.base_step = pd.to_timedelta(TIMEFRAME_LEVELS[BASE_LEVEL])
+        self.base_engine = StreamingIndicatorEngine()
+        self.higher = {level: _TimeframeLevel(TIMEFRAME_LEVELS[level], self.base_step)
+                       for level in self.levels}
+        self.last_timestamp = None
+
+    def update(self, bar, timestamp=None) -> Dict[str, float]:
+        """
+        Procesa una barra de 1m (dict o fila con datetime y OHLCV) y retorna
+        las columnas de la pirámide para esa barra
+        """
+        timestamp = pd.Timestamp(timestamp if timestamp is not None else bar['datetime'])
+        values = {
+            'open': float(bar['open']), 'high': float(bar['high']), 'low': float(bar['low']),
+            'close': float(bar['close']), 'volume': float(bar['volume'])
+        }
+
+        base_values = self.base_engine.update_values(values['high'], values['low'], values['close'],
+                                                     values['volume'], timestamp, values['open'])
+        row = {f"{f}_{BASE_LEVEL}": base_values[f] for f in self.features}
+
+        for level in self.levels:
+            state = self.higher[level]
+            state.push(timestamp, values)
+            for f in self.features:
+                row[f"{f}_{level}"] = state.values.get(f, NAN)
+
+        self.last_timestamp = timestamp
+        return row
+
+    def process_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Re-muestrea df a 1m y lo procesa barra a barra"""
+        base = resample_data(df, TIMEFRAME_LEVELS[BASE_LEVEL])
+        rows = [self.update(bar) for bar in base.to_dict('records')]
+        return pd.concat([base, pd.DataFrame(rows, index=base.index)], axis=1)
+
+
+def main():
+    """Verifica paridad batch/incremental y ausencia de lookahead"""
+    from data_processing import load_data
+
+    print("🏔️ PIRÁMIDE MULTI-TIMEFRAME")
+    print("=" * 50)
+
+    df = load_data('../data/extracted_data_20250625_214110.csv')
+    if df is None:
+        return
+    if 'symbol' in df.columns:
+        df = df[df['symbol'] == df['symbol'].iloc[0]].reset_index(drop=True)
+
+    batch = build_multi_timeframe_features(df)
+    streamed = TimeframePyramid().process_frame(df)
+    columns = multi_timeframe_columns()
+
+    expected = batch[columns].to_numpy(dtype=float)
+    actual = streamed[columns].to_numpy(dtype=float)
+    same_nan = np.array_equal(np.isnan(expected), np.isnan(actual))
+    finite = np.isfinite(expected) & np.isfinite(actual)
+    scale = np.maximum(np.abs(expected[finite]), 1.0)
+    error = float(np.max(np.abs(expected[finite] - actual[finite]) / scale)) if finite.any() else 0.0
+    print(f"   Paridad batch/incremental: NaN iguales {'✅' if same_nan else '❌'}, error máximo {error:.2e}")
+
+    # Sin lookahead: truncar la historia no cambia las filas anteriores al corte
+    cut = batch['datetime'].iloc[len(batch) // 2]
+    truncated = build_multi_timeframe_features(df[df['datetime'] < cut + pd.Timedelta('1min')])
+    head = batch[batch['datetime'] <= cut][columns]
+    no_lookahead = np.allclose(head.to_numpy(dtype=float), truncated[columns].to_numpy(dtype=float),
+                               equal_nan=True, rtol=0, atol=0)
+    print(f"   Sin lookahead: {'✅' if no_lookahead else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
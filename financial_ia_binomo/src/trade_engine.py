@@ -0,0 +1,552 @@
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+SIGNAL_BUY = 1
+SIGNAL_SELL = -1
+SIGNAL_HOLD = 0
+SIGNAL_CODES = {'BUY': SIGNAL_BUY, 'SELL': SIGNAL_SELL, 'HOLD': SIGNAL_HOLD}
+STAKE_RULES = ('fixed', 'confidence')
+OUTCOME_NAMES = {1: 'WIN', -1: 'LOSS', 0: 'TIE'}
+
+
+def signals_from_probabilities(probabilities: np.ndarray,
+                               threshold: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Códigos de señal (BUY si la probabilidad supera threshold, si no SELL)
+    y confianza |p - 0.5| * 2, igual que AdvancedBacktester.signal_from_prediction.
+    La confianza se calcula en float64 como la versión escalar.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    signal = np.where(probabilities > threshold, SIGNAL_BUY, SIGNAL_SELL).astype(np.int8)
+    confidence = np.abs(probabilities - 0.5) * 2
+    return signal, confidence
+
+
+def simulate_long_only(close: np.ndarray, signal: np.ndarray, confidence: np.ndarray,
+                       initial_balance: float, commission: float, position_size: float,
+                       confidence_threshold: float = 0.0, close_at_end: bool = True) -> Dict:
+    """
+    Simulación del backtester sobre arrays: una posición larga a la vez;
+    BUY abre con balance * position_size * confianza (más comisión) si el
+    balance alcanza, SELL cierra. Solo cuentan las barras con confianza >=
+    confidence_threshold. Con close_at_end la posición abierta se cierra al
+    último precio (sin afectar el equity por barra, como el bucle original).
+
+    El bucle de Python recorre operaciones, no barras: la siguiente entrada
+    o salida se busca por bisección sobre los índices de señales, y el
+    balance, la posición y el equity de cada barra se rellenan a partir de
+    los cambios de estado. Las operaciones aritméticas son las mismas (y en
+    el mismo orden) que en AdvancedBacktester.execute_trade.
+
+    Retorna arrays por barra ('balance', 'shares', 'in_position', 'equity'),
+    arrays por operación (ver trade_records) y 'final_balance'.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    confidence = np.asarray(confidence, dtype=np.float64)
+    n = len(close)
+    active = confidence >= confidence_threshold
+    buys = np.flatnonzero(active & (signal == SIGNAL_BUY))
+    sells = np.flatnonzero(active & (signal == SIGNAL_SELL))
+
+    # Cada operación necesita un BUY y (salvo la última) un SELL posterior
+    capacity = min(len(buys), len(sells) + 1)
+    entry_bar = np.empty(capacity, dtype=np.int64)
+    exit_bar = np.full(capacity, -1, dtype=np.int64)
+    shares = np.empty(capacity)
+    entry_value = np.empty(capacity)
+    entry_commission = np.empty(capacity)
+    entry_balance = np.empty(capacity)
+    exit_value = np.full(capacity, np.nan)
+    exit_commission = np.full(capacity, np.nan)
+    profit = np.full(capacity, np.nan)
+    exit_balance = np.full(capacity, np.nan)
+
+    # Escalares de Python en el bucle: mismas operaciones en float64, sin el costo de los escalares numpy
+    buy_list, sell_list = buys.tolist(), sells.tolist()
+    prices, confidences = close.tolist(), confidence.tolist()
+    balance = float(initial_balance)
+    count = 0
+    cursor = 0
+    open_at_end = False
+    while True:
+        # Primera entrada desde cursor con balance suficiente
+        b = bisect_left(buy_list, cursor)
+        entry = -1
+        while b < len(buy_list):
+            i = buy_list[b]
+            position_value = balance * position_size * confidences[i]
+            cost = position_value + (position_value * commission)
+            if cost <= balance:
+                entry = i
+                break
+            b += 1
+        if entry < 0:
+            break
+
+        position_shares = position_value / prices[entry]
+        entry_bar[count] = entry
+        shares[count] = position_shares
+        entry_value[count] = position_value
+        entry_commission[count] = position_value * commission
+        balance -= cost
+        entry_balance[count] = balance
+
+        s = bisect_left(sell_list, entry + 1)
+        if s == len(sell_list):
+            open_at_end = True
+            count += 1
+            break
+        j = sell_list[s]
+        value = position_shares * prices[j]
+        fee = value * commission
+        exit_bar[count] = j
+        exit_value[count] = value
+        exit_commission[count] = fee
+        profit[count] = value - fee - position_value
+        balance += value - fee
+        exit_balance[count] = balance
+        count += 1
+        cursor = j + 1
+
+    # Estado por barra: cambios en cada entrada y salida (alternadas y crecientes)
+    closed = count - 1 if open_at_end else count
+    event_bar = np.empty(1 + count + closed, dtype=np.int64)
+    event_balance = np.empty(len(event_bar))
+    event_shares = np.empty(len(event_bar))
+    event_open = np.empty(len(event_bar), dtype=bool)
+    event_bar[0], event_balance[0], event_shares[0], event_open[0] = -1, initial_balance, 0.0, False
+    event_bar[1::2] = entry_bar[:count]
+    event_balance[1::2] = entry_balance[:count]
+    event_shares[1::2] = shares[:count]
+    event_open[1::2] = True
+    event_bar[2::2] = exit_bar[:closed]
+    event_balance[2::2] = exit_balance[:closed]
+    event_shares[2::2] = 0.0
+    event_open[2::2] = False
+
+    state = np.searchsorted(event_bar, np.arange(n), side='right') - 1
+    bar_balance = event_balance[state]
+    bar_shares = event_shares[state]
+    in_position = event_open[state]
+    equity = np.where(in_position, bar_balance + bar_shares * close, bar_balance)
+
+    closed_at_end = np.zeros(count, dtype=bool)
+    if open_at_end and close_at_end:
+        # Cierre final al último precio (confianza 1.0), fuera de la curva de equity
+        k = count - 1
+        value = shares[k] * close[-1]
+        fee = value * commission
+        exit_bar[k] = n - 1
+        exit_value[k] = value
+        exit_commission[k] = fee
+        profit[k] = value - fee - entry_value[k]
+        balance += value - fee
+        exit_balance[k] = balance
+        closed_at_end[k] = True
+
+    return {
+        'balance': bar_balance,
+        'shares': bar_shares,
+        'in_position': in_position,
+        'equity': equity,
+        'entry_bar': entry_bar[:count],
+        'exit_bar': exit_bar[:count],
+        'trade_shares': shares[:count],
+        'entry_value': entry_value[:count],
+        'entry_commission': entry_commission[:count],
+        'entry_balance': entry_balance[:count],
+        'exit_value': exit_value[:count],
+        'exit_commission': exit_commission[:count],
+        'profit': profit[:count],
+        'exit_balance': exit_balance[:count],
+        'closed_at_end': closed_at_end,
+        'final_balance': balance
+    }
+
+
+def trade_records(result: Dict, close: np.ndarray, confidence: np.ndarray, timestamps) -> List[Dict]:
+    """
+    Tabla de operaciones (una fila BUY y, si se cerró, una SELL por
+    operación) con los campos de AdvancedBacktester.trades; se materializa
+    solo al final de la simulación.
+    """
+    timestamps = pd.Index(timestamps)
+    close = np.asarray(close, dtype=np.float64)
+    confidence = np.asarray(confidence, dtype=np.float64)
+    entry, exit_ = result['entry_bar'], result['exit_bar']
+    closed = exit_ >= 0
+    safe_exit = np.where(closed, exit_, entry)
+
+    # Columnas completas con operaciones de arrays; el bucle solo arma los dicts
+    entry_time = timestamps.take(entry)
+    exit_time = timestamps.take(safe_exit)
+    exit_confidence = np.where(result['closed_at_end'], 1.0, confidence[safe_exit])
+    columns = zip(entry_time.tolist(), close[entry].tolist(), result['trade_shares'].tolist(),
+                  result['entry_value'].tolist(), result['entry_commission'].tolist(),
+                  result['entry_balance'].tolist(), confidence[entry].tolist(), closed.tolist(),
+                  exit_time.tolist(), close[safe_exit].tolist(), result['exit_value'].tolist(),
+                  result['exit_commission'].tolist(), result['profit'].tolist(),
+                  result['exit_balance'].tolist(), exit_confidence.tolist(), (exit_time - entry_time).tolist())
+
+    records = []
+    for (entry_ts, entry_price, shares, entry_value, entry_fee, entry_balance, entry_conf, was_closed,
+         exit_ts, exit_price, exit_value, exit_fee, profit, exit_balance, exit_conf, hold_time) in columns:
+        records.append({
+            'timestamp': entry_ts,
+            'action': 'BUY',
+            'price': entry_price,
+            'shares': shares,
+            'value': entry_value,
+            'commission': entry_fee,
+            'balance': entry_balance,
+            'confidence': entry_conf
+        })
+        if was_closed:
+            records.append({
+                'timestamp': exit_ts,
+                'action': 'SELL',
+                'price': exit_price,
+                'shares': shares,
+                'value': exit_value,
+                'commission': exit_fee,
+                'profit': profit,
+                'balance': exit_balance,
+                'confidence': exit_conf,
+                'hold_time': hold_time
+            })
+    return records
+
+
+def max_drawdown(equity: np.ndarray, initial_balance: float) -> float:
+    """Máximo drawdown relativo con el pico acumulado (empezando en el balance inicial)"""
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(np.maximum(equity, initial_balance))
+    return float(max(0.0, np.max((peak - equity) / peak)))
+
+
+def equity_returns(equity: np.ndarray) -> np.ndarray:
+    """Retornos simples barra a barra de la curva de equity"""
+    equity = np.asarray(equity, dtype=np.float64)
+    # Sin tope de stake el equity de opciones binarias puede llegar a cero
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(equity) / equity[:-1]
+
+
+def sharpe_ratio(returns: np.ndarray) -> float:
+    """Sharpe simplificado (media / desviación de los retornos, sin anualizar)"""
+    if len(returns) == 0:
+        return 0
+    with np.errstate(invalid='ignore'):
+        std = np.std(returns)
+        return np.mean(returns) / std if std > 0 else 0
+
+
+def long_only_metrics(result: Dict, initial_balance: float) -> Dict:
+    """Resumen de simulate_long_only (operaciones = entradas, cerradas o no)"""
+    profit = result['profit'][~np.isnan(result['profit'])]
+    trades = len(result['entry_bar'])
+    winning = int(np.sum(profit > 0))
+    final_balance = result['final_balance']
+    return {
+        'trades': trades,
+        'winning_trades': winning,
+        'losing_trades': int(np.sum(profit < 0)),
+        'win_rate': winning / trades if trades else 0,
+        'total_profit': float(np.sum(profit)),
+        'total_commission': float(np.sum(result['entry_commission']) + np.nansum(result['exit_commission'])),
+        'final_balance': final_balance,
+        'total_return_pct': (final_balance / initial_balance - 1) * 100,
+        'max_drawdown': max_drawdown(result['equity'], initial_balance),
+        'sharpe_ratio': sharpe_ratio(equity_returns(result['equity']))
+    }
+
+
+def contract_outcomes(close: np.ndarray, expiry: int) -> np.ndarray:
+    """
+    Movimiento de cada barra al vencimiento: +1 si el cierre expiry barras
+    después es mayor, -1 si es menor, 0 si es igual (len(close) - expiry valores).
+    """
+    if expiry < 1:
+        raise ValueError("El vencimiento debe ser de al menos una barra")
+    close = np.asarray(close, dtype=np.float64)
+    return np.sign(close[expiry:] - close[:-expiry]).astype(np.int8)
+
+
+def stake_amounts(stake, stake_rule: str, confidence: np.ndarray) -> np.ndarray:
+    """
+    Monto por contrato: 'fixed' apuesta stake siempre, 'confidence' stake *
+    confianza. Si stake es un array se usa tal cual (un monto por barra).
+    """
+    if np.ndim(stake) > 0:
+        return np.asarray(stake, dtype=np.float64)[:len(confidence)]
+    if stake_rule == 'fixed':
+        return np.full(len(confidence), float(stake))
+    if stake_rule == 'confidence':
+        return float(stake) * confidence
+    raise ValueError(f"Regla de stake desconocida: {stake_rule} (usar {', '.join(STAKE_RULES)})")
+
+
+def _fund_contracts(candidates: np.ndarray, stakes: np.ndarray, pnl: np.ndarray, expiry: int,
+                    equity: np.ndarray, locked: np.ndarray, start: int) -> np.ndarray:
+    """
+    Recorrido secuencial de los contratos candidatos: cada uno se abre solo
+    si el balance libre (equity menos stakes de contratos abiertos) alcanza
+    su stake, después de liquidar los que vencen en esa barra. Antes de
+    start (el primer candidato sin fondos) todos los candidatos tenían
+    fondos, así que el recorrido parte del estado vectorizado (equity y
+    locked con todos los candidatos abiertos) en esa barra, y termina si
+    no quedan contratos abiertos ni balance para el stake mínimo.
+    Retorna la máscara de contratos abiertos.
+    """
+    funded = np.zeros(len(candidates), dtype=bool)
+    funded[:start] = candidates[:start]
+    first_open = max(start - expiry + 1, 0)
+    opened = deque((j, stakes[j], pnl[j]) for j in (np.flatnonzero(candidates[first_open:start]) + first_open).tolist())
+    balance, locked = float(equity[start]), float(locked[start] - stakes[start])
+    min_stake = float(stakes[candidates].min())
+    # Solo se convierten a listas los candidatos pendientes
+    bars = np.flatnonzero(candidates[start:]) + start
+    for t, stake, profit in zip(bars.tolist(), stakes[bars].tolist(), pnl[bars].tolist()):
+        while opened and opened[0][0] + expiry <= t:
+            _, settled_stake, settled_pnl = opened.popleft()
+            balance += settled_pnl
+            locked -= settled_stake
+        if balance - locked >= stake:
+            funded[t] = True
+            opened.append((t, stake, profit))
+            locked += stake
+        elif not opened and balance < min_stake:
+            break
+    return funded
+
+
+def _exposure(active: np.ndarray, stakes: np.ndarray, pnl: np.ndarray, expiry: int, n: int,
+              initial_balance: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Equity (resultados ya liquidados) y stake bloqueado por barra"""
+    m = len(active)
+    settled = np.zeros(n)
+    settled[expiry:expiry + m] = np.where(active, pnl, 0.0)
+    staked = np.where(active, stakes, 0.0)
+    flow = np.zeros(n)
+    flow[:m] += staked
+    flow[expiry:expiry + m] -= staked
+    return initial_balance + np.cumsum(settled), np.cumsum(flow)
+
+
+def settle_binary_options(close: np.ndarray, signal: np.ndarray, confidence: np.ndarray, expiry: int,
+                          payout: float, stake=100.0, stake_rule: str = 'fixed',
+                          confidence_threshold: float = 0.0, initial_balance: float = 10000.0,
+                          outcome: np.ndarray = None, track_exposure: bool = True) -> Dict:
+    """
+    Liquidación de opciones binarias de vencimiento fijo (el producto de
+    Binomo). En cada barra con señal BUY/SELL y confianza >=
+    confidence_threshold se abre un contrato CALL/PUT al cierre, que vence
+    expiry barras después: si el cierre al vencimiento queda del lado de la
+    señal gana stake * payout, si queda del otro lado pierde el stake y si
+    es igual se devuelve el stake. Los contratos se solapan mientras haya
+    balance libre: un contrato cuyo stake supera equity - stakes bloqueados
+    se omite (igual que simulate_long_only no abre si el balance no alcanza),
+    así que el equity nunca queda negativo. Los que vencerían después del
+    último dato no se abren.
+
+    Todos los contratos se liquidan en una pasada vectorizada comparando el
+    cierre con el cierre desplazado expiry barras (outcome permite reutilizar
+    contract_outcomes entre combinaciones). Solo si algún contrato no tiene
+    balance libre se recorren los candidatos en orden (_fund_contracts).
+    Por barra retorna 'equity'
+    (balance inicial más resultados ya liquidados) y, con track_exposure,
+    'locked' (stake de contratos abiertos), 'balance' (equity - locked) y
+    'open_contracts'. Por contrato (barra de apertura): 'active', 'unfunded'
+    (con señal pero sin balance libre), 'direction', 'result' (+1 gana,
+    -1 pierde, 0 empate), 'stake' y 'pnl'.
+    """
+    n = len(close)
+    if outcome is None:
+        outcome = contract_outcomes(close, expiry)
+    m = len(outcome)
+    direction = np.asarray(signal[:m])
+    confidence = np.asarray(confidence[:m], dtype=np.float64)
+    candidates = (confidence >= confidence_threshold) & (direction != SIGNAL_HOLD)
+    result = outcome * direction
+    stakes = stake_amounts(stake, stake_rule, confidence)
+    pnl = np.where(result > 0, stakes * payout, np.where(result < 0, -stakes, 0.0))
+
+    # Cada contrato se liquida expiry barras después de abrirse. Si abrir
+    # todos los candidatos nunca deja el balance libre negativo, todos
+    # tenían fondos y la pasada vectorizada es exacta
+    equity, locked = _exposure(candidates, stakes, pnl, expiry, n, initial_balance)
+    active = candidates
+    short = candidates & (equity[:m] - locked[:m] < 0)
+    if short.any():
+        active = _fund_contracts(candidates, stakes, pnl, expiry, equity, locked, int(np.argmax(short)))
+        equity, locked = _exposure(active, stakes, pnl, expiry, n, initial_balance)
+
+    settlement = {
+        'expiry': expiry,
+        'payout': payout,
+        'active': active,
+        'unfunded': candidates & ~active,
+        'direction': direction,
+        'result': result,
+        'stake': stakes,
+        'pnl': np.where(active, pnl, 0.0),
+        'equity': equity
+    }
+    if track_exposure:
+        count = np.zeros(n, dtype=np.int64)
+        count[:m] += active
+        count[expiry:expiry + m] -= active
+        settlement['locked'] = locked
+        settlement['balance'] = equity - locked
+        settlement['open_contracts'] = np.cumsum(count)
+    return settlement
+
+
+def binary_metrics(settlement: Dict, initial_balance: float = 10000.0) -> Dict:
+    """Resumen de una liquidación de opciones binarias"""
+    active, result = settlement['active'], settlement['result']
+    contracts = int(np.sum(active))
+    wins = int(np.sum(active & (result > 0)))
+    losses = int(np.sum(active & (result < 0)))
+    equity = settlement['equity']
+    final_balance = float(equity[-1]) if len(equity) else initial_balance
+    return {
+        'contracts': contracts,
+        'wins': wins,
+        'losses': losses,
+        'ties': contracts - wins - losses,
+        'unfunded': int(np.sum(settlement['unfunded'])),
+        'win_rate': wins / contracts if contracts else 0,
+        'break_even_win_rate': 1 / (1 + settlement['payout']),
+        'total_staked': float(np.sum(np.where(active, settlement['stake'], 0.0))),
+        'total_pnl': float(np.sum(settlement['pnl'])),
+        'final_balance': final_balance,
+        'total_return_pct': (final_balance / initial_balance - 1) * 100,
+        'max_drawdown': max_drawdown(equity, initial_balance),
+        'sharpe_ratio': sharpe_ratio(equity_returns(equity))
+    }
+
+
+def binary_grid(close: np.ndarray, signal: np.ndarray, confidence: np.ndarray, expiries, payouts,
+                thresholds, stake=100.0, stake_rule: str = 'fixed',
+                initial_balance: float = 10000.0) -> pd.DataFrame:
+    """
+    binary_metrics para cada combinación de vencimiento, payout y umbral
+    de confianza. Los resultados de los contratos se calculan una vez por
+    vencimiento y se reutilizan en el resto de combinaciones.
+    """
+    rows = []
+    for expiry in expiries:
+        if expiry >= len(close):
+            continue
+        outcome = contract_outcomes(close, expiry)
+        for threshold in thresholds:
+            for payout in payouts:
+                settlement = settle_binary_options(close, signal, confidence, expiry, payout, stake, stake_rule,
+                                                   threshold, initial_balance, outcome=outcome,
+                                                   track_exposure=False)
+                rows.append({'expiry': expiry, 'payout': payout, 'threshold': threshold,
+                             **binary_metrics(settlement, initial_balance)})
+    return pd.DataFrame(rows)
+
+
+def contract_records(settlement: Dict, close: np.ndarray, confidence: np.ndarray, timestamps) -> pd.DataFrame:
+    """Tabla de contratos liquidados (se materializa solo al final)"""
+    timestamps = pd.Index(timestamps)
+    close = np.asarray(close, dtype=np.float64)
+    expiry = settlement['expiry']
+    opened = np.flatnonzero(settlement['active'])
+    settled = opened + expiry
+    result = settlement['result'][opened]
+    return pd.DataFrame({
+        'timestamp': timestamps.take(opened),
+        'expiry_time': timestamps.take(settled),
+        'direction': np.where(settlement['direction'][opened] == SIGNAL_BUY, 'CALL', 'PUT'),
+        'entry_price': close[opened],
+        'exit_price': close[settled],
+        'stake': settlement['stake'][opened],
+        'confidence': np.asarray(confidence, dtype=np.float64)[opened],
+        'outcome': [OUTCOME_NAMES[r] for r in result.tolist()],
+        'profit': settlement['pnl'][opened],
+        'balance': settlement['equity'][settled]
+    })
+
+
+def main():
+    """Compara el motor por arrays con un bucle barra a barra equivalente"""
+    import time
+
+    print("⚙️ MOTOR DE SIMULACIÓN POR ARRAYS")
+    print("=" * 50)
+
+    rng = np.random.default_rng(0)
+    bars = 200_000
+    close = 1.1 + np.cumsum(rng.normal(0, 1e-4, bars))
+    probabilities = np.clip(0.5 + rng.normal(0, 0.2, bars), 0, 1).astype(np.float32)
+    timestamps = pd.date_range('2024-01-01', periods=bars, freq='1min')
+    initial, commission, position_size, threshold = 10000.0, 0.001, 0.1, 0.6
+
+    start = time.perf_counter()
+    signal, confidence = signals_from_probabilities(probabilities)
+    result = simulate_long_only(close, signal, confidence, initial, commission, position_size, threshold)
+    trades = trade_records(result, close, confidence, timestamps)
+    drawdown = max_drawdown(result['equity'], initial)
+    sharpe = sharpe_ratio(equity_returns(result['equity']))
+    array_seconds = time.perf_counter() - start
+
+    # Referencia: el bucle por barra de AdvancedBacktester (sin DataFrame)
+    start = time.perf_counter()
+    balance, position, equity = initial, None, []
+    for i in range(bars):
+        confidence_i = abs(probabilities[i] - 0.5) * 2
+        if confidence_i >= threshold:
+            price = close[i]
+            if probabilities[i] > 0.5 and position is None:
+                value = balance * position_size * confidence_i
+                cost = value + (value * commission)
+                if cost <= balance:
+                    position = (value / price, value)
+                    balance -= cost
+            elif probabilities[i] <= 0.5 and position is not None:
+                exit_value = position[0] * price
+                balance += exit_value - exit_value * commission
+                position = None
+        equity.append(balance + position[0] * close[i] if position else balance)
+    loop_seconds = time.perf_counter() - start
+
+    same = np.array_equal(np.array(equity), result['equity'])
+    print(f"   {bars:,} barras, {len(result['entry_bar'])} operaciones, drawdown {drawdown*100:.2f}%, "
+          f"Sharpe {sharpe:.4f}, {len(trades)} filas de operaciones")
+    print(f"   Bucle por barra: {loop_seconds*1000:.0f}ms | arrays: {array_seconds*1000:.0f}ms "
+          f"(x{loop_seconds / array_seconds:.1f}) | equity idéntico: {'✅' if same else '❌'}")
+
+    # Opciones binarias: un contrato por barra con señal, vencimientos solapados
+    print("\n🎲 OPCIONES BINARIAS")
+    settlement = settle_binary_options(close, signal, confidence, expiry=5, payout=0.8, stake=10,
+                                       confidence_threshold=threshold)
+    summary = binary_metrics(settlement)
+    print(f"   Vencimiento 5 barras, payout 80%: {summary['contracts']:,} contratos, "
+          f"win rate {summary['win_rate']*100:.1f}% (equilibrio {summary['break_even_win_rate']*100:.1f}%), "
+          f"P&L ${summary['total_pnl']:,.2f}, máx. abiertos {settlement['open_contracts'].max()}, "
+          f"omitidos sin balance libre {summary['unfunded']:,}")
+    print(f"   Equity mínimo: ${settlement['equity'].min():,.2f}")
+
+    expiries, payouts = range(1, 11), np.round(np.arange(0.70, 0.96, 0.05), 2)
+    thresholds = np.round(np.arange(0.0, 0.8, 0.05), 2)
+    start = time.perf_counter()
+    grid = binary_grid(close, signal, confidence, expiries, payouts, thresholds, stake=10)
+    grid_seconds = time.perf_counter() - start
+    best = grid.sort_values('total_return_pct').iloc[-1]
+    print(f"   Barrido de {len(grid):,} combinaciones en {grid_seconds:.1f}s; mejor: vencimiento "
+          f"{best['expiry']:.0f}, payout {best['payout']:.2f}, umbral {best['threshold']:.2f} "
+          f"({best['total_return_pct']:.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
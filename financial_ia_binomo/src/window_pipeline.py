@@ -0,0 +1,166 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Tamaño por defecto del búfer de mezcla (índices de muestra, no ventanas)
+SHUFFLE_BUFFER = 10_000
+
+
+class WindowDataset:
+    """
+    Lotes de ventanas (X, y) generados al vuelo desde la matriz base de
+    características, sin materializar todas las secuencias.
+
+    Cada muestra i es la ventana data[i:i+seq_length] con la etiqueta de la
+    barra siguiente (igual que build_sequences). `indices` limita las
+    muestras (p. ej. los índices de TimeSeriesSplit); sin mezcla los lotes
+    salen en ese orden, de forma determinista. Con shuffle_buffer > 0 las
+    muestras se mezclan dentro de un búfer de ese tamaño (un búfer chico
+    mantiene las lecturas de un memmap cerca unas de otras); cada época usa
+    la semilla seed + época. Los lotes se arman en `workers` hilos y se
+    mantienen hasta `prefetch` lotes listos por adelantado, siempre en orden.
+
+    La memoria usada escala con batch_size x seq_length x prefetch, no con
+    el tamaño del dataset.
+    """
+
+    def __init__(self, data, seq_length: int = 30, indices: Optional[Sequence[int]] = None,
+                 batch_size: int = 32, shuffle_buffer: int = 0, seed: Optional[int] = None,
+                 prefetch: int = 2, workers: int = 1):
+        # Una ruta a .npy se abre mapeada en memoria
+        self.data = np.load(data, mmap_mode='r') if isinstance(data, str) else data
+        self.seq_length = seq_length
+        total = max(len(self.data) - seq_length - 1, 0)
+        self.indices = np.arange(total) if indices is None else np.asarray(indices, dtype=np.int64)
+        if len(self.indices) and (self.indices.min() < 0 or self.indices.max() >= total):
+            raise ValueError(f"Índices de muestra fuera de rango (0..{total - 1})")
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.prefetch = max(prefetch, 1)
+        self.workers = max(workers, 1)
+        self.epoch = 0
+        self._offsets = np.arange(seq_length)
+
+    def __len__(self) -> int:
+        """Lotes por época"""
+        return -(-len(self.indices) // self.batch_size)
+
+    @property
+    def sample_shape(self) -> Tuple[int, int]:
+        return self.seq_length, self.data.shape[1]
+
+    def _order(self, epoch: int) -> Iterator[int]:
+        """Índices de muestra de una época (mezcla por búfer si corresponde)"""
+        if self.shuffle_buffer <= 1:
+            yield from self.indices
+            return
+
+        rng = np.random.default_rng(None if self.seed is None else self.seed + epoch)
+        size = min(self.shuffle_buffer, len(self.indices))
+        buffer = self.indices[:size].copy()
+        incoming = self.indices[size:]
+        # Con el búfer lleno: se entrega un elemento al azar y su lugar lo ocupa el siguiente
+        picks = rng.integers(size, size=len(incoming))
+        for pick, index in zip(picks.tolist(), incoming.tolist()):
+            yield buffer[pick]
+            buffer[pick] = index
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def _batches(self, epoch: int) -> Iterator[np.ndarray]:
+        batch = []
+        for index in self._order(epoch):
+            batch.append(index)
+            if len(batch) == self.batch_size:
+                yield np.array(batch, dtype=np.int64)
+                batch = []
+        if batch:
+            yield np.array(batch, dtype=np.int64)
+
+    def make_batch(self, batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Copia las ventanas de las muestras `batch` y calcula sus etiquetas"""
+        X = np.asarray(self.data[batch[:, None] + self._offsets])
+        closes = self.data[:, 0]
+        y = (np.asarray(closes[batch + self.seq_length]) >
+             np.asarray(closes[batch + self.seq_length - 1])).astype(np.int64)
+        return X, y
+
+    def epoch_batches(self, epoch: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Una época de lotes, armados en segundo plano"""
+        if epoch is None:
+            epoch = self.epoch
+            self.epoch += 1
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        pending = deque()
+        try:
+            for batch in self._batches(epoch):
+                pending.append(executor.submit(self.make_batch, batch))
+                if len(pending) > self.prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __iter__(self):
+        return self.epoch_batches()
+
+    def repeat(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Épocas sin fin, para model.fit(..., steps_per_epoch=len(dataset))"""
+        while True:
+            yield from self.epoch_batches()
+
+
+def fit_kwargs(train: WindowDataset, validation: Optional[WindowDataset] = None) -> dict:
+    """Argumentos de model.fit para entrenar con lotes generados al vuelo"""
+    kwargs = {'x': train.repeat(), 'steps_per_epoch': len(train)}
+    if validation is not None:
+        kwargs['validation_data'] = validation.repeat()
+        kwargs['validation_steps'] = len(validation)
+    return kwargs
+
+
+def main():
+    """Verifica que los lotes reproducen build_sequences y mide la memoria"""
+    import time
+    import tracemalloc
+    from sequences import build_sequences
+
+    print("🚚 PIPELINE DE VENTANAS")
+    print("=" * 50)
+
+    data = np.random.default_rng(0).random((100_000, 19))
+    X, y = build_sequences(data)
+
+    ordered = WindowDataset(data, batch_size=256, prefetch=4, workers=2)
+    batches = list(ordered)
+    same = (np.array_equal(np.concatenate([b[0] for b in batches]), X) and
+            np.array_equal(np.concatenate([b[1] for b in batches]), y))
+    print(f"   Orden determinista igual a build_sequences: {'✅' if same else '❌'}")
+
+    shuffled = WindowDataset(data, batch_size=256, shuffle_buffer=5000, seed=7)
+    first = np.concatenate([b[1] for b in shuffled.epoch_batches(0)])
+    again = np.concatenate([b[1] for b in shuffled.epoch_batches(0)])
+    print(f"   Mezcla reproducible con semilla: {'✅' if np.array_equal(first, again) else '❌'}, "
+          f"mismas etiquetas: {'✅' if np.array_equal(np.sort(first), np.sort(y)) else '❌'}")
+
+    start = time.perf_counter()
+    for _ in shuffled:
+        pass
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in shuffled:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"   Época completa: {elapsed*1000:.0f}ms, pico {peak / 1e6:.1f}MB "
+          f"(secuencias materializadas: {X.nbytes / 1e6:.0f}MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,23 @@ Script para iniciar el servidor API con el modelo simple
 """
 
 import json
+import sys
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import numpy as np
 import pandas as pd
-import pickle
-from sklearn.preprocessing import StandardScaler
 from datetime import datetime
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from indicator_registry import compute_indicators, indicator_version, profile_columns
+from feature_cache import get_feature_cache
+from precision import get_feature_dtype
+from ohlcv_store import read_frame, source_exists
+from model_bundle import load_model_files
+from rf_compiler import load_forest
+from micro_batcher import MicroBatcher
+
 # Cargar configuración centralizada
 def load_config():
     """Carga la configuración desde config.json"""
@@ -33,39 +41,48 @@ model = None
 scaler = None
 features = None
 df = None
+batcher = None
+feature_dtype = None  # model.dtype de config.json, resuelto una vez al cargar
 model_loaded = False
 
 def load_model_and_data():
     """Carga el modelo simple y los datos necesarios"""
-    global model, scaler, features, df, model_loaded
+    global model, scaler, features, df, batcher, feature_dtype, model_loaded
     
     try:
+        feature_dtype = get_feature_dtype()
+        
         # Usar rutas de configuración
         model_path = config['model']['path']
         scaler_path = config['model']['scaler_path']
         features_path = config['model']['features_path']
         
-        if not all(os.path.exists(p) for p in [model_path, scaler_path, features_path]):
+        # Paquete del modelo (o archivos sueltos si aún no se migró)
+        try:
+            bundle = load_model_files(model_path, scaler_path, features_path, with_model=False)
+        except FileNotFoundError:
             print("❌ Archivos del modelo simple no encontrados")
             model_loaded = False
             return
+        features = bundle.features
         
-        # Cargar modelo
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
-        
-        # Cargar scaler
-        with open(scaler_path, 'rb') as f:
-            scaler = pickle.load(f)
+        # Bosque compilado (scaler incluido en los umbrales) si el paquete lo trae
+        forest = load_forest(bundle, feature_dtype)
+        if forest is not None:
+            model, scaler = forest, None
+            print("⚡ Usando el bosque compilado")
+        else:
+            model, scaler = bundle.load_model(), bundle.scaler
         
-        # Cargar features
-        with open(features_path, 'rb') as f:
-            features = pickle.load(f)
+        # Peticiones concurrentes a /predict comparten una llamada al modelo
+        batcher = MicroBatcher(predict_rows,
+                               max_batch=config['api'].get('batch_max_size', 64),
+                               max_wait_ms=config['api'].get('batch_wait_ms', 2))
         
         # Cargar datos
         data_path = 'data/price_data.csv'
-        if os.path.exists(data_path):
-            df = pd.read_csv(data_path)
+        if source_exists(data_path):
+            df = read_frame(data_path)
             # Convertir timestamp a datetime si existe
             if 'timestamp' in df.columns:
                 df['datetime'] = pd.to_datetime(df['timestamp'])
@@ -74,6 +91,12 @@ def load_model_and_data():
             else:
                 # Crear datetime si no existe
                 df['datetime'] = pd.date_range('2023-01-01', periods=len(df), freq='1min')
+            
+            # Indicadores calculados una sola vez (o leídos de la caché)
+            df = get_feature_cache().get_or_compute(df, compute_fn=calculate_technical_indicators,
+                                                    namespace='start_api',
+                                                    version=indicator_version(INDICATOR_COLUMNS, 'simple_model'),
+                                                    symbol_column=None)
         
         model_loaded = True
         print("✅ Modelo simple cargado exitosamente")
@@ -84,70 +107,24 @@ def load_model_and_data():
         print(f"❌ Error al cargar modelo y datos: {e}")
         model_loaded = False
 
+# Indicadores con los nombres que usa el modelo simple (alias del registro)
+INDICATOR_COLUMNS = profile_columns('simple_model')
+
 def calculate_technical_indicators(df):
     """Calcula indicadores técnicos básicos"""
-    # Medias móviles
-    df['sma_5'] = df['close'].rolling(window=5).mean()
-    df['sma_20'] = df['close'].rolling(window=20).mean()
-    df['ema_12'] = df['close'].ewm(span=12).mean()
-    df['ema_26'] = df['close'].ewm(span=26).mean()
-    
-    # RSI
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['rsi'] = 100 - (100 / (1 + rs))
-    
-    # MACD
-    df['macd'] = df['ema_12'] - df['ema_26']
-    df['macd_signal'] = df['macd'].ewm(span=9).mean()
-    df['macd_histogram'] = df['macd'] - df['macd_signal']
-    
-    # Bollinger Bands
-    df['bb_middle'] = df['close'].rolling(window=20).mean()
-    bb_std = df['close'].rolling(window=20).std()
-    df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-    df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-    df['bb_width'] = df['bb_upper'] - df['bb_lower']
-    df['bb_position'] = (df['close'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
-    
-    # Stochastic
-    low_min = df['low'].rolling(window=14).min()
-    high_max = df['high'].rolling(window=14).max()
-    df['stoch_k'] = 100 * ((df['close'] - low_min) / (high_max - low_min))
-    df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
-    
-    # Volumen
-    df['volume_sma'] = df['volume'].rolling(window=20).mean()
-    df['volume_ratio'] = df['volume'] / df['volume_sma']
-    
-    # Momentum
-    df['momentum'] = df['close'] - df['close'].shift(4)
-    df['rate_of_change'] = ((df['close'] - df['close'].shift(10)) / df['close'].shift(10)) * 100
-    
-    # ATR
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    true_range = np.maximum(high_low, np.maximum(high_close, low_close))
-    df['atr'] = true_range.rolling(window=14).mean()
-    
-    # Williams %R
-    highest_high = df['high'].rolling(window=14).max()
-    lowest_low = df['low'].rolling(window=14).min()
-    df['williams_r'] = -100 * ((highest_high - df['close']) / (highest_high - lowest_low))
-    
-    # Cambios de precio
-    df['price_change'] = df['close'].pct_change()
-    df['price_change_5'] = df['close'].pct_change(5)
-    df['price_change_10'] = df['close'].pct_change(10)
-    
-    return df
+    return compute_indicators(df, INDICATOR_COLUMNS, profile='simple_model', fill=False)
+
+def predict_rows(rows):
+    """Probabilidades para un lote de filas de features sin escalar"""
+    if scaler is not None:
+        rows = scaler.transform(rows)
+    return model.predict_proba(rows)
 
 @app.route('/predict', methods=['GET'])
 def predict():
     """Endpoint para predicciones"""
+    global df
+    
     if not model_loaded:
         return jsonify({
             'error': 'Modelo no cargado', 
@@ -170,14 +147,12 @@ def predict():
             else:
                 feature_data.append(0.0)  # Valor por defecto
         
-        feature_data = np.array(feature_data).reshape(1, -1)
-        
-        # Escalar features
-        feature_data_scaled = scaler.transform(feature_data)
+        feature_data = np.array(feature_data, dtype=feature_dtype).reshape(1, -1)
         
-        # Predecir
-        prediction_proba = model.predict_proba(feature_data_scaled)[0]
-        prediction = model.predict(feature_data_scaled)[0]
+        # Escalar y predecir en lote con las peticiones concurrentes
+        prediction_proba = batcher.predict(feature_data[0])
+        # Igual que model.predict: la clase de mayor probabilidad
+        prediction = model.classes_[np.argmax(prediction_proba)]
         
         # Calcular confianza
         confidence = max(prediction_proba)
@@ -220,6 +195,8 @@ def health_check():
 @app.route('/backtest', methods=['GET'])
 def run_backtest():
     """Endpoint para ejecutar backtest simple"""
+    global df
+    
     if not model_loaded or df is None:
         return jsonify({'error': 'Modelo o datos no cargados'}), 500
     
@@ -239,7 +216,7 @@ def run_backtest():
                     features_row.append(0.0)
             feature_data.append(features_row)
         
-        feature_data = np.array(feature_data)
+        feature_data = np.array(feature_data, dtype=feature_dtype)
         
         # Eliminar filas con NaN
         valid_indices = ~np.isnan(feature_data).any(axis=1)
@@ -248,12 +225,9 @@ def run_backtest():
         if len(feature_data_clean) == 0:
             return jsonify({'error': 'No hay datos válidos para backtest'}), 500
         
-        # Escalar features
-        feature_data_scaled = scaler.transform(feature_data_clean)
-        
-        # Predecir
-        predictions = model.predict(feature_data_scaled)
-        probabilities = model.predict_proba(feature_data_scaled)
+        # Predecir (escalado incluido)
+        probabilities = predict_rows(feature_data_clean)
+        predictions = model.classes_[np.argmax(probabilities, axis=1)]
         
         # Calcular métricas
         total_predictions = len(predictions)
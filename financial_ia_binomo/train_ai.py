@@ -5,6 +5,7 @@ Entrenamiento de IA Financiera - Script Completo
 
 import sys
 import os
+from functools import partial
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -16,6 +17,14 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from indicator_registry import compute_indicators, indicator_version, profile_columns
+from feature_cache import get_feature_cache
+from ohlcv_store import read_frame, source_exists
+from model_bundle import save_bundle
+from precision import get_feature_dtype
+from rf_compiler import export_forest
+
 def load_and_prepare_data():
     """Carga y prepara los datos para entrenamiento"""
     print("📊 Cargando y preparando datos...")
@@ -23,21 +32,26 @@ def load_and_prepare_data():
     try:
         # Cargar datos
         data_path = "data/price_data.csv"
-        if not os.path.exists(data_path):
+        if not source_exists(data_path):
             print("❌ Archivo de datos no encontrado")
             return None, None, None
         
-        df = pd.read_csv(data_path)
+        df = read_frame(data_path)
         df['datetime'] = pd.to_datetime(df['datetime'])
         
         print(f"✅ Datos cargados: {len(df):,} registros")
         print(f"   Rango: {df['datetime'].min()} a {df['datetime'].max()}")
         
-        # Agregar indicadores técnicos
-        df = add_technical_indicators(df)
-        
         # Obtener características
         features = get_feature_columns()
+        
+        # Agregar indicadores técnicos (reutilizando la caché si los datos no cambiaron)
+        df = get_feature_cache().get_or_compute(df, features,
+                                                compute_fn=partial(add_technical_indicators, features=features),
+                                                namespace='train_ai',
+                                                version=indicator_version(profile_columns('train_ai', features),
+                                                                          'train_ai'),
+                                                symbol_column=None)
         available_features = [f for f in features if f in df.columns]
         
         print(f"✅ Indicadores técnicos agregados: {len(available_features)} características")
@@ -71,63 +85,13 @@ def load_and_prepare_data():
         print(f"❌ Error preparando datos: {e}")
         return None, None, None
 
-def add_technical_indicators(df):
+def add_technical_indicators(df, features=None):
     """Agrega indicadores técnicos al DataFrame"""
     try:
-        # Medias móviles
-        df['SMA_5'] = df['close'].rolling(window=5).mean()
-        df['SMA_10'] = df['close'].rolling(window=10).mean()
-        df['SMA_20'] = df['close'].rolling(window=20).mean()
-        df['EMA_12'] = df['close'].ewm(span=12).mean()
-        df['EMA_26'] = df['close'].ewm(span=26).mean()
-        
-        # MACD
-        df['MACD'] = df['EMA_12'] - df['EMA_26']
-        df['MACD_signal'] = df['MACD'].ewm(span=9).mean()
-        df['MACD_histogram'] = df['MACD'] - df['MACD_signal']
-        
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI_14'] = 100 - (100 / (1 + rs))
-        
-        # Bollinger Bands
-        df['BB_middle'] = df['close'].rolling(window=20).mean()
-        bb_std = df['close'].rolling(window=20).std()
-        df['BB_upper'] = df['BB_middle'] + (bb_std * 2)
-        df['BB_lower'] = df['BB_middle'] - (bb_std * 2)
-        df['BB_width'] = df['BB_upper'] - df['BB_lower']
-        df['BB_position'] = (df['close'] - df['BB_lower']) / (df['BB_upper'] - df['BB_lower'])
-        
-        # Stochastic
-        low_min = df['low'].rolling(window=14).min()
-        high_max = df['high'].rolling(window=14).max()
-        df['Stoch_K'] = 100 * ((df['close'] - low_min) / (high_max - low_min))
-        df['Stoch_D'] = df['Stoch_K'].rolling(window=3).mean()
-        
-        # Volumen
-        df['Volume_SMA'] = df['volume'].rolling(window=20).mean()
-        df['Volume_ratio'] = df['volume'] / df['Volume_SMA']
-        
-        # Momentum
-        df['ROC'] = ((df['close'] - df['close'].shift(10)) / df['close'].shift(10)) * 100
-        df['MOM'] = df['close'] - df['close'].shift(10)
-        
-        # ATR (Average True Range)
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        true_range = np.maximum(high_low, np.maximum(high_close, low_close))
-        df['ATR'] = true_range.rolling(window=14).mean()
-        
-        # Williams %R
-        highest_high = df['high'].rolling(window=14).max()
-        lowest_low = df['low'].rolling(window=14).min()
-        df['Williams_R'] = ((highest_high - df['close']) / (highest_high - lowest_low)) * -100
-        
-        return df
+        # Solo se calculan las columnas pedidas y sus dependencias
+        # Columnas del perfil 'train_ai' (BB_width es el ancho absoluto de las bandas)
+        columns = profile_columns('train_ai', features)
+        return compute_indicators(df, columns, profile='train_ai', fill=False)
         
     except Exception as e:
         print(f"❌ Error agregando indicadores: {e}")
@@ -229,32 +193,24 @@ def train_models(X, y, features):
     
     return models[best_model], scaler, features, results
 
-def save_model(model, scaler, features, results):
+def save_model(model, scaler, features, results, training_data=None):
     """Guarda el modelo entrenado"""
     print("\n💾 Guardando modelo...")
     
     try:
         os.makedirs("models", exist_ok=True)
         
-        # Guardar modelo
-        model_path = "models/best_model.pkl"
-        joblib.dump(model, model_path)
-        
-        # Guardar scaler
-        scaler_path = "models/scaler.pkl"
-        joblib.dump(scaler, scaler_path)
-        
-        # Guardar características
-        features_path = "models/features.pkl"
-        joblib.dump(features, features_path)
+        # Modelo, scaler y características en un solo paquete con manifiesto
+        bundle_path = "models/best_model.bundle"
+        bundle = save_bundle(bundle_path, model, features, scaler, training_data=training_data)
+        if export_forest(bundle, get_feature_dtype()):
+            print("✅ Bosque compilado exportado (forest.npz)")
         
         # Guardar resultados
         results_path = "models/training_results.pkl"
         joblib.dump(results, results_path)
         
-        print(f"✅ Modelo guardado en: {model_path}")
-        print(f"✅ Scaler guardado en: {scaler_path}")
-        print(f"✅ Características guardadas en: {features_path}")
+        print(f"✅ Modelo, scaler y características guardados en: {bundle_path}")
         print(f"✅ Resultados guardados en: {results_path}")
         
         return True
@@ -302,7 +258,7 @@ def main():
     model, scaler, features, results = train_models(X, y, features)
     
     # 3. Guardar modelo
-    if save_model(model, scaler, features, results):
+    if save_model(model, scaler, features, results, training_data=X):
         print("\n✅ Modelo entrenado y guardado exitosamente!")
     else:
         print("\n❌ Error guardando modelo")